@@ -0,0 +1 @@
+# Корневой conftest: pytest добавляет каталог репозитория в sys.path, поэтому тесты импортируют пакет как src.propagation
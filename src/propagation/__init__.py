@@ -1,9 +1,14 @@
 from .model.waves.spherical_wave import SphericalWave
+from .model.waves.radial_spherical_wave import RadialSphericalWave
+from .model.waves.wave_batch import WaveBatch
 from .model.areas.grid import CartesianGrid
 from .model.areas.grid import PolarGrid
 from .model.areas.grid import FrequencyGrid
+from .model.areas.grid import RadialGrid
+from .model.areas.grid_registry import grid_registry
 from .model.areas.aperture import Aperture
 from .utils.math import units
+from .utils.math.precision import Precision, set_precision
 from .utils.optic import propagation_methods
 
 __version__ = "2.0.0.dev"
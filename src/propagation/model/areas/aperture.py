@@ -1,22 +1,76 @@
-from .grid import PolarGrid
+from typing import Tuple, Union
+
+import numpy as np
+
+from .grid import PolarGrid, RadialGrid
 from ...utils.optic.field import circ
 from ...utils.math.general import get_slice
 from ...utils.math.units import px2m
+from ...utils.math.array_cache import ArrayCache
+
+# Кэш масок апертур по (сетка, диаметр): модификация апертуры многократно возвращается к одним и тем же диаметрам
+aperture_mask_cache = ArrayCache(max_bytes=128 * 2 ** 20)
+
+
+def aperture_bounding_box(polar_grid: Union[PolarGrid, RadialGrid], aperture_diameter: float) -> Tuple[slice, ...]:
+    """
+    Возвращает ограничивающий апертуру прямоугольник с запасом в пиксель в виде срезов сетки:
+    за его пределами радиус заведомо больше D / 2
+    :param polar_grid: сетка в полярных координатах либо радиальная сетка
+    :param aperture_diameter: диаметр апертуры [м]
+    :return: (строки, столбцы) для двумерной сетки, (отсчеты,) для радиальной
+    """
+    half_width = float(aperture_diameter) / 2 + polar_grid.pixel_size
+
+    def axis_slice(axis: np.ndarray) -> slice:
+        inside = np.flatnonzero(np.abs(axis) <= half_width)
+        return slice(inside[0], inside[-1] + 1) if inside.size else slice(0, 0)
+
+    if isinstance(polar_grid, RadialGrid):
+        return axis_slice(polar_grid.grid),
+
+    return axis_slice(polar_grid.cart_grid.y_axis), axis_slice(polar_grid.cart_grid.x_axis)
+
+
+def circ_mask(polar_grid: Union[PolarGrid, RadialGrid], aperture_diameter: float) -> np.ndarray:
+    """
+    Возвращает маску circ диаметром aperture_diameter [м] на сетке polar_grid (только для чтения, из кэша).
+    На двумерной сетке circ рассчитывается только в ограничивающем апертуру прямоугольнике
+    :param polar_grid: сетка в полярных координатах либо радиальная сетка
+    :param aperture_diameter: диаметр апертуры [м]
+    :return: маска апертуры того же типа данных, что и сетка
+    """
+    # скаляры numpy приводятся к float, чтобы маска всегда рассчитывалась в точности сетки
+    aperture_diameter = float(aperture_diameter)
+
+    def build() -> np.ndarray:
+        if isinstance(polar_grid, RadialGrid):
+            return circ(polar_grid.grid, w=aperture_diameter).astype(polar_grid.dtype)
+
+        mask = np.zeros((polar_grid.height, polar_grid.width), dtype=polar_grid.dtype)
+
+        box = aperture_bounding_box(polar_grid, aperture_diameter)
+        mask[box] = circ(polar_grid.grid[box], w=aperture_diameter)
+
+        return mask
+
+    return aperture_mask_cache.get(('circ', polar_grid, aperture_diameter), build)
 
 
 class Aperture:
     """ Апертура, circ """
 
-    def __init__(self, polar_grid: PolarGrid, aperture_diameter: float):
+    def __init__(self, polar_grid: Union[PolarGrid, RadialGrid], aperture_diameter: float):
         """
         Создаёт апертуру (circ) на основе сетки в полярных координатах
-        :param polar_grid: сетка в полярных координатах
+        :param polar_grid: сетка в полярных координатах либо радиальная сетка (одномерная апертура)
         :param aperture_diameter: диаметр апертуры [px]
         """
         aperture_diameter = px2m(aperture_diameter, px_size_m=polar_grid.pixel_size)  # [м]
         self._aperture_diameter = aperture_diameter
         self._polar_grid = polar_grid
-        self._aperture_view = circ(polar_grid.grid, w=aperture_diameter)
+        self._aperture_view = circ_mask(polar_grid, aperture_diameter)
+        self._bounding_box = aperture_bounding_box(polar_grid, aperture_diameter)
 
     def modify(self, wave, z: float):
         """
@@ -30,6 +84,10 @@ class Aperture:
         if not isinstance(wave, Wave):
             raise TypeError('Переданный параметр "wave" не является Wave')
 
+        if isinstance(self._polar_grid, RadialGrid):
+            self._modify_radial(wave, z)
+            return
+
         wrp_phase_values = get_slice(
             wave.phase,
             wave.phase.shape[0] // 2,
@@ -41,26 +99,52 @@ class Aperture:
         )[1]
 
         # Х координата скачка апертуры с 0 на 1
-        jump = next((i for i, v in enumerate(ap_values) if v == 1),
-                    None)
+        inside = np.flatnonzero(ap_values == 1)
+        if inside.size == 0:
+            raise ValueError('Апертура не пересекает центральную строку сетки')
+        jump = inside[0]
 
-        # ближайшая к скачку апертуры координата Х слева от скачка
+        # координаты Х, в которых неразвернутая фаза переходит через ноль снизу вверх:
+        # wrp_phase_values[i] > 0 и wrp_phase_values[i - 1] < 0 (для i = 0 сравнивается с последним отсчетом)
+        crossings = np.flatnonzero((wrp_phase_values > 0) & (np.roll(wrp_phase_values, 1) < 0))
+
+        # ближайшая к скачку апертуры координата Х слева от скачка (1 <= i <= jump)
         # в кторой значение неразвернутой фазы наиболее близко к нулю
-        lwrp = next((i for i in range(jump, 0, -1) if (wrp_phase_values[i] > 0) and (wrp_phase_values[i - 1] < 0)),
-                    1)
+        left = crossings[(crossings >= 1) & (crossings <= jump)]
+        lwrp = left[-1] if left.size else 1
 
-        # ближайшая к скачку апертуры координата Х справа от скачка
+        # ближайшая к скачку апертуры координата Х справа от скачка (i >= jump)
         # в кторой значение неразвернутой фазы наиболее близко к нулю
-        rwrp = next((i for i in range(jump, wave.grid.grid[0].shape[0], 1) if
-                     (wrp_phase_values[i] > 0) and (wrp_phase_values[i - 1] < 0)),
-                    1)
+        right = crossings[crossings >= jump]
+        rwrp = right[0] if right.size else 1
 
         # определение, какая из нулевых координат неразвернутой фазы ближе к скачку
         jump = rwrp if lwrp - jump > rwrp - jump else lwrp
 
         # генерация новой апертуры с скорректированным диаметром
         # в случае, если волна сходящаяся, вводится дополнительная корректировка
-        new_aperture_diameter = (wave.grid.grid[0].shape[0] // 2 - jump) * 2
+        new_aperture_diameter = int(wave.phase.shape[0] // 2 - jump) * 2
+        new_aperture_diameter += 2 if z < wave.focal_len else 0
+
+        self.aperture_diameter = new_aperture_diameter
+
+    def _modify_radial(self, wave, z: float):
+        """
+        Модификация одномерной апертуры на радиальной сетке: край апертуры переносится в ближайший снаружи отсчет,
+        в котором неразвернутая фаза переходит через ноль (аналогично сечению двумерной апертуры)
+        """
+        wrp_phase_values = wave.phase
+        r_grid = self._polar_grid.grid
+
+        # крайний отсчет внутри апертуры
+        edge = np.flatnonzero(self.aperture_view)[-1]
+
+        # отсчеты i >= edge, в которых wrp_phase_values[i] > 0 и wrp_phase_values[i + 1] < 0
+        crossings = edge + np.flatnonzero((wrp_phase_values[edge:-1] > 0) & (wrp_phase_values[edge + 1:] < 0))
+        crossing = crossings[0] if crossings.size else wrp_phase_values.size - 1
+
+        # в случае, если волна сходящаяся, вводится дополнительная корректировка
+        new_aperture_diameter = int(round(r_grid[crossing] / self._polar_grid.pixel_size)) * 2
         new_aperture_diameter += 2 if z < wave.focal_len else 0
 
         self.aperture_diameter = new_aperture_diameter
@@ -72,7 +156,8 @@ class Aperture:
     @aperture_diameter.setter
     def aperture_diameter(self, aperture_diameter):
         self._aperture_diameter = px2m(aperture_diameter, px_size_m=self._polar_grid.pixel_size)  # [м]
-        self._aperture_view = circ(self.polar_grid.grid, w=self._aperture_diameter)
+        self._aperture_view = circ_mask(self.polar_grid, self._aperture_diameter)
+        self._bounding_box = aperture_bounding_box(self.polar_grid, self._aperture_diameter)
 
     @property
     def polar_grid(self):
@@ -81,3 +166,10 @@ class Aperture:
     @property
     def aperture_view(self):
         return self._aperture_view
+
+    @property
+    def bounding_box(self) -> Tuple[slice, ...]:
+        """
+        Ограничивающий апертуру прямоугольник (срезы сетки), вне которого маска апертуры нулевая
+        """
+        return self._bounding_box
@@ -1,9 +1,11 @@
 from abc import ABC
 from collections import namedtuple
+from typing import Union
 
 import numpy as np
 from numpy.fft import fftshift
 
+from ...utils.math.precision import Precision, get_precision
 from ...utils.math.units import (
     px2m,
     m2px
@@ -14,10 +16,53 @@ Coordinate_grid = namedtuple("Grid", "y_grid x_grid")
 
 
 class Grid(ABC):
-    def __init__(self, height, width, pixel_size):
+    def __init__(self, height, width, pixel_size, precision: Union[Precision, str, None] = None):
         self._height = height
         self._width = width
         self._pixel_size = pixel_size
+        self._precision = get_precision(precision)
+        self._frozen = False
+
+    def freeze(self) -> 'Grid':
+        """
+        Делает сетку неизменяемой (например, для разделения между волнами, апертурами и решателями):
+        параметры сетки нельзя изменить, а массивы координат доступны только для чтения
+        :return: эта же сетка
+        """
+        self._frozen = True
+        for array in self._arrays():
+            array.flags.writeable = False
+
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def _arrays(self):
+        """ Уже рассчитанные массивы координат сетки """
+        return ()
+
+    def _check_frozen(self):
+        if self._frozen:
+            raise AttributeError(f'{type(self).__name__} неизменяема: сетка разделяется между несколькими объектами')
+
+    def _cached(self, array: np.ndarray) -> np.ndarray:
+        """ Подготавливает лениво рассчитанный массив к хранению в сетке """
+        if self._frozen:
+            array.flags.writeable = False
+
+        return array
+
+    @property
+    def precision(self) -> Precision:
+        """ Точность вычислений на сетке """
+        return self._precision
+
+    @property
+    def dtype(self) -> np.dtype:
+        """ Тип данных координат сетки """
+        return self._precision.real_dtype
 
     @property
     def pixel_size(self) -> float:
@@ -26,6 +71,7 @@ class Grid(ABC):
 
     @pixel_size.setter
     def pixel_size(self, pixel_size):
+        self._check_frozen()
         self._pixel_size = pixel_size
 
     @property
@@ -35,6 +81,7 @@ class Grid(ABC):
 
     @height.setter
     def height(self, height):
+        self._check_frozen()
         self._height = height
 
     @property
@@ -44,25 +91,59 @@ class Grid(ABC):
 
     @width.setter
     def width(self, width):
+        self._check_frozen()
         self._width = width
 
 
-class CartesianGrid(Grid):
-    """ Центрированная сетка в декартовых координатах (квадратная матрица) """
+class SeparableGrid(Grid, ABC):
+    """
+    Сетка, разделимая по осям: хранятся только одномерные оси, а координаты отдаются в виде открытой
+    (np.ogrid) сетки из транслируемых массивов (height, 1) и (1, width).
+    Плотная сетка (np.meshgrid) создаётся только по запросу и кэшируется
+    """
 
-    def __init__(self, height, width, pixel_size=5.04e-6):
-        super().__init__(height, width, pixel_size)
+    def __init__(self, height, width, pixel_size, precision: Union[Precision, str, None] = None):
+        super().__init__(height, width, pixel_size, precision)
+        self._y_axis = None
+        self._x_axis = None
+        self._dense_grid = None
 
-        grid = px2m(np.mgrid[
-            -self.height / 2:self.height / 2,
-            -self.width / 2:self.width / 2
-        ])
+    @property
+    def y_axis(self) -> np.ndarray:
+        """ Одномерная ось Y (по строкам) """
+        return self._y_axis
 
-        self._grid = Coordinate_grid(*grid)
+    @property
+    def x_axis(self) -> np.ndarray:
+        """ Одномерная ось X (по столбцам) """
+        return self._x_axis
 
     @property
     def grid(self) -> Coordinate_grid:
-        return self._grid
+        """ Открытая сетка: массивы (height, 1) и (1, width), транслируемые до (height, width) """
+        return Coordinate_grid(self._y_axis[:, np.newaxis], self._x_axis[np.newaxis, :])
+
+    @property
+    def dense_grid(self) -> Coordinate_grid:
+        """ Плотная сетка: два массива (height, width) """
+        if self._dense_grid is None:
+            self._dense_grid = Coordinate_grid(*map(self._cached,
+                                                    np.meshgrid(self._y_axis, self._x_axis, indexing='ij')))
+
+        return self._dense_grid
+
+    def _arrays(self):
+        return (self._y_axis, self._x_axis) + (() if self._dense_grid is None else tuple(self._dense_grid))
+
+
+class CartesianGrid(SeparableGrid):
+    """ Центрированная сетка в декартовых координатах (квадратная матрица) """
+
+    def __init__(self, height, width, pixel_size=5.04e-6, precision: Union[Precision, str, None] = None):
+        super().__init__(height, width, pixel_size, precision)
+
+        self._y_axis = px2m(np.arange(-self.height / 2, self.height / 2, dtype=self.dtype), px_size_m=self.pixel_size)
+        self._x_axis = px2m(np.arange(-self.width / 2, self.width / 2, dtype=self.dtype), px_size_m=self.pixel_size)
 
 
 class PolarGrid(Grid):
@@ -70,32 +151,107 @@ class PolarGrid(Grid):
 
     def __init__(self, cart_grid: CartesianGrid):
         """ Создание сетки в полярных координатах на основе сетки в декартовых координатах """
-        super().__init__(cart_grid.height, cart_grid.width, cart_grid.pixel_size)
-        self._grid = np.sqrt(sum(map(lambda x: x * x, cart_grid.grid)))
+        super().__init__(cart_grid.height, cart_grid.width, cart_grid.pixel_size, cart_grid.precision)
+        self._cart_grid = cart_grid
+        self._grid = None
+
+    @property
+    def cart_grid(self) -> CartesianGrid:
+        """ Сетка в декартовых координатах, на основе которой построена полярная """
+        return self._cart_grid
 
     @property
     def grid(self) -> np.ndarray:
+        """ Радиусы точек сетки (height, width); рассчитываются при первом обращении """
+        if self._grid is None:
+            y_grid, x_grid = self._cart_grid.grid
+            self._grid = self._cached(np.sqrt(y_grid * y_grid + x_grid * x_grid))
+
         return self._grid
 
+    def _arrays(self):
+        return () if self._grid is None else (self._grid,)
+
 
-class FrequencyGrid(Grid):
+class FrequencyGrid(SeparableGrid):
     """ Центрированная частотная сетка в декартовых координатах """
 
     def __init__(self, cart_grid: CartesianGrid):
         """ Создание частотной сетки на основе сетки в декартовых координатах """
-        super().__init__(cart_grid.height, cart_grid.width, cart_grid.pixel_size)
+        super().__init__(cart_grid.height, cart_grid.width, cart_grid.pixel_size, cart_grid.precision)
 
         # создание сетки в частотной области при условии выполнения теоремы Котельникова
-        nu_x_grid, nu_y_grid = (
-            m2px(cart_grid.grid[0]) / (self.height * self.pixel_size),
-            m2px(cart_grid.grid[1]) / (self.width * self.pixel_size)
+        nu_y_axis, nu_x_axis = (
+            m2px(cart_grid.y_axis, px_size_m=self.pixel_size) / (self.height * self.pixel_size),
+            m2px(cart_grid.x_axis, px_size_m=self.pixel_size) / (self.width * self.pixel_size)
         )
 
         # сдвиг высоких частот к краям сетки
-        grid = (fftshift(nu_x_grid), fftshift(nu_y_grid))
+        self._y_axis, self._x_axis = fftshift(nu_y_axis), fftshift(nu_x_axis)
+
+
+class RadialGrid(Grid):
+    """
+    Одномерная радиальная сетка квазидискретного преобразования Ханкеля нулевого порядка для радиально-симметричных
+    полей: r_n = j_n * R / S, nu_n = j_n / (2 * pi * R), где j_n - n-й ноль функции Бесселя J0, S = j_(N + 1).
+    Guizar-Sicairos M., Gutierrez-Vega J. C. "Computation of quasi-discrete Hankel transforms of integer order
+    for propagating optical wave fields", JOSA A 21, 53 (2004)
+    """
+
+    def __init__(self, points, pixel_size=5.04e-6, precision: Union[Precision, str, None] = None):
+        """
+        Создание радиальной сетки
+        :param points: количество отсчетов по радиусу
+        :param pixel_size: размер пикселя [м]; радиус сетки R = points * pixel_size,
+        поэтому шаг между отсчетами близок к pixel_size
+        :param precision: точность вычислений
+        """
+        super().__init__(1, points, pixel_size, precision)
+
+        from scipy.special import jn_zeros
+
+        zeros = jn_zeros(0, points + 1)
+        self._bessel_zeros = zeros[:-1]
+        self._bessel_zero_limit = zeros[-1]
+        self._radius = points * pixel_size
+
+        self._grid = (self._bessel_zeros * self._radius / self._bessel_zero_limit).astype(self.dtype)
+        self._frequency_grid = (self._bessel_zeros / (2 * np.pi * self._radius)).astype(self.dtype)
+
+    def _arrays(self):
+        return self._grid, self._frequency_grid
 
-        self._grid = Coordinate_grid(*grid)
+    @classmethod
+    def from_cartesian(cls, cart_grid: CartesianGrid) -> 'RadialGrid':
+        """ Создание радиальной сетки, вписанной в сетку в декартовых координатах """
+        return cls(min(cart_grid.height, cart_grid.width) // 2, cart_grid.pixel_size, cart_grid.precision)
 
     @property
-    def grid(self) -> Coordinate_grid:
+    def grid(self) -> np.ndarray:
+        """ Радиальные координаты отсчетов [м] """
         return self._grid
+
+    @property
+    def frequency_grid(self) -> np.ndarray:
+        """ Радиальные пространственные частоты отсчетов спектра [1/м] """
+        return self._frequency_grid
+
+    @property
+    def points(self) -> int:
+        """ Количество отсчетов по радиусу """
+        return self.width
+
+    @property
+    def radius(self) -> float:
+        """ Радиус сетки [м] """
+        return self._radius
+
+    @property
+    def bessel_zeros(self) -> np.ndarray:
+        """ Нули j_1 ... j_N функции Бесселя J0 """
+        return self._bessel_zeros
+
+    @property
+    def bessel_zero_limit(self) -> float:
+        """ Ноль j_(N + 1) функции Бесселя J0 """
+        return self._bessel_zero_limit
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple, Union
+
+import numpy as np
+
+from .grid import CartesianGrid, FrequencyGrid, PolarGrid
+from ...utils.math.precision import Precision, get_precision
+
+
+class GridRegistry:
+    """
+    Реестр сеток с ключом (height, width, pixel_size, точность): при одинаковых параметрах возвращаются одни и те же
+    неизменяемые (замороженные) экземпляры сеток и производных величин, поэтому волны, апертуры и решатели TIE
+    в пределах процесса разделяют одни и те же массивы координат
+    """
+
+    def __init__(self, maxsize: int = 64):
+        """
+        :param maxsize: максимальное количество хранимых объектов (давно не использованные удаляются)
+        """
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def cartesian(self, height: int, width: int, pixel_size: float,
+                  precision: Union[Precision, str, None] = None) -> CartesianGrid:
+        """ Сетка в декартовых координатах """
+        key = self._key('cartesian', height, width, pixel_size, precision)
+        return self._get(key, lambda: CartesianGrid(*key[1:]).freeze())
+
+    def polar(self, height: int, width: int, pixel_size: float,
+              precision: Union[Precision, str, None] = None) -> PolarGrid:
+        """ Сетка в полярных координатах """
+        key = self._key('polar', height, width, pixel_size, precision)
+        return self._get(key, lambda: PolarGrid(self.cartesian(*key[1:])).freeze())
+
+    def frequency(self, height: int, width: int, pixel_size: float,
+                  precision: Union[Precision, str, None] = None) -> FrequencyGrid:
+        """ Частотная сетка (сдвинута высокими частотами к краям) """
+        key = self._key('frequency', height, width, pixel_size, precision)
+        return self._get(key, lambda: FrequencyGrid(self.cartesian(*key[1:])).freeze())
+
+    def frequency_coefs(self, height: int, width: int, pixel_size: float,
+                        precision: Union[Precision, str, None] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Частотные коэффициенты kx = 1j * 2pi * nu_x и ky = 1j * 2pi * nu_y псевдодифференциальных операторов
+        в виде открытой сетки: (1, width) и (height, 1)
+        """
+        key = self._key('frequency_coefs', height, width, pixel_size, precision)
+
+        def build():
+            nu_y_grid, nu_x_grid = self.frequency(*key[1:]).grid
+            return _read_only(1j * 2 * np.pi * nu_x_grid), _read_only(1j * 2 * np.pi * nu_y_grid)
+
+        return self._get(key, build)
+
+    def rfrequency_coefs(self, height: int, width: int, pixel_size: float,
+                         precision: Union[Precision, str, None] = None,
+                         nyquist: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Частотные коэффициенты kx и ky псевдодифференциальных операторов для половины спектра вещественного массива
+        (rfft2): (1, width // 2 + 1) и (height, 1), частоты - в порядке numpy.fft (rfftfreq и fftfreq).
+        Центрированная частотная сетка при нечетных размерах сдвинута на половину отсчета, поэтому коэффициенты
+        строятся не из неё: половина спектра требует эрмитовой симметрии kx(-nu) = -kx(nu) и нулевой частоты на краю.
+        Коэффициенты частот Найквиста (при четных размерах) обнулены: производная этой гармоники вещественной функции
+        не вещественна и отбрасывается так же, как real() после ifft2 в полном спектре
+        :param nyquist: сохранить частоты Найквиста (для операторов второго порядка, например, Лапласиана)
+        """
+        key = self._key('rfrequency_coefs_nyquist' if nyquist else 'rfrequency_coefs',
+                        height, width, pixel_size, precision)
+
+        def build():
+            height, width, pixel_size, precision = key[1:]
+            nu_x = np.fft.rfftfreq(width, d=pixel_size).astype(precision.real_dtype)
+            nu_y = np.fft.fftfreq(height, d=pixel_size).astype(precision.real_dtype)
+
+            if not nyquist:
+                if width % 2 == 0:
+                    nu_x[-1] = 0
+                if height % 2 == 0:
+                    nu_y[height // 2] = 0
+
+            return _read_only(1j * 2 * np.pi * nu_x.reshape(1, -1)), _read_only(1j * 2 * np.pi * nu_y.reshape(-1, 1))
+
+        return self._get(key, build)
+
+    def laplacian_coefs(self, height: int, width: int, pixel_size: float,
+                        precision: Union[Precision, str, None] = None) -> np.ndarray:
+        """ Частотные коэффициенты оператора Лапласа kx^2 + ky^2 (height, width) """
+        key = self._key('laplacian_coefs', height, width, pixel_size, precision)
+
+        def build():
+            kx, ky = self.frequency_coefs(*key[1:])
+            return _read_only(kx ** 2 + ky ** 2)
+
+        return self._get(key, build)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(kind: str, height: int, width: int, pixel_size: float,
+             precision: Union[Precision, str, None]) -> tuple:
+        # скаляры numpy приводятся к встроенным типам, чтобы равные параметры давали равные ключи
+        return kind, int(height), int(width), float(pixel_size), get_precision(precision)
+
+    def _get(self, key: Hashable, builder: Callable):
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = self._entries[key] = builder()
+
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+        return entry
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+# Общий реестр сеток
+grid_registry = GridRegistry()
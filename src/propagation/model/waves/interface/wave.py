@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from collections import namedtuple
+from typing import Callable, Hashable, Tuple
 
 import numpy as np
 
@@ -7,12 +8,89 @@ from ...areas.aperture import Aperture
 from ...areas.grid import CartesianGrid
 from ...propagation.interface.propagate import Propagable
 
+# Именованный кортеж для статистики мемоизации (по аналогии с functools.lru_cache)
+MemoInfo = namedtuple("MemoInfo", "hits misses entries field_version")
+
 
 class Wave(Propagable, ABC):
     """
-    Интерфейс волны
+    Интерфейс волны.
+    Результаты дорогих операций над полем (модификация апертуры, разворачивание фазы, радиус волнового фронта)
+    мемоизируются с ключом по версии поля, состоянию апертуры и z: версия увеличивается при каждом изменении поля
+    через field (при изменении массива поля на месте необходимо вызвать clear_memo)
     """
 
+    def __init__(self):
+        self._field_version = 0
+        self._memo = {}
+        self._memo_hits = 0
+        self._memo_misses = 0
+
+    def modify_aperture(self, aperture: Aperture, z: float) -> Aperture:
+        """
+        Мемоизированная модификация апертуры (Aperture.modify) для текущего поля волны.
+        Ключ строится по исходному диаметру; модифицированный диаметр регистрируется под своим ключом как
+        уже модифицированный, поэтому повторный вызов с той же (уже измененной) апертурой не вызывает modify
+        :param aperture: апертура (circ)
+        :param z: дистанция, на которую распространилась волна из начала координат
+        :return: модифицированная апертура
+        """
+        key = ('aperture', aperture.polar_grid, aperture.aperture_diameter, z)
+
+        def modify():
+            aperture.modify(self, z)
+            return aperture.aperture_diameter
+
+        modified_diameter = self.memoize(key, modify)
+        self._memo.setdefault(('aperture', aperture.polar_grid, modified_diameter, z), modified_diameter)
+
+        # повторное применение сохранённой модификации к апертуре (диаметр задаётся в [px], как в Aperture.modify)
+        if aperture.aperture_diameter != modified_diameter:
+            aperture.aperture_diameter = int(round(modified_diameter / aperture.polar_grid.pixel_size))
+
+        return aperture
+
+    def memoize(self, key: Hashable, compute: Callable):
+        """
+        Возвращает результат для ключа key при текущей версии поля, рассчитывая его при помощи compute при промахе.
+        Возвращаемые массивы доступны только для чтения, так как разделяются между вызовами
+        :param key: ключ, однозначно определяющий результат при неизменном поле
+        :param compute: функция без аргументов, рассчитывающая результат
+        :return: результат
+        """
+        if key in self._memo:
+            self._memo_hits += 1
+            return self._memo[key]
+
+        self._memo_misses += 1
+
+        result = compute()
+        if isinstance(result, np.ndarray):
+            result.flags.writeable = False
+
+        self._memo[key] = result
+        return result
+
+    def clear_memo(self):
+        """ Сбрасывает мемоизированные результаты (например, после изменения массива поля на месте) """
+        self._field_version += 1
+        self._memo.clear()
+
+    def memo_info(self) -> MemoInfo:
+        """ Статистика мемоизации """
+        return MemoInfo(self._memo_hits, self._memo_misses, len(self._memo), self._field_version)
+
+    def memo_keys(self) -> Tuple[Hashable, ...]:
+        """ Ключи мемоизированных для текущей версии поля результатов """
+        return tuple(self._memo)
+
+    @property
+    def field_version(self) -> int:
+        """
+        Версия поля волны: увеличивается при каждом изменении поля
+        """
+        return self._field_version
+
     @abstractmethod
     def get_wrapped_phase(self, *, aperture: Aperture = None, z: float = None) -> np.ndarray:
         """
@@ -0,0 +1,204 @@
+from typing import Tuple
+
+import numpy as np
+
+from ..areas.grid import CartesianGrid, RadialGrid
+from ...model.areas.aperture import Aperture
+from ...model.waves.interface.wave import Wave
+from ...utils.math import units
+from ...utils.math.general import calc_amplitude
+from ...utils.math.general import calculate_radius
+from ...utils.optic.field import gauss_1d, spherical_phase
+from ...utils.optic.propagation_methods import hankel_propagation
+
+
+class RadialSphericalWave(Wave):
+    """
+    Радиально-симметричная волна со сферической аберрацией или сходящаяся сферическая волна.
+    Поле хранится одномерным профилем на радиальной сетке RadialGrid и распространяется преобразованием Ханкеля,
+    а в двумерное распределение разворачивается только по требованию (to_cartesian), например, для построения графиков
+    """
+
+    def __init__(self, grid: RadialGrid, focal_len: float, gaussian_width_param: int, wavelength: float):
+        """
+        Создание радиального профиля поля
+        :param grid: радиальная сетка расчёта распределения поля (задаёт и точность вычислений волны)
+        :param focal_len: фокусное расстояние [м]
+        :param gaussian_width_param: ширина гауссоиды на уровне интенсивности 1/e^2 [px]
+        :param wavelength: длина волны [м]
+        """
+        super().__init__()
+
+        self._grid = grid
+        self._focal_len = focal_len
+        self._gaussian_width_param = gaussian_width_param
+        self._wavelength = wavelength
+
+        # задание профиля интенсивности волны
+        r_grid = self._grid.grid
+        gaussian_width_param = units.px2m(gaussian_width_param, px_size_m=grid.pixel_size)
+        self._intensity = gauss_1d(r_grid, w=gaussian_width_param / 4)
+
+        # волновой вектор
+        k = 2 * np.pi / self._wavelength
+        # задание профиля комлексной амплитуды поля
+        radius_vector_phase = spherical_phase(r_grid, 0., focal_len, k)
+        self._amplitude = np.sqrt(self._intensity)
+        self._field = self._amplitude * np.exp(-1j * radius_vector_phase)
+
+        # профиль фазы рассчитывается при первом обращении
+        self._phase = None
+
+    def get_wrapped_phase(self, *, aperture: Aperture = None, z: float = None) -> np.ndarray:
+        if (aperture and z) is not None:
+
+            # оптимизация апертуры для правильного разворачивания фазы
+            self.modify_aperture(aperture, z)
+
+            return self.phase * aperture.aperture_view
+        else:
+            return self.phase
+
+    def get_unwrapped_phase(self, *, aperture: Aperture = None, z: float = None) -> Tuple[np.ndarray, Aperture]:
+        wrapped_phase = self.get_wrapped_phase(aperture=aperture, z=z)
+
+        if aperture is None:
+            return self.memoize(('unwrapped_phase',), lambda: np.unwrap(wrapped_phase)), aperture
+
+        def unwrap():
+            # профиль фазы упорядочен по радиусу, поэтому разворачивается одномерным np.unwrap от края апертуры
+            # к центру (значение на краю сохраняется), а за пределами апертуры остаётся нулевым,
+            # как и при двумерном разворачивании
+            inside = np.count_nonzero(aperture.aperture_view)
+            unwrapped_phase = np.zeros_like(wrapped_phase)
+            unwrapped_phase[:inside] = np.unwrap(wrapped_phase[inside - 1::-1])[::-1]
+            return unwrapped_phase
+
+        key = ('unwrapped_phase', aperture.polar_grid, aperture.aperture_diameter)
+        return self.memoize(key, unwrap), aperture
+
+    def get_wavefront_radius(self, *, aperture: Aperture, z: float) -> float:
+        # развернутая фаза, обрезанная апертурой
+        cut_phase, new_aperture = self.get_unwrapped_phase(aperture=aperture, z=z)
+
+        def wavefront_radius():
+            # поиск стрелки прогиба
+            amplitude = calc_amplitude(cut_phase)
+            sagitta = units.rad2mm(amplitude, self._wavelength)
+
+            # определение радиуса кривизны волнового фронта
+            ap_diameter = units.m2mm(new_aperture.aperture_diameter)
+            return calculate_radius(sagitta, ap_diameter)
+
+        key = ('wavefront_radius', new_aperture.polar_grid, new_aperture.aperture_diameter)
+        return self.memoize(key, wavefront_radius)
+
+    def propagate_on_distance(self, z: float, method=hankel_propagation, **kwargs):
+        method(self, z, **kwargs)
+
+    def to_cartesian(self, cart_grid: CartesianGrid = None) -> np.ndarray:
+        """
+        Разворачивает радиальный профиль поля в двумерное распределение интерполяцией амплитуды и развернутой фазы
+        :param cart_grid: сетка в декартовых координатах (по умолчанию квадратная сетка, описанная вокруг радиальной)
+        :return: распределение поля на сетке cart_grid
+        """
+        if cart_grid is None:
+            size = 2 * self._grid.points
+            cart_grid = CartesianGrid(size, size, self._grid.pixel_size, self._grid.precision)
+
+        y_grid, x_grid = cart_grid.grid
+        rho = np.sqrt(x_grid ** 2 + y_grid ** 2)
+
+        # за пределами радиальной сетки поле считается нулевым
+        amplitude = np.interp(rho, self._grid.grid, np.abs(self._field), right=0.)
+        phase = np.interp(rho, self._grid.grid, np.unwrap(self.phase))
+
+        return (amplitude * np.exp(1j * phase)).astype(self._field.dtype)
+
+    @property
+    def field(self) -> np.ndarray:
+        return self._field
+
+    @field.setter
+    def field(self, field):
+        self._field = field
+
+        # фаза, амплитуда и интенсивность рассчитываются заново при первом обращении
+        self._phase = self._amplitude = self._intensity = None
+        self.clear_memo()
+
+    @property
+    def grid(self) -> RadialGrid:
+        return self._grid
+
+    @grid.setter
+    def grid(self, area):
+        self._grid = area
+
+    @property
+    def phase(self) -> np.ndarray:
+        if self._phase is None:
+            self._phase = np.angle(self._field)
+
+        return self._phase
+
+    @phase.setter
+    def phase(self, phase):
+        # амплитуда сохраняется, профиль поля пересчитывается с новой фазой
+        amplitude = self.amplitude
+        intensity = self._intensity
+
+        self.field = (amplitude * np.exp(1j * phase)).astype(self._field.dtype, copy=False)
+        self._amplitude, self._intensity = amplitude, intensity
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        """
+        Радиальный профиль амплитуды поля волны
+        """
+        if self._amplitude is None:
+            self._amplitude = np.abs(self._field)
+
+        return self._amplitude
+
+    @property
+    def intensity(self) -> np.ndarray:
+        if self._intensity is None:
+            self._intensity = self.amplitude ** 2
+
+        return self._intensity
+
+    @intensity.setter
+    def intensity(self, intensity):
+        # фаза сохраняется, профиль поля пересчитывается с новой амплитудой
+        phase = self.phase
+        amplitude = np.sqrt(intensity)
+
+        self.field = (amplitude * np.exp(1j * phase)).astype(self._field.dtype, copy=False)
+        self._phase, self._amplitude, self._intensity = phase, amplitude, intensity
+
+    @property
+    def wavelength(self) -> float:
+        return self._wavelength
+
+    @wavelength.setter
+    def wavelength(self, wavelength):
+        self._wavelength = wavelength
+        self.clear_memo()
+
+    @property
+    def focal_len(self) -> float:
+        return self._focal_len
+
+    @focal_len.setter
+    def focal_len(self, focal_len):
+        self._focal_len = focal_len
+        self.clear_memo()
+
+    @property
+    def gaussian_width_param(self) -> float:
+        return self._gaussian_width_param
+
+    @gaussian_width_param.setter
+    def gaussian_width_param(self, gaussian_width_param):
+        self._gaussian_width_param = gaussian_width_param
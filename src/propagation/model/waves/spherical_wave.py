@@ -1,35 +1,57 @@
-from typing import Tuple
+from typing import Tuple, Union
 
 import numpy as np
-from skimage.restoration import unwrap_phase
 
-from ..areas.grid import CartesianGrid
+from ..areas.grid import CartesianGrid, FrequencyGrid
 from ...model.areas.aperture import Aperture
 from ...model.waves.interface.wave import Wave
 from ...utils.math import units
-from ...utils.math.general import calc_amplitude
-from ...utils.math.general import calculate_radius
-from ...utils.optic.field import gauss_2d
-from ...utils.optic.propagation_methods import angular_spectrum_propagation
+from ...utils.math.fft_backend import fft2, ifft2
+from ...utils.math.unwrapping import PhaseUnwrapper, get_unwrapper
+from ...utils.math.general import calc_amplitude, calculate_radius
+from ...utils.optic.field import gauss_2d, spherical_phase
+from ...utils.optic.propagation_methods import angular_spectrum_propagation, angular_spectrum_transfer_function
+from ...utils.optic.propagation_methods import propagate_to_distances
+from ...utils.optic.transfer_function_cache import transfer_function_cache
+from ...utils.optic.wavefront import defocus_radius, fit_defocus
 
 
 class SphericalWave(Wave):
     """ Волна со сферической аберрацией или сходящаяся сферическая волна """
 
-    def __init__(self, grid: CartesianGrid, focal_len: float, gaussian_width_param: int, wavelength: float):
+    def __init__(self, grid: CartesianGrid, focal_len: float, gaussian_width_param: int, wavelength: float,
+                 lazy: bool = False, field: np.ndarray = None):
         """
         Создание распределения поля на двухмерной координатной сетке
-        :param grid: двухмерная координатная сетка расчёта распределения поля
+        :param grid: двухмерная координатная сетка расчёта распределения поля (задаёт и точность вычислений волны)
         :param focal_len: фокусное расстояние [м]
         :param gaussian_width_param: ширина гауссоиды на уровне интенсивности 1/e^2 [px]
         :param wavelength: длина волны [м]
+        :param lazy: отложенное распространение: шаги методом углового спектра только запоминаются (дистанции
+        последовательных шагов суммируются), а поле рассчитывается при первом обращении к field, phase или intensity
+        :param field: готовое распределение поля (например, член WaveBatch); если задано, поле не синтезируется
         """
+        super().__init__()
 
         self._grid = grid
         self._focal_len = focal_len
         self._gaussian_width_param = gaussian_width_param
         self._wavelength = wavelength
 
+        # состояние отложенного распространения: Фурье-образ поля, суммарная дистанция и параметры метода
+        self._lazy = lazy
+        self._spectrum = None
+        self._pending_z = None
+        self._pending_settings = None
+
+        # распределение фазы волны рассчитывается при первом обращении
+        self._phase = None
+
+        if field is not None:
+            self._field = field
+            self._amplitude = self._intensity = None
+            return
+
         # задание распределения интенсивности волны
         y_grid, x_grid = self._grid.grid
         gaussian_width_param = units.px2m(gaussian_width_param, px_size_m=grid.pixel_size)
@@ -40,58 +62,189 @@ class SphericalWave(Wave):
         # волновой вектор
         k = 2 * np.pi / self._wavelength
         # задание распределения комлексной амплитуды поля
-        radius_vector = np.sqrt(x_grid ** 2 + y_grid ** 2 + focal_len ** 2)
-        self._field = np.sqrt(self._intensity) * np.exp(-1j * k * radius_vector)
-
-        # задание распределения фазы волны
-        self._phase = np.angle(self._field)
+        radius_vector_phase = spherical_phase(x_grid, y_grid, focal_len, k)
+        self._amplitude = np.sqrt(self._intensity)
+        self._field = self._amplitude * np.exp(-1j * radius_vector_phase)
 
     def get_wrapped_phase(self, *, aperture: Aperture = None, z: float = None) -> np.ndarray:
         if (aperture and z) is not None:
 
             # оптимизация апертуры для правильного разворачивания фазы
-            aperture.modify(self, z)
+            self.modify_aperture(aperture, z)
 
-            return self._phase * aperture.aperture_view
+            return self.phase * aperture.aperture_view
         else:
-            return self._phase
+            return self.phase
+
+    def get_unwrapped_phase(self, *, aperture: Aperture = None, z: float = None, full_frame: bool = True,
+                            unwrapper: Union[str, PhaseUnwrapper, None] = None) -> Tuple[np.ndarray, Aperture]:
+        """
+        Возвращает развернутую фазу волны
+        :param aperture: апертура (circ) для обрезания поля
+        :param z: дистанция, на которую распространилась волна из начала координат
+        :param full_frame: True - фаза на всей сетке (нули за пределами апертуры), False - маскированный массив
+        в ограничивающем апертуру прямоугольнике (aperture.bounding_box), отсчеты вне апертуры исключены
+        :param unwrapper: реализация разворачивания фазы (utils.math.unwrapping, по умолчанию глобальная)
+        :return: матрица значений фаз и модифицированная апертура
+        """
+        unwrapper = get_unwrapper(unwrapper)
 
-    def get_unwrapped_phase(self, *, aperture: Aperture = None, z: float = None) -> Tuple[np.ndarray, Aperture]:
         if (aperture and z) is not None:
 
             # оптимизация апертуры для правильного разворачивания фазы
-            aperture.modify(self, z)
+            self.modify_aperture(aperture, z)
 
-            return unwrap_phase(self._phase * aperture.aperture_view), aperture
+            cropped_phase = self._unwrap_cropped(aperture, unwrapper)
+            if not full_frame:
+                return cropped_phase, aperture
+
+            def paste():
+                unwrapped_phase = np.zeros_like(self.phase)
+                unwrapped_phase[aperture.bounding_box] = cropped_phase.filled(0.)
+                return unwrapped_phase
+
+            # развернутая фаза зависит только от поля и модифицированной апертуры
+            key = ('unwrapped_phase', aperture.polar_grid, aperture.aperture_diameter, unwrapper)
+            return self.memoize(key, paste), aperture
         else:
-            return unwrap_phase(self._phase), aperture
+            return self.memoize(('unwrapped_phase', unwrapper), lambda: unwrapper.unwrap(self.phase)), aperture
+
+    def _unwrap_cropped(self, aperture: Aperture, unwrapper: PhaseUnwrapper) -> np.ma.MaskedArray:
+        """
+        Разворачивает фазу только в ограничивающем апертуру прямоугольнике: отсчеты вне апертуры маскируются
+        и в разворачивании не участвуют
+        """
+
+        def unwrap():
+            box = aperture.bounding_box
+            wrapped_phase = np.ma.masked_array(self.phase[box], mask=aperture.aperture_view[box] == 0)
+            return unwrapper.unwrap(wrapped_phase)
+
+        key = ('unwrapped_phase_cropped', aperture.polar_grid, aperture.aperture_diameter, unwrapper)
+        return self.memoize(key, unwrap)
 
-    def get_wavefront_radius(self, *, aperture: Aperture, z: float) -> float:
-        # развернутая фаза, обрезанная апертурой
-        cut_phase, new_aperture = self.get_unwrapped_phase(aperture=aperture, z=z)
+    def get_wavefront_radius(self, *, aperture: Aperture, z: float,
+                             unwrapper: Union[str, PhaseUnwrapper, None] = None) -> float:
+        # развернутая фаза внутри апертуры
+        unwrapper = get_unwrapper(unwrapper)
+        cut_phase, new_aperture = self.get_unwrapped_phase(aperture=aperture, z=z, full_frame=False,
+                                                           unwrapper=unwrapper)
 
-        # поиск стрелки прогиба
-        amplitude = calc_amplitude(cut_phase)
-        sagitta = units.rad2mm(amplitude, self._wavelength)
+        def wavefront_radius():
+            # поиск стрелки прогиба: маскированные отсчеты заполняются нулями после разворачивания,
+            # как нулевой фон вокруг апертуры при разворачивании всей сетки
+            amplitude = calc_amplitude(cut_phase.filled(0.))
+            sagitta = units.rad2mm(amplitude, self._wavelength)
 
-        # определение радиуса кривизны волнового фронта
-        ap_diameter = units.m2mm(new_aperture.aperture_diameter)
-        wavefront_radius = calculate_radius(sagitta, ap_diameter)
+            # определение радиуса кривизны волнового фронта
+            ap_diameter = units.m2mm(new_aperture.aperture_diameter)
+            return calculate_radius(sagitta, ap_diameter)
 
-        return wavefront_radius
+        key = ('wavefront_radius', new_aperture.polar_grid, new_aperture.aperture_diameter, unwrapper)
+        return self.memoize(key, wavefront_radius)
+
+    def get_wavefront_radius_lsq(self, *, aperture: Aperture) -> float:
+        """
+        Возвращает радиус волнового фронта [мм], найденный без разворачивания фазы: квадратичный член фазы
+        аппроксимируется по методу наименьших квадратов по разностям фаз соседних отсчетов внутри апертуры
+        (utils.optic.wavefront.fit_defocus). Радиус знаковый: отрицательный для сходящейся волны, положительный
+        для расходящейся (utils.optic.wavefront.defocus_radius). Модификация апертуры для этого метода не требуется
+        :param aperture: апертура (circ), внутри которой аппроксимируется фаза
+        :return: радиус волнового фронта
+        """
+
+        def wavefront_radius():
+            # аппроксимация только в ограничивающем апертуру прямоугольнике
+            rows, cols = aperture.bounding_box
+            defocus = fit_defocus(self.field[rows, cols], aperture.aperture_view[rows, cols],
+                                  self._grid.y_axis[rows], self._grid.x_axis[cols])
+            return units.m2mm(defocus_radius(defocus.curvature, 2 * np.pi / self._wavelength))
+
+        key = ('wavefront_radius_lsq', aperture.polar_grid, aperture.aperture_diameter)
+        return self.memoize(key, wavefront_radius)
 
     def propagate_on_distance(self, z: float, method=angular_spectrum_propagation, **kwargs):
-        method(self, z, **kwargs)
+        if self._lazy and method is angular_spectrum_propagation:
+            self._defer(z, **kwargs)
+        else:
+            self.flush()
+            method(self, z, **kwargs)
+
+    def _defer(self, z: float, **kwargs):
+        """
+        Запоминает шаг распространения методом углового спектра без перехода в пространственную область.
+        Так как H(z1) * H(z2) = H(z1 + z2), последовательные шаги с одинаковыми параметрами объединяются в один.
+        Параметры проверяются сразу, а не при отложенном обратном FFT
+        """
+        unknown = sorted(set(kwargs) - {'frequency_grid', 'cache', 'fft_backend'})
+        if unknown:
+            raise TypeError(f'Неизвестные параметры метода углового спектра: {", ".join(unknown)}')
+
+        frequency_grid = kwargs.get('frequency_grid')
+        if not isinstance(frequency_grid, FrequencyGrid):
+            raise TypeError('Для распространения методом углового спектра нужна частотная сетка frequency_grid')
+
+        if (frequency_grid.height, frequency_grid.width) != self._field.shape[-2:] or \
+                not np.isclose(frequency_grid.pixel_size, self._grid.pixel_size):
+            raise ValueError(f'Частотная сетка {frequency_grid.height}x{frequency_grid.width} '
+                             f'(пиксель {frequency_grid.pixel_size} м) не соответствует полю {self._field.shape[-2:]} '
+                             f'(пиксель {self._grid.pixel_size} м)')
+
+        settings = (frequency_grid,
+                    kwargs.get('cache', transfer_function_cache),
+                    kwargs.get('fft_backend'))
+
+        # шаги с другой частотной сеткой, кэшем или реализацией FFT не объединяются
+        if self._pending_z is not None and any(new is not old for new, old in zip(settings, self._pending_settings)):
+            self.flush()
+
+        if self._pending_z is None:
+            self._spectrum = fft2(self._field, backend=settings[2])
+            self._pending_z = 0.
+            self._pending_settings = settings
+
+        self._pending_z += z
+        self.clear_memo()
+
+    def flush(self):
+        """
+        Выполняет отложенное распространение: одно обратное FFT на суммарную дистанцию
+        """
+        if self._pending_z is None:
+            return
+
+        frequency_grid, cache, fft_backend = self._pending_settings
+        h = angular_spectrum_transfer_function(frequency_grid, self._wavelength, self._pending_z, cache=cache)
+        spectrum = self._spectrum
+
+        self._spectrum = self._pending_z = self._pending_settings = None
+        self.field = ifft2(spectrum * h, backend=fft_backend)
+
+    def propagate_to_distances(self, distances, **kwargs):
+        """
+        Возвращает распределения поля волны на дистанциях distances без изменения самой волны
+        (Фурье-образ исходного поля рассчитывается один раз на всю серию дистанций)
+        :param distances: дистанции распространения волны в пространстве [м]
+        :param kwargs: параметры propagation_methods.propagate_to_distances
+        :return: генератор распределений поля либо массив (len(distances), height, width) при stack=True
+        """
+        self.flush()
+        return propagate_to_distances(self, distances, **kwargs)
 
     @property
     def field(self) -> np.ndarray:
+        self.flush()
         return self._field
 
     @field.setter
     def field(self, field):
+        # новое поле отменяет отложенное распространение
+        self._spectrum = self._pending_z = self._pending_settings = None
         self._field = field
-        self._phase = np.angle(field)
-        self._intensity = np.abs(field) ** 2
+
+        # фаза, амплитуда и интенсивность рассчитываются заново при первом обращении
+        self._phase = self._amplitude = self._intensity = None
+        self.clear_memo()
 
     @property
     def grid(self) -> CartesianGrid:
@@ -99,25 +252,53 @@ class SphericalWave(Wave):
 
     @grid.setter
     def grid(self, area):
+        self.flush()
         self._grid = area
 
     @property
     def phase(self) -> np.ndarray:
+        self.flush()
+        if self._phase is None:
+            self._phase = np.angle(self._field)
+
         return self._phase
 
     @phase.setter
     def phase(self, phase):
-        # todo добавить перерасчет _field
-        raise NotImplementedError
+        # амплитуда сохраняется, поле пересчитывается с новой фазой
+        amplitude = self.amplitude
+        intensity = self._intensity
+
+        self.field = (amplitude * np.exp(1j * phase)).astype(self._field.dtype, copy=False)
+        self._amplitude, self._intensity = amplitude, intensity
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        """
+        Распределение амплитуды поля волны
+        """
+        self.flush()
+        if self._amplitude is None:
+            self._amplitude = np.abs(self._field)
+
+        return self._amplitude
 
     @property
     def intensity(self) -> np.ndarray:
+        self.flush()
+        if self._intensity is None:
+            self._intensity = self.amplitude ** 2
+
         return self._intensity
 
     @intensity.setter
     def intensity(self, intensity):
-        # todo добавить перерасчет _field
-        raise NotImplementedError
+        # фаза сохраняется, поле пересчитывается с новой амплитудой
+        phase = self.phase
+        amplitude = np.sqrt(intensity)
+
+        self.field = (amplitude * np.exp(1j * phase)).astype(self._field.dtype, copy=False)
+        self._phase, self._amplitude, self._intensity = phase, amplitude, intensity
 
     @property
     def wavelength(self) -> float:
@@ -125,7 +306,9 @@ class SphericalWave(Wave):
 
     @wavelength.setter
     def wavelength(self, wavelength):
+        self.flush()
         self._wavelength = wavelength
+        self.clear_memo()
 
     @property
     def focal_len(self) -> float:
@@ -134,6 +317,7 @@ class SphericalWave(Wave):
     @focal_len.setter
     def focal_len(self, focal_len):
         self._focal_len = focal_len
+        self.clear_memo()
 
     @property
     def gaussian_width_param(self) -> float:
@@ -141,4 +325,21 @@ class SphericalWave(Wave):
 
     @gaussian_width_param.setter
     def gaussian_width_param(self, gaussian_width_param):
-        self._gaussian_width_param = gaussian_width_param
\ No newline at end of file
+        self._gaussian_width_param = gaussian_width_param
+
+    @property
+    def lazy(self) -> bool:
+        return self._lazy
+
+    @lazy.setter
+    def lazy(self, lazy):
+        if not lazy:
+            self.flush()
+        self._lazy = lazy
+
+    @property
+    def pending_distance(self) -> float:
+        """
+        Суммарная дистанция отложенного распространения [м] (0, если отложенных шагов нет)
+        """
+        return 0. if self._pending_z is None else self._pending_z
@@ -0,0 +1,170 @@
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from ..areas.grid import CartesianGrid, PolarGrid
+from ...model.areas.aperture import Aperture
+from ...model.propagation.interface.propagate import Propagable
+from ...model.waves.spherical_wave import SphericalWave
+from ...utils.math import units
+from ...utils.math.general import widest_diameter
+from ...utils.math.unwrapping import PhaseUnwrapper
+from ...utils.optic.field import gauss_2d, spherical_phase
+from ...utils.optic.propagation_methods import angular_spectrum_propagation, propagate_to_distances
+from ...utils.optic.wavefront import defocus_radius, fit_defocus
+
+
+class WaveBatch(Propagable):
+    """
+    Набор сферических волн с общей координатной сеткой и длиной волны, отличающихся фокусным расстоянием
+    и шириной гауссоиды. Поля хранятся массивом (batch, height, width), поэтому синтез и распространение
+    всего набора выполняются векторно: методы распространения (angular_spectrum_propagation и др.) считают FFT
+    по двум последним осям, а передаточная функция транслируется на все члены набора
+    """
+
+    def __init__(self, grid: CartesianGrid, focal_lens: Sequence[float], gaussian_width_params: Sequence[int],
+                 wavelength: float, field: np.ndarray = None):
+        """
+        Создание набора волн
+        :param grid: двухмерная координатная сетка, общая для всех волн набора
+        :param focal_lens: фокусные расстояния волн [м]
+        :param gaussian_width_params: ширины гауссоид на уровне интенсивности 1/e^2 [px]
+        (параметры транслируются друг на друга; для перебора всех сочетаний передаются результаты np.meshgrid)
+        :param wavelength: длина волны [м]
+        :param field: готовые распределения поля (batch, height, width); если заданы, поля не синтезируются
+        """
+        focal_lens, gaussian_width_params = np.broadcast_arrays(np.atleast_1d(focal_lens),
+                                                                np.atleast_1d(gaussian_width_params))
+
+        self._grid = grid
+        self._focal_lens = focal_lens.ravel()
+        self._gaussian_width_params = gaussian_width_params.ravel()
+        self._wavelength = wavelength
+
+        self._phase = self._amplitude = self._intensity = None
+
+        if field is not None:
+            self._field = field
+            return
+
+        # параметры волн вдоль оси набора транслируются на сетку (batch, 1, 1)
+        focal_len = self._focal_lens.reshape(-1, 1, 1)
+        width = units.px2m(self._gaussian_width_params.reshape(-1, 1, 1), px_size_m=grid.pixel_size)
+        width = width.astype(grid.dtype)
+
+        # задание распределений интенсивности и комплексной амплитуды поля
+        y_grid, x_grid = self._grid.grid
+        self._intensity = gauss_2d(x_grid, y_grid, wx=width / 4, wy=width / 4)
+        self._amplitude = np.sqrt(self._intensity)
+
+        k = 2 * np.pi / self._wavelength
+        self._field = self._amplitude * np.exp(-1j * spherical_phase(x_grid, y_grid, focal_len, k))
+
+    @classmethod
+    def from_parameters(cls, grid: CartesianGrid, focal_lens: Sequence[float], gaussian_width_params: Sequence[int],
+                        wavelength: float) -> 'WaveBatch':
+        """
+        Создание набора из всех сочетаний фокусных расстояний и ширин гауссоид
+        (порядок членов: фокусное расстояние - внешний цикл, ширина гауссоиды - внутренний)
+        """
+        focal_lens, gaussian_width_params = np.meshgrid(focal_lens, gaussian_width_params, indexing='ij')
+        return cls(grid, focal_lens, gaussian_width_params, wavelength)
+
+    def propagate_on_distance(self, z: float, method=angular_spectrum_propagation, **kwargs):
+        method(self, z, **kwargs)
+
+    def propagate_to_distances(self, distances, **kwargs):
+        """
+        Возвращает распределения полей набора (batch, height, width) на дистанциях distances без изменения набора
+        :param distances: дистанции распространения волн в пространстве [м]
+        :param kwargs: параметры propagation_methods.propagate_to_distances
+        :return: генератор распределений полей либо массив (len(distances), batch, height, width) при stack=True
+        """
+        return propagate_to_distances(self, distances, **kwargs)
+
+    def member(self, index: int) -> SphericalWave:
+        """
+        Волна набора с номером index (поле не копируется)
+        """
+        return SphericalWave(self._grid, self._focal_lens[index], self._gaussian_width_params[index],
+                             self._wavelength, field=self.field[index])
+
+    def make_apertures(self, polar_grid: PolarGrid, threshold: float) -> List[Aperture]:
+        """
+        Апертуры членов набора по ширине распределения интенсивности на уровне threshold от максимума
+        """
+        return [Aperture(polar_grid, widest_diameter(intensity, threshold)) for intensity in self.intensity]
+
+    def get_wavefront_radius(self, *, apertures: Sequence[Aperture], z: float,
+                             unwrapper: Union[str, PhaseUnwrapper, None] = None) -> np.ndarray:
+        """
+        Радиусы волновых фронтов членов набора [мм], найденные по стрелке прогиба развернутой фазы
+        (SphericalWave.get_wavefront_radius) с модификацией апертур
+        """
+        return np.array([self.member(i).get_wavefront_radius(aperture=aperture, z=z, unwrapper=unwrapper)
+                         for i, aperture in enumerate(apertures)])
+
+    def get_wavefront_radius_lsq(self, *, apertures: Sequence[Aperture]) -> np.ndarray:
+        """
+        Знаковые радиусы волновых фронтов членов набора [мм] (отрицательные для сходящихся волн), найденные одной
+        векторной аппроксимацией квадратичного члена фазы без разворачивания (utils.optic.wavefront.fit_defocus)
+        """
+        mask = np.stack([aperture.aperture_view for aperture in apertures])
+        defocus = fit_defocus(self.field, mask, self._grid.y_axis, self._grid.x_axis)
+        return units.m2mm(defocus_radius(defocus.curvature, 2 * np.pi / self._wavelength))
+
+    def __len__(self):
+        return self._field.shape[0]
+
+    @property
+    def field(self) -> np.ndarray:
+        """
+        Распределения полей волн набора (batch, height, width)
+        """
+        return self._field
+
+    @field.setter
+    def field(self, field):
+        self._field = field
+        self._phase = self._amplitude = self._intensity = None
+
+    @property
+    def grid(self) -> CartesianGrid:
+        return self._grid
+
+    @grid.setter
+    def grid(self, area):
+        self._grid = area
+
+    @property
+    def phase(self) -> np.ndarray:
+        if self._phase is None:
+            self._phase = np.angle(self._field)
+
+        return self._phase
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        if self._amplitude is None:
+            self._amplitude = np.abs(self._field)
+
+        return self._amplitude
+
+    @property
+    def intensity(self) -> np.ndarray:
+        if self._intensity is None:
+            self._intensity = self.amplitude ** 2
+
+        return self._intensity
+
+    @property
+    def wavelength(self) -> float:
+        return self._wavelength
+
+    @property
+    def focal_lens(self) -> np.ndarray:
+        return self._focal_lens
+
+    @property
+    def gaussian_width_params(self) -> np.ndarray:
+        return self._gaussian_width_params
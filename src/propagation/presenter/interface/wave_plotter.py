@@ -22,15 +22,20 @@ class WavePlotter:
         """
         k = 2 * np.pi / wave.wavelength
 
-        unwrapped_phase_lbl = f'[{np.min(wave.get_unwrapped_phase(aperture=aperture, z=z)[0]):.2f}, ' \
-                              f'{np.max(wave.get_unwrapped_phase(aperture=aperture, z=z)[0]):.2f}] rad; ' \
-                              f'[{np.min(wave.get_unwrapped_phase(aperture=aperture, z=z)[0]) * 1e+6 / k:.1f}, ' \
-                              f'{np.max(wave.get_unwrapped_phase(aperture=aperture, z=z)[0]) * 1e+6 / k:.1f}] um'
+        # апертура модифицируется и фаза разворачивается один раз (результаты мемоизируются волной)
+        unwrapped_phase = wave.get_unwrapped_phase(aperture=aperture, z=z)[0]
+        wrapped_phase = wave.get_wrapped_phase(aperture=aperture, z=z)
+        wavefront_radius = wave.get_wavefront_radius(aperture=aperture, z=z)
 
-        wrapped_phase_lbl = f'z: {units.m2mm(z):.1f} mm; R: {wave.get_wavefront_radius(aperture=aperture, z=z):.3f} mm'
+        unwrapped_phase_lbl = f'[{np.min(unwrapped_phase):.2f}, ' \
+                              f'{np.max(unwrapped_phase):.2f}] rad; ' \
+                              f'[{np.min(unwrapped_phase) * 1e+6 / k:.1f}, ' \
+                              f'{np.max(unwrapped_phase) * 1e+6 / k:.1f}] um'
 
-        fig = make_phase_plot(wrp_phase=wave.get_wrapped_phase(aperture=aperture, z=z),
-                              unwrp_phase=wave.get_unwrapped_phase(aperture=aperture, z=z)[0],
+        wrapped_phase_lbl = f'z: {units.m2mm(z):.1f} mm; R: {wavefront_radius:.3f} mm'
+
+        fig = make_phase_plot(wrp_phase=wrapped_phase,
+                              unwrp_phase=unwrapped_phase,
                               geometry_center=True,
                               linewidth=1,
                               unwrapped_ylims=(-100, 100),
@@ -5,26 +5,29 @@ from PIL import Image
 from src.propagation.utils.math.general import normalize
 
 
-def load_files(paths: List[str]) -> List[np.ndarray]:
+def load_files(paths: List[str], dtype=None) -> List[np.ndarray]:
     """
     Возвращает список матриц интенсивностей, загруженных из файлов
     :param paths: список путей к файлам
+    :param dtype: тип данных матриц (None - np.float64 для изображений и тип из файла для npy)
     :return:
     """
     first_path = paths[0]
 
     if first_path[-3:] == 'npy':
-        return [np.load(path) for path in paths]
+        arrays = [np.load(path) for path in paths]
+        return arrays if dtype is None else [array.astype(dtype, copy=False) for array in arrays]
     else:
-        return [load_image(path) for path in paths]
+        return [load_image(path, dtype=dtype or np.float64) for path in paths]
 
 
-def load_image(path: str) -> np.ndarray:
+def load_image(path: str, dtype=np.float64) -> np.ndarray:
     """
-    Загружает изображение, конвертирует его в numpy.ndarray (dtype=np.float64), приводит к динамическому диапазону
-    [0.0 ... 1.0].
+    Загружает изображение, конвертирует его в numpy.ndarray (по умолчанию dtype=np.float64), приводит к динамическому
+    диапазону [0.0 ... 1.0].
     Цветные изображения конвертируются в полутоновые.
     :param path: путь к файлу
+    :param dtype: тип данных матрицы (np.float32 для вычислений в одинарной точности)
     :return матрица
     """
     gray_8bit = 'L'
@@ -43,4 +46,4 @@ def load_image(path: str) -> np.ndarray:
         img = img.convert(gray_8bit)
         old_max = 2 ** 8 - 1
 
-    return normalize(np.asarray(img, np.float64), old_min=0, old_max=old_max)
+    return normalize(np.asarray(img, dtype), old_min=0, old_max=old_max, dtype=dtype)
@@ -0,0 +1,98 @@
+from collections import OrderedDict, namedtuple
+from typing import Callable, Hashable
+
+import numpy as np
+
+# Именованный кортеж для статистики кэша (по аналогии с functools.lru_cache)
+CacheInfo = namedtuple("CacheInfo", "hits misses entries nbytes max_bytes")
+
+
+class ArrayCache:
+    """
+    LRU-кэш массивов numpy с ограничением по занимаемой памяти. Массивы разделяются между вызовами, поэтому
+    хранятся только для чтения. Используется для передаточных функций (TransferFunctionCache) и масок апертур
+    """
+
+    def __init__(self, max_bytes: int = 512 * 2 ** 20):
+        """
+        :param max_bytes: максимальный суммарный размер хранимых массивов [байт]
+        """
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, builder: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Возвращает массив по ключу. При отсутствии в кэше рассчитывает его при помощи builder.
+        Возвращаемый массив доступен только для чтения, так как он разделяется между вызовами
+        :param key: ключ, однозначно определяющий массив
+        :param builder: функция без аргументов, рассчитывающая массив
+        :return: массив
+        """
+        array = self._entries.get(key)
+
+        if array is not None:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return array
+
+        self._misses += 1
+
+        array = builder()
+        array.flags.writeable = False
+
+        # массив, превышающий весь бюджет памяти, не кэшируется
+        if array.nbytes <= self._max_bytes:
+            self._entries[key] = array
+            self._nbytes += array.nbytes
+            self._evict()
+
+        return array
+
+    def clear(self):
+        """ Очищает кэш и сбрасывает счётчики попаданий и промахов """
+        self._entries.clear()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        """ Статистика кэша """
+        return CacheInfo(self._hits, self._misses, len(self._entries), self._nbytes, self._max_bytes)
+
+    def _evict(self):
+        """ Удаляет наиболее давно использованные массивы до попадания в бюджет памяти """
+        while self._nbytes > self._max_bytes:
+            _, array = self._entries.popitem(last=False)
+            self._nbytes -= array.nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def max_bytes(self) -> int:
+        """ Бюджет памяти кэша [байт] """
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        self._max_bytes = max_bytes
+        self._evict()
+
+    @property
+    def nbytes(self) -> int:
+        """ Суммарный размер хранимых массивов [байт] """
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
@@ -1,5 +1,8 @@
+import math
 import numpy as np
 
+from typing import Optional, Sequence
+
 
 def central_4point(p_minus2, p_minus1, p_plus1, p_plus2, h: float = 1.):
     """
@@ -47,3 +50,47 @@ def backward_2point(p_minus, p, h):
     else:
         raise NotImplementedError("Implemented only for ndarrays")
 
+
+def polyfit_weights(z: Sequence[float], z0: float = 0., degree: Optional[int] = None) -> np.ndarray:
+    """
+    Веса оценки производных функции в точке z0 по её значениям в точках z (шаг может быть неравномерным):
+    производная порядка j равна сумме weights[j, n] * p_n. Веса - строки псевдообратной матрицы Вандермонда
+    полинома степени degree, аппроксимирующего значения по методу наименьших квадратов.
+    При degree = len(z) - 1 полином интерполяционный, и веса совпадают с конечными разностями
+    (для z = (-2h, -h, h, 2h) - с central_4point, для z = (-h, h) - с central_2point)
+    :param z: попарно различные координаты точек (N,)
+    :param z0: точка, в которой оцениваются производные
+    :param degree: степень полинома (по умолчанию N - 1)
+    :return: веса (degree + 1, N): значение, первая производная, ...
+    """
+    z = np.asarray(z, dtype=np.float64)
+    degree = z.size - 1 if degree is None else degree
+
+    if not 1 <= degree < z.size:
+        raise ValueError(f'Polynomial degree must be in [1, {z.size - 1}] for {z.size} points, instead got {degree}')
+
+    # при совпадающих координатах матрица Вандермонда вырождена, и pinv молча возвращает неверные веса
+    if np.unique(z).size != z.size:
+        raise ValueError(f'Plane coordinates must be distinct, instead got {z.tolist()}')
+
+    # нормировка координат улучшает обусловленность матрицы Вандермонда
+    scale = np.max(np.abs(z - z0)) or 1.
+    vandermonde = np.vander((z - z0) / scale, degree + 1, increasing=True)
+
+    # производная порядка j полинома sum(c_j * t^j) в нуле равна j! * c_j
+    orders = np.arange(degree + 1)
+    factors = np.array([math.factorial(j) for j in orders]) / scale ** orders
+    return np.linalg.pinv(vandermonde) * factors.reshape(-1, 1)
+
+
+def polyfit_derivative(planes: np.ndarray, z: Sequence[float], z0: float = 0., degree: Optional[int] = None):
+    """
+    Первая производная серии planes по первой оси в точке z0 (попиксельная полиномиальная аппроксимация за один проход)
+    :param planes: серия (N, ...)
+    :param z: координаты плоскостей серии (N,)
+    :param z0: точка, в которой оценивается производная
+    :param degree: степень полинома (по умолчанию N - 1)
+    :return: производная (...)
+    """
+    weights = polyfit_weights(z, z0, degree)[1].astype(planes.dtype, copy=False)
+    return np.tensordot(weights, planes, axes=1)
@@ -1,5 +1,7 @@
-from numpy.fft import fft2, ifft2
+from typing import Sequence, Tuple, Union
+import numpy as np
 from numpy import ndarray, real
+from src.propagation.utils.math.fft_backend import FFTBackend, dctn, dstn, fft2, idctn, idstn, ifft2, irfft2, rfft2
 """
 Псевдо-дифференциальные операторы, реализованные через FFT.
 Первоисточник: D. Paganin "Coherent X-Ray Imaging" p.299-300 2006
@@ -12,7 +14,8 @@ def gradient_2d(f_x: ndarray,
                 f_y: ndarray,
                 kx: ndarray,
                 ky: ndarray,
-                space_domain: bool = True) -> (ndarray, ndarray):
+                space_domain: bool = True,
+                backend: Union[str, FFTBackend, None] = None) -> (ndarray, ndarray):
     """
     Возвращает сумму частных производных первого порядка (функция градиента) от функции f.
     :param f_x: array-like двумерная функция
@@ -20,20 +23,36 @@ def gradient_2d(f_x: ndarray,
     :param kx: частотный коэффициент 1j * 2*np.pi * fftshift(nu_x_grid)
     :param ky: частотный коэффициент 1j * 2*np.pi * fftshift(nu_y_grid)
     :param space_domain:
+    :param backend: реализация FFT (по умолчанию глобальная)
     :return: array-like градиент от функции f
     """
     if space_domain:
-        f_x = fft2(f_x, norm=norm)
-        f_y = fft2(f_y, norm=norm)
+        f_x = fft2(f_x, norm=norm, backend=backend)
+        f_y = fft2(f_y, norm=norm, backend=backend)
 
-    return real(ifft2(f_x * kx, norm=norm)), real(ifft2(f_y * ky, norm=norm))
+    return real(ifft2(f_x * kx, norm=norm, backend=backend)), real(ifft2(f_y * ky, norm=norm, backend=backend))
+
+
+def ilaplacian_filter(kx: ndarray, ky: ndarray, reg_param: float) -> ndarray:
+    """
+    Возвращает регуляризованный фильтр обратного Лапласиана (kx^2 + ky^2) / (reg_param + (kx^2 + ky^2)^2).
+    Фильтр зависит только от сетки, поэтому может быть рассчитан один раз и передан в ilaplacian_2d
+    :param kx: частотный коэффициент 1j * 2*np.pi * fftshift(nu_x_grid)
+    :param ky: частотный коэффициент 1j * 2*np.pi * fftshift(nu_y_grid)
+    :param reg_param: нужен, чтобы избежать деления на ноль
+    :return: array-like вещественный фильтр
+    """
+    laplacian = real(kx**2 + ky**2)
+    return laplacian / (reg_param + laplacian**2)
 
 
 def ilaplacian_2d(f: ndarray,
                   kx: ndarray,
                   ky: ndarray,
                   reg_param: float,
-                  return_spacedomain: bool = True) -> ndarray:
+                  return_spacedomain: bool = True,
+                  backend: Union[str, FFTBackend, None] = None,
+                  spectral_filter: ndarray = None) -> ndarray:
     """
     Возвращает сумму частных производных минус второго порядка (обратный Лапласиан) от функции f.
     :param f: array-like двумерная функция
@@ -41,16 +60,167 @@ def ilaplacian_2d(f: ndarray,
     :param ky: частотный коэффициент 1j * 2*np.pi * fftshift(nu_y_grid)
     :param reg_param: нужен, чтобы избежать деления на ноль
     :param return_spacedomain:
+    :param backend: реализация FFT (по умолчанию глобальная)
+    :param spectral_filter: заранее рассчитанный ilaplacian_filter(kx, ky, reg_param)
     :return: array-like градиент от функции f
     """
-    res = fft2(f, norm=norm) * (kx**2 + ky**2) / (reg_param + (kx**2 + ky**2)**2)
+    if spectral_filter is None:
+        spectral_filter = ilaplacian_filter(kx, ky, reg_param)
+
+    res = fft2(f, norm=norm, backend=backend) * spectral_filter
 
     if return_spacedomain:
-        res = real(ifft2(res, norm=norm))
+        res = real(ifft2(res, norm=norm, backend=backend))
 
     return res
 
 
+def rgradient_2d(f_x: ndarray,
+                 f_y: ndarray,
+                 kx: ndarray,
+                 ky: ndarray,
+                 space_domain: bool = True,
+                 backend: Union[str, FFTBackend, None] = None,
+                 shape: Sequence[int] = None) -> (ndarray, ndarray):
+    """
+    gradient_2d для вещественных функций через rfft2/irfft2: хранится и обрабатывается только половина спектра.
+    :param f_x: array-like двумерная вещественная функция либо половина её спектра (space_domain=False)
+    :param f_y: array-like двумерная вещественная функция либо половина её спектра (space_domain=False)
+    :param kx: частотный коэффициент для половины спектра (grid_registry.rfrequency_coefs)
+    :param ky: частотный коэффициент для половины спектра (grid_registry.rfrequency_coefs)
+    :param space_domain:
+    :param backend: реализация FFT (по умолчанию глобальная)
+    :param shape: размер результата (height, width), нужен для спектра функции с нечетным width
+    :return: array-like градиент от функции f
+    """
+    if space_domain:
+        shape = f_x.shape[-2:]
+        f_x = rfft2(f_x, norm=norm, backend=backend)
+        f_y = rfft2(f_y, norm=norm, backend=backend)
+
+    return irfft2(f_x * kx, s=shape, norm=norm, backend=backend), irfft2(f_y * ky, s=shape, norm=norm, backend=backend)
+
+
+def rilaplacian_2d(f: ndarray,
+                   kx: ndarray,
+                   ky: ndarray,
+                   reg_param: float,
+                   return_spacedomain: bool = True,
+                   backend: Union[str, FFTBackend, None] = None,
+                   spectral_filter: ndarray = None) -> ndarray:
+    """
+    ilaplacian_2d для вещественной функции через rfft2/irfft2: хранится и обрабатывается только половина спектра.
+    :param f: array-like двумерная вещественная функция
+    :param kx: частотный коэффициент для половины спектра (grid_registry.rfrequency_coefs)
+    :param ky: частотный коэффициент для половины спектра (grid_registry.rfrequency_coefs)
+    :param reg_param: нужен, чтобы избежать деления на ноль
+    :param return_spacedomain: False - вернуть половину спектра
+    :param backend: реализация FFT (по умолчанию глобальная)
+    :param spectral_filter: заранее рассчитанный ilaplacian_filter(kx, ky, reg_param) для половины спектра
+    :return: array-like градиент от функции f
+    """
+    if spectral_filter is None:
+        spectral_filter = ilaplacian_filter(kx, ky, reg_param)
+
+    res = rfft2(f, norm=norm, backend=backend) * spectral_filter
+
+    if return_spacedomain:
+        res = irfft2(res, s=f.shape[-2:], norm=norm, backend=backend)
+
+    return res
+
+
+def ilaplacian_2d_dct(f: ndarray,
+                      reg_param: float = 0.,
+                      backend: Union[str, FFTBackend, None] = None) -> ndarray:
+    """
+    Возвращает решение дискретного уравнения Пуассона (обратный пятиточечный Лапласиан с единичным шагом) от функции f
+    при граничных условиях Неймана. Собственные функции оператора - косинусы DCT-II, собственные значения
+    2 * cos(pi * i / M) + 2 * cos(pi * j / N) - 4.
+    Ghiglia D. C., Romero L. A. JOSA A 11(1), 107 (1994)
+    :param f: array-like двумерная функция (M, N), допускается стопка (..., M, N)
+    :param reg_param: нужен, чтобы избежать деления на ноль (при 0 постоянная составляющая решения обнуляется)
+    :param backend: реализация FFT (по умолчанию глобальная)
+    :return: array-like решение с нулевым средним
+    """
+    h, w = f.shape[-2:]
+    eigenvalues = (2 * np.cos(np.pi * np.arange(h) / h).reshape(-1, 1) +
+                   2 * np.cos(np.pi * np.arange(w) / w).reshape(1, -1) - 4).astype(f.dtype)
+
+    res = dctn(f, backend=backend)
+    if reg_param:
+        res = res * eigenvalues / (reg_param + eigenvalues ** 2)
+    else:
+        eigenvalues[0, 0] = 1.
+        res = res / eigenvalues
+        res[..., 0, 0] = 0.
+
+    return idctn(res, backend=backend)
+
+
+def trig_transform_2d(f: ndarray,
+                      even: Tuple[bool, bool],
+                      inverse: bool = False,
+                      backend: Union[str, FFTBackend, None] = None) -> ndarray:
+    """
+    Двумерное тригонометрическое преобразование (norm='ortho') по двум последним осям: DCT-II по осям, относительно
+    краев которых функция четна (граничные условия Неймана), и DST-II по осям, где она нечетна (Дирихле).
+    Эквивалентно FFT функции, отраженной относительно краев (схема Волкова), без отражения
+    :param f: array-like двумерная вещественная функция (M, N), допускается стопка (..., M, N), либо её образ (inverse)
+    :param even: четность функции по осям (y, x)
+    :param inverse: обратное преобразование
+    :param backend: реализация FFT (по умолчанию глобальная)
+    :return: образ функции либо функция (inverse)
+    """
+    cosine, sine = (idctn, idstn) if inverse else (dctn, dstn)
+
+    if even[0] == even[1]:
+        return (cosine if even[0] else sine)(f, backend=backend)
+
+    for axis, axis_even in zip((-2, -1), even):
+        f = (cosine if axis_even else sine)(f, axes=(axis,), backend=backend)
+
+    return f
+
+
+def trig_wavenumbers(n: int, pixel_size: float, even: bool) -> ndarray:
+    """
+    Волновые числа pi * k / (n * pixel_size) гармоник DCT-II (k = 0 ... n - 1) либо DST-II (k = 1 ... n).
+    Совпадают с |2pi * nu| сетки отраженной функции (2 * n отсчетов)
+    :param n: количество отсчетов по оси
+    :param pixel_size: размер пикселя
+    :param even: четность функции по оси (DCT-II)
+    :return: волновые числа (n,)
+    """
+    k = np.arange(n) + (0 if even else 1)
+    return np.pi * k / (n * pixel_size)
+
+
+def trig_derivative(spectrum: ndarray, axis: int, even: bool, pixel_size: float) -> ndarray:
+    """
+    Первая производная по оси axis в области trig_transform_2d. Производная четной по оси функции нечетна и наоборот,
+    поэтому гармоника cos(k x) переходит в sin(k x) с тем же k и обратно, т.е. индекс образа сдвигается на 1.
+    Гармоники, отсутствующие в образе производной (cos при k = 0 и sin при k = n), отбрасываются
+    :param spectrum: образ функции
+    :param axis: ось дифференцирования (-2 - y, -1 - x)
+    :param even: четность функции по оси
+    :param pixel_size: размер пикселя
+    :return: образ производной (четность по оси axis противоположна even)
+    """
+    n = spectrum.shape[axis]
+    k = (np.pi * np.arange(1, n) / (n * pixel_size)).astype(spectrum.dtype)
+
+    spectrum = np.moveaxis(spectrum, axis, -1)
+    res = np.zeros_like(spectrum)
+
+    if even:
+        np.multiply(spectrum[..., 1:], -k, out=res[..., :-1])
+    else:
+        np.multiply(spectrum[..., :-1], k, out=res[..., 1:])
+
+    return np.moveaxis(res, -1, axis)
+
+
 if __name__ == '__main__':
     import numpy as np
     import matplotlib.pyplot as plt
@@ -0,0 +1,425 @@
+import atexit
+import os
+import pickle
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+"""
+Единая точка вызова FFT для всего проекта.
+Поддерживаемые реализации: numpy.fft (по умолчанию), scipy.fft (многопоточная, параметр workers)
+и pyFFTW (многопоточная, с кэшированием планов и сохранением wisdom на диск).
+Дискретные косинусные и синусные преобразования (dctn, idctn, dstn, idstn) есть только в scipy.fft, поэтому
+остальные реализации используют его однопоточную версию.
+Реализация выбирается глобально (set_backend, use_backend) или при вызове (параметр backend).
+"""
+
+Axes = Sequence[int]
+
+
+class FFTBackend(ABC):
+    """ Интерфейс реализации двумерного FFT """
+
+    name = None
+
+    @abstractmethod
+    def fft2(self, x: np.ndarray, axes: Axes = (-2, -1), norm: Optional[str] = None,
+             overwrite_x: bool = False) -> np.ndarray:
+        """
+        Прямое двумерное дискретное преобразование Фурье по осям axes
+        :param x: массив
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в numpy.fft
+        :param overwrite_x: разрешение использовать x как рабочий буфер (реализация может его проигнорировать)
+        :return: Фурье-образ x
+        """
+        pass
+
+    @abstractmethod
+    def ifft2(self, x: np.ndarray, axes: Axes = (-2, -1), norm: Optional[str] = None,
+              overwrite_x: bool = False) -> np.ndarray:
+        """
+        Обратное двумерное дискретное преобразование Фурье по осям axes
+        :param x: массив
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в numpy.fft
+        :param overwrite_x: разрешение использовать x как рабочий буфер (реализация может его проигнорировать)
+        :return: обратный Фурье-образ x
+        """
+        pass
+
+    @abstractmethod
+    def rfft2(self, x: np.ndarray, axes: Axes = (-2, -1), norm: Optional[str] = None,
+              overwrite_x: bool = False) -> np.ndarray:
+        """
+        Прямое двумерное преобразование Фурье вещественного массива по осям axes: возвращается только половина
+        спектра по последней оси (axes[-1]) размером n // 2 + 1, остальное восстанавливается эрмитовой симметрией
+        :param x: вещественный массив
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в numpy.fft
+        :param overwrite_x: разрешение использовать x как рабочий буфер (реализация может его проигнорировать)
+        :return: половина Фурье-образа x
+        """
+        pass
+
+    @abstractmethod
+    def irfft2(self, x: np.ndarray, s: Optional[Sequence[int]] = None, axes: Axes = (-2, -1),
+               norm: Optional[str] = None, overwrite_x: bool = False) -> np.ndarray:
+        """
+        Обратное к rfft2 преобразование: вещественный массив по половине спектра
+        :param x: половина спектра
+        :param s: размер результата по осям axes (по умолчанию последняя ось 2 * (m - 1), то есть четная)
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в numpy.fft
+        :param overwrite_x: разрешение использовать x как рабочий буфер (реализация может его проигнорировать)
+        :return: вещественный массив
+        """
+        pass
+
+    def dctn(self, x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho') -> np.ndarray:
+        """
+        Прямое многомерное дискретное косинусное преобразование по осям axes (по умолчанию scipy.fft)
+        :param x: вещественный массив
+        :param type: тип DCT (1-4)
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в scipy.fft
+        :return: DCT-образ x
+        """
+        import scipy.fft
+        return scipy.fft.dctn(x, type=type, axes=axes, norm=norm)
+
+    def idctn(self, x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho') -> np.ndarray:
+        """
+        Обратное многомерное дискретное косинусное преобразование по осям axes (по умолчанию scipy.fft)
+        :param x: вещественный массив
+        :param type: тип обращаемого DCT (1-4)
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в scipy.fft
+        :return: обратный DCT-образ x
+        """
+        import scipy.fft
+        return scipy.fft.idctn(x, type=type, axes=axes, norm=norm)
+
+    def dstn(self, x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho') -> np.ndarray:
+        """
+        Прямое многомерное дискретное синусное преобразование по осям axes (по умолчанию scipy.fft)
+        :param x: вещественный массив
+        :param type: тип DST (1-4)
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в scipy.fft
+        :return: DST-образ x
+        """
+        import scipy.fft
+        return scipy.fft.dstn(x, type=type, axes=axes, norm=norm)
+
+    def idstn(self, x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho') -> np.ndarray:
+        """
+        Обратное многомерное дискретное синусное преобразование по осям axes (по умолчанию scipy.fft)
+        :param x: вещественный массив
+        :param type: тип обращаемого DST (1-4)
+        :param axes: оси преобразования
+        :param norm: нормировка (None | 'ortho'), как в scipy.fft
+        :return: обратный DST-образ x
+        """
+        import scipy.fft
+        return scipy.fft.idstn(x, type=type, axes=axes, norm=norm)
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+
+class NumpyBackend(FFTBackend):
+    """
+    Однопоточный numpy.fft.
+    Старые версии numpy всегда считают FFT в двойной точности, поэтому результат приводится к точности входного массива
+    """
+
+    name = 'numpy'
+
+    def fft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return np.fft.fft2(x, axes=axes, norm=norm).astype(_complex_dtype(x), copy=False)
+
+    def ifft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return np.fft.ifft2(x, axes=axes, norm=norm).astype(_complex_dtype(x), copy=False)
+
+    def rfft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return np.fft.rfft2(x, axes=axes, norm=norm).astype(_complex_dtype(x), copy=False)
+
+    def irfft2(self, x, s=None, axes=(-2, -1), norm=None, overwrite_x=False):
+        return np.fft.irfft2(x, s=s, axes=axes, norm=norm).astype(_real_dtype(x), copy=False)
+
+
+class ScipyBackend(FFTBackend):
+    """ scipy.fft (pocketfft) с распараллеливанием по workers потокам """
+
+    name = 'scipy'
+
+    def __init__(self, workers: int = -1):
+        """
+        :param workers: количество потоков (-1 - по числу ядер процессора)
+        """
+        import scipy.fft
+        self._fft = scipy.fft
+        self._workers = workers
+
+    def fft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._fft.fft2(x, axes=axes, norm=norm, overwrite_x=overwrite_x, workers=self._workers)
+
+    def ifft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._fft.ifft2(x, axes=axes, norm=norm, overwrite_x=overwrite_x, workers=self._workers)
+
+    def rfft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._fft.rfft2(x, axes=axes, norm=norm, overwrite_x=overwrite_x, workers=self._workers)
+
+    def irfft2(self, x, s=None, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._fft.irfft2(x, s=s, axes=axes, norm=norm, overwrite_x=overwrite_x, workers=self._workers)
+
+    def dctn(self, x, type=2, axes=(-2, -1), norm='ortho'):
+        return self._fft.dctn(x, type=type, axes=axes, norm=norm, workers=self._workers)
+
+    def idctn(self, x, type=2, axes=(-2, -1), norm='ortho'):
+        return self._fft.idctn(x, type=type, axes=axes, norm=norm, workers=self._workers)
+
+    def dstn(self, x, type=2, axes=(-2, -1), norm='ortho'):
+        return self._fft.dstn(x, type=type, axes=axes, norm=norm, workers=self._workers)
+
+    def idstn(self, x, type=2, axes=(-2, -1), norm='ortho'):
+        return self._fft.idstn(x, type=type, axes=axes, norm=norm, workers=self._workers)
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def __repr__(self):
+        return f'{type(self).__name__}(workers={self._workers})'
+
+
+class PyFFTWBackend(FFTBackend):
+    """
+    pyFFTW с кэшем планов по (вид преобразования, форма, тип данных, оси, нормировка, размер результата,
+    overwrite_x). Накопленная FFTW wisdom может сохраняться в файл, чтобы перезапущенный процесс не планировал
+    преобразования заново: явно (save_wisdom) либо один раз при завершении процесса, если появились новые планы
+    """
+
+    name = 'pyfftw'
+
+    def __init__(self, threads: int = os.cpu_count(), planner_effort: str = 'FFTW_MEASURE',
+                 wisdom_path: Optional[str] = None):
+        """
+        :param threads: количество потоков
+        :param planner_effort: режим планировщика FFTW (FFTW_ESTIMATE | FFTW_MEASURE | FFTW_PATIENT | FFTW_EXHAUSTIVE)
+        :param wisdom_path: путь к файлу FFTW wisdom (None - wisdom не сохраняется); новые планы сохраняются
+        в него один раз при завершении процесса
+        """
+        import pyfftw
+        self._pyfftw = pyfftw
+        self._threads = threads
+        self._planner_effort = planner_effort
+        self._wisdom_path = wisdom_path
+        self._plans = {}
+
+        # появились ли планы, которых ещё нет в файле wisdom
+        self._unsaved_wisdom = False
+
+        if wisdom_path is not None:
+            if os.path.exists(wisdom_path):
+                self.load_wisdom()
+            atexit.register(self._save_unsaved_wisdom)
+
+    def fft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._execute('fft2', x, axes, norm, overwrite_x=overwrite_x)
+
+    def ifft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._execute('ifft2', x, axes, norm, overwrite_x=overwrite_x)
+
+    def rfft2(self, x, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._execute('rfft2', x, axes, norm, overwrite_x=overwrite_x)
+
+    def irfft2(self, x, s=None, axes=(-2, -1), norm=None, overwrite_x=False):
+        return self._execute('irfft2', x, axes, norm, s, overwrite_x=overwrite_x)
+
+    def _execute(self, kind: str, x: np.ndarray, axes: Axes, norm: Optional[str],
+                 s: Optional[Sequence[int]] = None, overwrite_x: bool = False) -> np.ndarray:
+        plan = self._get_plan(kind, x, axes, norm, s, overwrite_x)
+
+        # многомерное обратное вещественное преобразование FFTW портит вход: без overwrite_x считается по копии
+        if kind == 'irfft2' and not overwrite_x:
+            x = np.array(x, copy=True)
+
+        result = plan(x)
+
+        # выходной массив плана переиспользуется при каждом вызове, поэтому результат копируется:
+        # при overwrite_x - в сам x, если он той же формы и типа (fft2, ifft2), иначе в новый массив
+        if overwrite_x and isinstance(x, np.ndarray) and x.flags.writeable and \
+                x.shape == result.shape and x.dtype == result.dtype:
+            np.copyto(x, result)
+            return x
+
+        return result.copy()
+
+    def _get_plan(self, kind: str, x: np.ndarray, axes: Axes, norm: Optional[str], s: Optional[Sequence[int]] = None,
+                  overwrite_x: bool = False):
+        """ Возвращает план FFTW из кэша либо создаёт его """
+        x = np.asarray(x)
+        s = None if s is None else tuple(s)
+
+        # многомерное обратное вещественное преобразование портит вход всегда, остальным это разрешает overwrite_x
+        # (FFTW_DESTROY_INPUT, входом плана служит его внутренний буфер)
+        kwargs = {} if kind == 'irfft2' else {'overwrite_input': overwrite_x}
+        key = (kind, x.shape, x.dtype.str, tuple(axes), norm, s, bool(kwargs.get('overwrite_input')))
+
+        plan = self._plans.get(key)
+        if plan is None:
+            builder = getattr(self._pyfftw.builders, kind)
+            template = self._pyfftw.empty_aligned(x.shape, dtype=x.dtype)
+            plan = builder(template, s=s, axes=axes, norm=norm, threads=self._threads,
+                           planner_effort=self._planner_effort, **kwargs)
+            self._plans[key] = plan
+            self._unsaved_wisdom = True
+
+        return plan
+
+    def load_wisdom(self, path: Optional[str] = None):
+        """ Загружает FFTW wisdom из файла """
+        with open(path or self._wisdom_path, 'rb') as file:
+            self._pyfftw.import_wisdom(pickle.load(file))
+
+    def save_wisdom(self, path: Optional[str] = None):
+        """ Сохраняет накопленную FFTW wisdom в файл """
+        with open(path or self._wisdom_path, 'wb') as file:
+            pickle.dump(self._pyfftw.export_wisdom(), file)
+
+        self._unsaved_wisdom = False
+
+    def _save_unsaved_wisdom(self):
+        """ При завершении процесса сохраняет wisdom в wisdom_path, если с последнего сохранения появились планы """
+        if self._unsaved_wisdom:
+            self.save_wisdom()
+
+    def clear_plans(self):
+        self._plans.clear()
+
+    @property
+    def threads(self) -> int:
+        return self._threads
+
+    @property
+    def plans_number(self) -> int:
+        return len(self._plans)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(threads={self._threads}, planner_effort={self._planner_effort!r})'
+
+
+def _complex_dtype(x: np.ndarray) -> np.dtype:
+    """ Комплексный тип данных той же точности, что и x """
+    return np.result_type(np.asarray(x).dtype, np.complex64)
+
+
+def _real_dtype(x: np.ndarray) -> np.dtype:
+    """ Вещественный тип данных той же точности, что и x """
+    return np.result_type(np.asarray(x).real.dtype, np.float32)
+
+
+_backends = {backend.name: backend for backend in (NumpyBackend, ScipyBackend, PyFFTWBackend)}
+_named_backends = {}
+_current_backend = NumpyBackend()
+
+
+def create_backend(name: str, **kwargs) -> FFTBackend:
+    """
+    Создаёт реализацию FFT по имени
+    :param name: 'numpy' | 'scipy' | 'pyfftw'
+    :param kwargs: параметры конструктора реализации (workers для scipy; threads, planner_effort, wisdom_path для pyfftw)
+    :return: реализация FFT
+    """
+    try:
+        backend = _backends[name]
+    except KeyError:
+        raise ValueError(f'Неизвестная реализация FFT: {name}. Доступны: {", ".join(_backends)}')
+
+    return backend(**kwargs)
+
+
+def set_backend(backend: Union[str, FFTBackend], **kwargs) -> FFTBackend:
+    """
+    Глобально устанавливает реализацию FFT
+    :param backend: имя реализации либо её экземпляр
+    :param kwargs: параметры конструктора реализации, если backend передан по имени
+    :return: установленная реализация
+    """
+    global _current_backend
+    _current_backend = backend if isinstance(backend, FFTBackend) else create_backend(backend, **kwargs)
+    return _current_backend
+
+
+def get_backend(backend: Union[str, FFTBackend, None] = None) -> FFTBackend:
+    """
+    Возвращает реализацию FFT: переданную, созданную по имени или глобальную (при backend=None)
+    """
+    if backend is None:
+        return _current_backend
+
+    if isinstance(backend, FFTBackend):
+        return backend
+
+    # реализации, запрошенные по имени, создаются один раз, чтобы не терять их кэш планов
+    instance = _named_backends.get(backend)
+    if instance is None:
+        instance = _named_backends[backend] = create_backend(backend)
+
+    return instance
+
+
+@contextmanager
+def use_backend(backend: Union[str, FFTBackend], **kwargs):
+    """
+    Временно устанавливает реализацию FFT внутри блока with
+    """
+    previous = _current_backend
+    try:
+        yield set_backend(backend, **kwargs)
+    finally:
+        set_backend(previous)
+
+
+def fft2(x: np.ndarray, axes: Axes = (-2, -1), norm: Optional[str] = None, overwrite_x: bool = False,
+         backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).fft2(x, axes=axes, norm=norm, overwrite_x=overwrite_x)
+
+
+def ifft2(x: np.ndarray, axes: Axes = (-2, -1), norm: Optional[str] = None, overwrite_x: bool = False,
+          backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).ifft2(x, axes=axes, norm=norm, overwrite_x=overwrite_x)
+
+
+def rfft2(x: np.ndarray, axes: Axes = (-2, -1), norm: Optional[str] = None, overwrite_x: bool = False,
+          backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).rfft2(x, axes=axes, norm=norm, overwrite_x=overwrite_x)
+
+
+def irfft2(x: np.ndarray, s: Optional[Sequence[int]] = None, axes: Axes = (-2, -1), norm: Optional[str] = None,
+           overwrite_x: bool = False, backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).irfft2(x, s=s, axes=axes, norm=norm, overwrite_x=overwrite_x)
+
+
+def dctn(x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho',
+         backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).dctn(x, type=type, axes=axes, norm=norm)
+
+
+def idctn(x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho',
+          backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).idctn(x, type=type, axes=axes, norm=norm)
+
+
+def dstn(x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho',
+         backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).dstn(x, type=type, axes=axes, norm=norm)
+
+
+def idstn(x: np.ndarray, type: int = 2, axes: Axes = (-2, -1), norm: Optional[str] = 'ortho',
+          backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+    return get_backend(backend).idstn(x, type=type, axes=axes, norm=norm)
@@ -0,0 +1,65 @@
+import enum
+from typing import Union
+
+import numpy as np
+
+
+@enum.unique
+class Precision(enum.Enum):
+    """ Точность вычислений: типы данных для вещественных и комплексных массивов """
+    SINGLE = (np.float32, np.complex64)
+    DOUBLE = (np.float64, np.complex128)
+
+    @property
+    def real_dtype(self) -> np.dtype:
+        return np.dtype(self.value[0])
+
+    @property
+    def complex_dtype(self) -> np.dtype:
+        return np.dtype(self.value[1])
+
+
+# Глобальная точность вычислений, используемая объектами, для которых точность не задана явно
+_current_precision = Precision.DOUBLE
+
+
+def set_precision(precision: Union[Precision, str]) -> Precision:
+    """
+    Глобально устанавливает точность вычислений для создаваемых после вызова объектов
+    :param precision: Precision либо его имя ('single' | 'double')
+    :return: установленная точность
+    """
+    global _current_precision
+    _current_precision = _to_precision(precision)
+    return _current_precision
+
+
+def get_precision(precision: Union[Precision, str, None] = None) -> Precision:
+    """
+    Возвращает переданную точность либо глобальную (при precision=None)
+    """
+    if precision is None:
+        return _current_precision
+
+    return _to_precision(precision)
+
+
+def precision_of(array: np.ndarray) -> Precision:
+    """
+    Определяет точность, соответствующую типу данных массива
+    """
+    if np.dtype(array.dtype) in (np.dtype(np.float32), np.dtype(np.complex64)):
+        return Precision.SINGLE
+
+    return Precision.DOUBLE
+
+
+def _to_precision(precision: Union[Precision, str]) -> Precision:
+    if isinstance(precision, Precision):
+        return precision
+
+    try:
+        return Precision[precision.upper()]
+    except KeyError:
+        raise ValueError(f'Неизвестная точность вычислений: {precision}. '
+                         f'Доступны: {", ".join(p.name.lower() for p in Precision)}')
@@ -0,0 +1,234 @@
+from abc import ABC, abstractmethod
+from typing import Union
+
+import numpy as np
+
+from src.propagation.utils.math.derivative.fourier import ilaplacian_2d_dct
+from src.propagation.utils.math.fft_backend import FFTBackend
+
+"""
+Единая точка разворачивания двумерной фазы.
+Поддерживаемые реализации: skimage.restoration.unwrap_phase (по умолчанию; разворачивание по надежности,
+Herraez et al. 2002) и метод наименьших квадратов с решением уравнения Пуассона через DCT (Ghiglia & Romero 1994).
+Реализация выбирается глобально (set_unwrapper) или при вызове (параметр unwrapper).
+Маскированные массивы (numpy.ma) разворачиваются только по немаскированным отсчетам.
+"""
+
+
+class PhaseUnwrapper(ABC):
+    """ Интерфейс реализации разворачивания двумерной фазы """
+
+    name = None
+
+    @abstractmethod
+    def unwrap(self, phase: np.ndarray) -> np.ndarray:
+        """
+        Разворачивает фазу
+        :param phase: неразвернутая фаза в диапазоне [-pi, pi] (допускается маскированный массив)
+        :return: развернутая фаза того же типа данных (маскированный массив с той же маской для маскированного phase)
+        """
+        pass
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+
+class SkimageUnwrapper(PhaseUnwrapper):
+    """ skimage.restoration.unwrap_phase: разворачивание по надежности с сортировкой ребер """
+
+    name = 'skimage'
+
+    def __init__(self, wrap_around: bool = False):
+        """
+        :param wrap_around: периодичность фазы по краям сетки
+        """
+        from skimage.restoration import unwrap_phase
+        self._unwrap_phase = unwrap_phase
+        self._wrap_around = wrap_around
+
+    def unwrap(self, phase):
+        return self._unwrap_phase(phase, wrap_around=self._wrap_around).astype(phase.dtype, copy=False)
+
+
+class LeastSquaresUnwrapper(PhaseUnwrapper):
+    """
+    Разворачивание методом наименьших квадратов: ищется фаза, градиент которой наиболее близок к свернутым разностям
+    соседних отсчетов. Без весов задача сводится к дискретному уравнению Пуассона с граничными условиями Неймана,
+    решаемому одной парой DCT (derivative.fourier.ilaplacian_2d_dct). С весами (маска апертуры маскированного массива)
+    используется метод сопряженных градиентов с тем же решением уравнения Пуассона в качестве предобусловливателя.
+    Ghiglia D. C., Romero L. A. JOSA A 11(1), 107 (1994)
+    """
+
+    name = 'lsq'
+
+    def __init__(self, max_iterations: int = 20, tolerance: float = 1e-3, congruent: bool = True,
+                 fft_backend: Union[str, FFTBackend, None] = None):
+        """
+        :param max_iterations: максимальное количество итераций метода сопряженных градиентов (взвешенная задача)
+        :param tolerance: относительная норма невязки, при которой итерации прекращаются
+        (при congruent=True достаточно ошибки решения много меньше pi)
+        :param congruent: приведение решения к свернутой фазе: отличие от неё на целое число 2pi в каждом отсчете
+        :param fft_backend: реализация DCT (по умолчанию глобальная)
+        """
+        self._max_iterations = max_iterations
+        self._tolerance = tolerance
+        self._congruent = congruent
+        self._fft_backend = fft_backend
+
+    def unwrap(self, phase):
+        weights = None
+        if isinstance(phase, np.ma.MaskedArray):
+            weights = ~np.ma.getmaskarray(phase)
+            wrapped_phase = phase.filled(0.)
+        else:
+            wrapped_phase = np.asarray(phase)
+
+        dtype = wrapped_phase.dtype
+
+        # свернутые разности соседних отсчетов (на последней строке/столбце - нулевые)
+        dx, dy = np.zeros_like(wrapped_phase), np.zeros_like(wrapped_phase)
+        dx[:, :-1] = _wrap(np.diff(wrapped_phase, axis=1))
+        dy[:-1, :] = _wrap(np.diff(wrapped_phase, axis=0))
+
+        if weights is None:
+            unwrapped_phase = ilaplacian_2d_dct(_divergence(dx, dy), backend=self._fft_backend)
+        else:
+            # вес ребра между соседними отсчетами - произведение весов отсчетов
+            wx, wy = np.zeros(dx.shape, dtype), np.zeros(dy.shape, dtype)
+            wx[:, :-1] = weights[:, :-1] & weights[:, 1:]
+            wy[:-1, :] = weights[:-1, :] & weights[1:, :]
+
+            unwrapped_phase = self._solve_weighted(_divergence(wx * dx, wy * dy), wx, wy)
+
+        if self._congruent:
+            unwrapped_phase = wrapped_phase + 2 * np.pi * np.round((unwrapped_phase - wrapped_phase) / (2 * np.pi))
+
+        unwrapped_phase = unwrapped_phase.astype(dtype, copy=False)
+
+        if weights is not None:
+            return np.ma.masked_array(unwrapped_phase, mask=~weights)
+
+        return unwrapped_phase
+
+    def _solve_weighted(self, rhs: np.ndarray, wx: np.ndarray, wy: np.ndarray) -> np.ndarray:
+        """
+        Решение взвешенного уравнения Пуассона div(W grad(phi)) = rhs методом сопряженных градиентов
+        с предобусловливателем - обратным невзвешенным Лапласианом
+        """
+
+        def operator(phi: np.ndarray) -> np.ndarray:
+            gx, gy = np.zeros_like(phi), np.zeros_like(phi)
+            gx[:, :-1] = np.diff(phi, axis=1)
+            gy[:-1, :] = np.diff(phi, axis=0)
+            return _divergence(wx * gx, wy * gy)
+
+        # оператор и Лапласиан отрицательно полуопределены, поэтому итерации ведутся для -rhs и -operator
+        residual = -rhs
+        solution = np.zeros_like(rhs)
+        rhs_norm = np.linalg.norm(residual)
+        if rhs_norm == 0:
+            return solution
+
+        preconditioned = -ilaplacian_2d_dct(residual, backend=self._fft_backend)
+        direction = preconditioned
+        rz = np.vdot(residual, preconditioned)
+
+        for _ in range(self._max_iterations):
+            q = -operator(direction)
+            alpha = rz / np.vdot(direction, q)
+            solution += alpha * direction
+            residual -= alpha * q
+
+            if np.linalg.norm(residual) < self._tolerance * rhs_norm:
+                break
+
+            preconditioned = -ilaplacian_2d_dct(residual, backend=self._fft_backend)
+            rz_new = np.vdot(residual, preconditioned)
+            direction = preconditioned + (rz_new / rz) * direction
+            rz = rz_new
+
+        return solution
+
+    @property
+    def max_iterations(self) -> int:
+        return self._max_iterations
+
+    @property
+    def tolerance(self) -> float:
+        return self._tolerance
+
+    def __repr__(self):
+        return f'{type(self).__name__}(max_iterations={self._max_iterations}, tolerance={self._tolerance})'
+
+
+def _wrap(phase: np.ndarray) -> np.ndarray:
+    """ Сворачивает фазу в диапазон [-pi, pi) """
+    return (phase + np.pi) % (2 * np.pi) - np.pi
+
+
+def _divergence(gx: np.ndarray, gy: np.ndarray) -> np.ndarray:
+    """ Дискретная дивергенция (разности назад), сопряженная разностям вперед с нулевыми значениями на краях """
+    div = gx.copy()
+    div[:, 1:] -= gx[:, :-1]
+    div += gy
+    div[1:, :] -= gy[:-1, :]
+    return div
+
+
+_unwrappers = {unwrapper.name: unwrapper for unwrapper in (SkimageUnwrapper, LeastSquaresUnwrapper)}
+_named_unwrappers = {}
+_current_unwrapper = None
+
+
+def create_unwrapper(name: str, **kwargs) -> PhaseUnwrapper:
+    """
+    Создаёт реализацию разворачивания фазы по имени
+    :param name: 'skimage' | 'lsq'
+    :param kwargs: параметры конструктора реализации
+    :return: реализация разворачивания фазы
+    """
+    try:
+        unwrapper = _unwrappers[name]
+    except KeyError:
+        raise ValueError(f'Неизвестная реализация разворачивания фазы: {name}. Доступны: {", ".join(_unwrappers)}')
+
+    return unwrapper(**kwargs)
+
+
+def set_unwrapper(unwrapper: Union[str, PhaseUnwrapper], **kwargs) -> PhaseUnwrapper:
+    """
+    Глобально устанавливает реализацию разворачивания фазы
+    :param unwrapper: имя реализации либо её экземпляр
+    :param kwargs: параметры конструктора реализации, если unwrapper передан по имени
+    :return: установленная реализация
+    """
+    global _current_unwrapper
+    _current_unwrapper = unwrapper if isinstance(unwrapper, PhaseUnwrapper) else create_unwrapper(unwrapper, **kwargs)
+    return _current_unwrapper
+
+
+def get_unwrapper(unwrapper: Union[str, PhaseUnwrapper, None] = None) -> PhaseUnwrapper:
+    """
+    Возвращает реализацию разворачивания фазы: переданную, созданную по имени или глобальную (при unwrapper=None)
+    """
+    global _current_unwrapper
+
+    if unwrapper is None:
+        # skimage импортируется только при первом использовании глобальной реализации
+        if _current_unwrapper is None:
+            _current_unwrapper = get_unwrapper(SkimageUnwrapper.name)
+        return _current_unwrapper
+
+    if isinstance(unwrapper, PhaseUnwrapper):
+        return unwrapper
+
+    # реализации, запрошенные по имени, создаются один раз
+    instance = _named_unwrappers.get(unwrapper)
+    if instance is None:
+        instance = _named_unwrappers[unwrapper] = create_unwrapper(unwrapper)
+
+    return instance
+
+
+def unwrap_phase(phase: np.ndarray, unwrapper: Union[str, PhaseUnwrapper, None] = None) -> np.ndarray:
+    return get_unwrapper(unwrapper).unwrap(phase)
@@ -93,6 +93,30 @@ def gauss_2d(x, y, a=1., wx=1., wy=1., x0=0., y0=0.):
     return a * np.exp(-((x - x0) ** 2 / (2 * wx ** 2) + (y - y0) ** 2 / (2 * wy ** 2)))
 
 
+def spherical_phase(x, y, r, wave_number):
+    """
+    Возвращает набег фазы k * sqrt(x^2 + y^2 + r^2) сферической волны с радиусом кривизны r.
+    Набег раскладывается на постоянную k * r, взятую по модулю 2pi, и малую добавку k * (sqrt(x^2 + y^2 + r^2) - r),
+    поэтому точности float32 достаточно даже при набеге фазы в миллионы радиан
+    :param x: np.ndarray 2-мерная координатная сетка по оси X
+    :param y: np.ndarray 2-мерная координатная сетка по оси Y
+    :param r: Union[float, np.ndarray] радиус кривизны волнового фронта
+    :param wave_number: float волновое число
+    :return: np.ndarray
+    """
+    dtype = np.result_type(x, y)
+
+    # постоянная часть набега считается в двойной точности и только затем приводится к типу сетки
+    r = np.abs(np.asarray(r, dtype=np.float64))
+    piston = np.mod(wave_number * r, 2 * np.pi).astype(dtype)
+    r = r.astype(dtype)
+
+    rho_squared = x ** 2 + y ** 2
+    denominator = np.sqrt(rho_squared + r ** 2) + r
+    sagitta = np.divide(rho_squared, denominator, out=np.zeros_like(denominator), where=denominator != 0)
+    return wave_number * sagitta + piston
+
+
 def logistic_1d(x, a=1., w=1., x0=0.):
     """
     Возвращает 1-мерную логистическую функцию: https://en.wikipedia.org/wiki/Logistic_function
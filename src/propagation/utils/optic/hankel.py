@@ -0,0 +1,58 @@
+import numpy as np
+
+from src.propagation.model.areas.grid import RadialGrid
+
+
+class QuasiDiscreteHankelTransform:
+    """
+    Квазидискретное преобразование Ханкеля нулевого порядка на радиальной сетке:
+    F(nu) = 2 * pi * integral(f(r) * J0(2 * pi * nu * r) * r * dr)
+    Преобразование сводится к умножению на симметричную ортогональную матрицу
+    T[m, n] = 2 * J0(j_m * j_n / S) / (|J1(j_m)| * |J1(j_n)| * S),
+    поэтому прямое и обратное преобразования отличаются только масштабными множителями.
+    Guizar-Sicairos M., Gutierrez-Vega J. C. JOSA A 21, 53 (2004)
+    """
+
+    def __init__(self, radial_grid: RadialGrid):
+        from scipy.special import j0, j1
+
+        zeros, zero_limit = radial_grid.bessel_zeros, radial_grid.bessel_zero_limit
+        j1_abs = np.abs(j1(zeros))
+
+        # радиус сетки и ширина полосы частот: R * V = S / (2 * pi)
+        radius = radial_grid.radius
+        bandwidth = zero_limit / (2 * np.pi * radius)
+
+        matrix = 2 * j0(np.outer(zeros, zeros) / zero_limit) / (np.outer(j1_abs, j1_abs) * zero_limit)
+
+        dtype = radial_grid.dtype
+        self._radial_grid = radial_grid
+        self._matrix = matrix.astype(dtype)
+        self._forward_scales = ((radius / j1_abs).astype(dtype), (j1_abs / bandwidth).astype(dtype))
+        self._inverse_scales = ((bandwidth / j1_abs).astype(dtype), (j1_abs / radius).astype(dtype))
+
+    def transform(self, field: np.ndarray) -> np.ndarray:
+        """
+        Прямое преобразование
+        :param field: отсчеты функции на сетке radial_grid.grid (по последней оси)
+        :return: отсчеты спектра на сетке radial_grid.frequency_grid
+        """
+        before, after = self._forward_scales
+        return ((field * before) @ self._matrix) * after
+
+    def inverse(self, spectrum: np.ndarray) -> np.ndarray:
+        """
+        Обратное преобразование
+        :param spectrum: отсчеты спектра на сетке radial_grid.frequency_grid (по последней оси)
+        :return: отсчеты функции на сетке radial_grid.grid
+        """
+        before, after = self._inverse_scales
+        return ((spectrum * before) @ self._matrix) * after
+
+    @property
+    def radial_grid(self) -> RadialGrid:
+        return self._radial_grid
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix
@@ -1,7 +1,7 @@
 import os
 from datetime import datetime
 import numpy as np
-from skimage.restoration import unwrap_phase
+from src.propagation.utils.math.unwrapping import unwrap_phase
 import tools.math.general as math
 from tools.optic.propagation import fresnel
 from tools.optic.field import circ
@@ -1,8 +1,18 @@
+import threading
+import weakref
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Sequence, Tuple, Union
+
 import numpy as np
-from numpy.fft import fft2, ifft2, ifftshift
+from numpy.fft import fftfreq, fftshift, ifftshift
 
+from src.propagation.model.areas.grid import CartesianGrid, FrequencyGrid, RadialGrid
+from src.propagation.model.areas.grid_registry import grid_registry
 from src.propagation.model.waves.interface.wave import Wave
-from src.propagation.utils.optic.field import rect_2d
+from src.propagation.utils.math.fft_backend import FFTBackend, fft2, ifft2
+from src.propagation.utils.optic.field import rect_1d
+from src.propagation.utils.optic.hankel import QuasiDiscreteHankelTransform
+from src.propagation.utils.optic.transfer_function_cache import TransferFunctionCache, transfer_function_cache
 
 
 def angular_spectrum_propagation(wave: Wave, z: float, **kwargs):
@@ -10,78 +20,524 @@ def angular_spectrum_propagation(wave: Wave, z: float, **kwargs):
     Метод распространения (преобразования) волны методом углового спектра
     :param wave: волна
     :param z: дистанция распространения
+    :param kwargs: frequency_grid - частотная сетка,
+                   cache - кэш передаточных функций (None для расчета без кэширования),
+                   fft_backend - реализация FFT (по умолчанию глобальная)
     :return:
     """
     frequency_grid = kwargs.get('frequency_grid')
+    cache = kwargs.get('cache', transfer_function_cache)
+    fft_backend = kwargs.get('fft_backend')
+
+    # Фурье-образ исходного поля
+    field = fft2(wave.field, backend=fft_backend)
+
+    # передаточная функция слоя пространства
+    h = angular_spectrum_transfer_function(frequency_grid, wave.wavelength, z, cache=cache)
+
+    # обратное преобразование Фурье
+    wave.field = ifft2(field * h, backend=fft_backend)
+
+
+def propagate_to_distances(wave: Wave, distances: Iterable[float],
+                           **kwargs) -> Union[Iterator[np.ndarray], np.ndarray]:
+    """
+    Распространение волны методом углового спектра сразу на несколько дистанций.
+    Фурье-образ исходного поля рассчитывается один раз, а передаточная функция для очередной
+    дистанции получается умножением предыдущей на передаточную функцию шага: H(z + dz) = H(z) * H(dz).
+    Для равномерной сетки дистанций (np.diff постоянен с точностью до округления) H(dz) строится один раз;
+    для z = 0 передаточная функция не строится (H = 1). Каждые reanchor_every плоскостей передаточная функция
+    рассчитывается напрямую, H(z), чтобы ошибки округления произведения не накапливались.
+    Поле волны при этом не изменяется
+    :param wave: волна
+    :param distances: дистанции распространения [м]
+    :param kwargs: frequency_grid - частотная сетка,
+                   cache - кэш передаточных функций (None для расчета без кэширования),
+                   fft_backend - реализация FFT (по умолчанию глобальная),
+                   stack - вернуть массив (len(distances), height, width) вместо генератора,
+                   reanchor_every - период прямого расчета H(z) в плоскостях (по умолчанию 32)
+    :return: генератор распределений поля на дистанциях distances либо массив этих распределений
+    """
+    frequency_grid = kwargs.get('frequency_grid')
+    cache = kwargs.get('cache', transfer_function_cache)
+    fft_backend = kwargs.get('fft_backend')
+    stack = kwargs.get('stack', False)
+    reanchor_every = kwargs.get('reanchor_every', 32)
+
+    # Фурье-образ исходного поля рассчитывается сразу, чтобы последующие изменения волны не влияли на результат
+    spectrum = fft2(wave.field, backend=fft_backend)
+    wavelength = wave.wavelength
+
+    distances = [float(z) for z in distances]
+    step = _uniform_step(distances)
+
+    def planes() -> Iterator[np.ndarray]:
+        # None - единичная передаточная функция
+        h = None
+        previous_z = 0.
+
+        for i, z in enumerate(distances):
+            if z == 0:
+                h = None
+            elif h is None or i % reanchor_every == 0:
+                h = angular_spectrum_transfer_function(frequency_grid, wavelength, z, cache=cache)
+            else:
+                dz = z - previous_z if step is None else step
+                h = h * angular_spectrum_transfer_function(frequency_grid, wavelength, dz, cache=cache)
+            previous_z = z
+
+            yield ifft2(spectrum if h is None else spectrum * h, backend=fft_backend)
+
+    if stack:
+        return np.stack(list(planes()))
+
+    return planes()
+
+
+def _uniform_step(distances: Sequence[float]) -> Optional[float]:
+    """
+    Возвращает шаг равномерной сетки дистанций либо None, если шаги различаются.
+    Шаг берется как разность первых двух дистанций: для np.arange(0, ..., dz) он точно равен dz и совпадает
+    с первой дистанцией, поэтому передаточные функции H(z_1) и H(dz) попадают в кэш под одним ключом
+    """
+    if len(distances) < 2:
+        return None
+
+    steps = np.diff(distances)
+    step = float(steps[0])
+    if step == 0 or not np.allclose(steps, step, rtol=1e-9, atol=0):
+        return None
+
+    return step
+
+
+def angular_spectrum_transfer_function(frequency_grid: FrequencyGrid, wavelength: float, z: float,
+                                       cache: Optional[TransferFunctionCache] = transfer_function_cache) -> np.ndarray:
+    """
+    Возвращает передаточную функцию слоя пространства толщиной z для метода углового спектра.
+    Затухающие волны (lambda * nu > 1) отбрасываются: на их частотах передаточная функция равна нулю.
+    Передаточная функция берётся из кэша по ключу (частотная сетка, размер сетки, размер пикселя, длина волны, z)
+    :param frequency_grid: частотная сетка
+    :param wavelength: длина волны [м]
+    :param z: дистанция распространения [м]
+    :param cache: кэш передаточных функций (None для расчета без кэширования)
+    :return: передаточная функция (только для чтения, если используется кэш)
+    """
+
+    def build() -> np.ndarray:
+        # частотная сетка
+        nu_y_grid, nu_x_grid = frequency_grid.grid.y_grid, frequency_grid.grid.x_grid
+        nu_squared = nu_x_grid ** 2 + nu_y_grid ** 2
+
+        return np.exp(1j * propagation_phase(nu_squared, wavelength, z)) * propagating_mask(nu_squared, wavelength)
+
+    if cache is None:
+        return build()
+
+    key = ('angular_spectrum', id(frequency_grid),
+           frequency_grid.height, frequency_grid.width, frequency_grid.pixel_size, frequency_grid.precision,
+           wavelength, z)
+
+    return cache.get(key, build)
+
+
+def propagation_phase(nu_squared: np.ndarray, wavelength: float, z: float) -> np.ndarray:
+    """
+    Возвращает фазу k * z * sqrt(1 - lambda^2 * nu^2) передаточной функции слоя пространства.
+    Набег фазы раскладывается на постоянную k * z, взятую по модулю 2pi, и добавку, зависящую от частоты,
+    поэтому точности float32 достаточно даже при набеге фазы в миллионы радиан.
+    Для затухающих волн (lambda * nu > 1) фаза не имеет смысла: передаточные функции на этих частотах
+    обнуляются множителем propagating_mask
+    :param nu_squared: квадрат модуля пространственной частоты nu_x^2 + nu_y^2
+    :param wavelength: длина волны [м]
+    :param z: дистанция распространения [м]
+    :return: фаза передаточной функции того же типа данных, что и nu_squared
+    """
+    # скаляры numpy (например, из np.arange) приводятся к float, чтобы не повышать точность массивов
+    wavelength, z = float(wavelength), float(z)
 
     # волновое число
-    wave_number = 2 * np.pi / wave.wavelength
+    wave_number = 2 * np.pi / wavelength
 
-    # частотная сетка
-    nu_y_grid, nu_x_grid = frequency_grid.grid.y_grid, frequency_grid.grid.x_grid
+    # k * z * sqrt(1 - s) = k * z - k * z * s / (1 + sqrt(1 - s))
+    s = wavelength ** 2 * nu_squared
+    return (wave_number * z) % (2 * np.pi) - wave_number * z * s / (1 + np.sqrt(np.maximum(1 - s, 0)))
 
-    # Фурье-образ исходного поля
-    field = fft2(wave.field)
 
-    # передаточная функция слоя пространства
-    exp_term = np.sqrt(
-        1 - (wave.wavelength * nu_x_grid) ** 2 -
-        (wave.wavelength * nu_y_grid) ** 2)
-    h = np.exp(1j * wave_number * z * exp_term)
+def propagating_mask(nu_squared: np.ndarray, wavelength: float) -> np.ndarray:
+    """
+    Возвращает маску распространяющихся волн: 1 при lambda * nu <= 1, 0 для затухающих волн
+    :param nu_squared: квадрат модуля пространственной частоты nu_x^2 + nu_y^2
+    :param wavelength: длина волны [м]
+    :return: маска того же типа данных, что и nu_squared
+    """
+    nu_squared = np.asarray(nu_squared)
+    return (float(wavelength) ** 2 * nu_squared <= 1).astype(nu_squared.dtype)
 
-    # todo H((1-(Lambda*U).^2-(Lambda*V).^2)<0) = 0; % neglect evanescent wave
 
-    # обратное преобразование Фурье
-    wave.field = ifft2(field * h)
+def angular_spectrum_bl_propagation(wave: Wave, z: float, **kwargs):
+    """
+    Распространение (преобразование) волны при помощи band-limited angular spectrum метода.
+    Экземпляр BandLimitedAngularSpectrum (рабочее поле и частотные оси) переиспользуется для той же сетки, длины волны
+    и кэша передаточных функций, пока существует сетка (см. _get_band_limited_propagator)
+    :param wave: волна
+    :param z: дистанция распространения
+    :param kwargs: cache - кэш передаточных функций (None для расчета без кэширования),
+                   fft_backend - реализация FFT (по умолчанию глобальная)
+    :return:
+    """
+    propagator = _get_band_limited_propagator(wave.grid, wave.wavelength, kwargs.get('cache', transfer_function_cache))
+    propagator(wave, z, **kwargs)
+
+
+# экземпляры BandLimitedAngularSpectrum: сетка (слабая ссылка) -> {(длина волны, кэш): экземпляр}
+_band_limited_propagators = weakref.WeakKeyDictionary()
+_band_limited_lock = threading.Lock()
+
+
+def _get_band_limited_propagator(grid: CartesianGrid, wavelength: float,
+                                 cache: Optional[TransferFunctionCache]) -> 'BandLimitedAngularSpectrum':
+    """
+    Возвращает экземпляр BandLimitedAngularSpectrum для сетки, длины волны и кэша передаточных функций.
+    Экземпляры хранятся, пока существует сетка, и вместе с ней освобождаются сборщиком мусора
+    """
+    with _band_limited_lock:
+        propagators = _band_limited_propagators.setdefault(grid, {})
+        key = (float(wavelength), cache)
+
+        propagator = propagators.get(key)
+        if propagator is None:
+            propagator = propagators[key] = BandLimitedAngularSpectrum(grid, wavelength, cache=cache)
+
+        return propagator
+
+
+class BandLimitedAngularSpectrum:
+    """
+    Band-limited angular spectrum метод, привязанный к координатной сетке и длине волны.
+    Между вызовами хранит дополненное нулями рабочее поле (свое для каждого потока) и частотные оси,
+    а передаточные функции для каждого z берет из кэша, поэтому распространение на очередную дистанцию
+    не создаёт временных массивов учетверённой площади, кроме результатов прямого и обратного FFT.
+    Поля с ведущими осями (например, WaveBatch) распространяются одним пакетным FFT; рабочее поле
+    пересоздается при смене формы ведущих осей.
+    Экземпляр можно передавать в качестве метода распространения: wave.propagate_on_distance(z, method=propagator)
+    """
+
+    def __init__(self, grid: CartesianGrid, wavelength: float,
+                 cache: Optional[TransferFunctionCache] = transfer_function_cache):
+        """
+        :param grid: координатная сетка распространяемых полей
+        :param wavelength: длина волны [м]
+        :param cache: кэш передаточных функций (None для расчета без кэширования)
+        """
+        self._wavelength = wavelength
+        self._pixel_size = grid.pixel_size
+        self._precision = grid.precision
+        self._cache = cache
+
+        # Увеличение транспаранта в 2 раза для трансформации линейной свертки в циклическую
+        # (периодические граничные условия)
+        height = 2 * grid.height  # количество строк матрицы
+        width = 2 * grid.width  # количество элеметов в каждой строке матрицы
+        self._padded_shape = (height, width)
+
+        # Область "старого" поля внутри нового (по двум последним осям)
+        self._inner = (Ellipsis,
+                       slice(int(height * .25), int(height * .75)),
+                       slice(int(width * .25), int(width * .75)))
+
+        # Рабочее поле: вне области "старого" поля всегда нули; создается в каждом потоке при первом вызове
+        # под ведущие оси поля, поэтому экземпляр можно вызывать из нескольких потоков одновременно
+        self._local = threading.local()
 
+        # Частотные оси, сдвинутые высокими частотами к краям, и квадрат модуля частоты
+        real_dtype = self._precision.real_dtype
+        self._nu_x = ifftshift(np.arange(-width / 2, width / 2, dtype=real_dtype) / (width * self._pixel_size))
+        self._nu_y = ifftshift(np.arange(-height / 2, height / 2, dtype=real_dtype) / (height * self._pixel_size))
 
-def angular_spectrum_bl_propagation(wave: Wave, z: float):
+    def __call__(self, wave: Wave, z: float, **kwargs):
+        """
+        Распространение волны на дистанцию z
+        :param wave: волна
+        :param z: дистанция распространения
+        :param kwargs: fft_backend - реализация FFT (по умолчанию глобальная)
+        """
+        wave.field = self.propagate(wave.field, z, fft_backend=kwargs.get('fft_backend'))
+
+    def propagate(self, field: np.ndarray, z: float,
+                  fft_backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
+        """
+        Возвращает поле, распространившееся на дистанцию z
+        :param field: комплексная амплитуда поля на исходной сетке (..., height, width)
+        :param z: дистанция распространения [м]
+        :param fft_backend: реализация FFT (по умолчанию глобальная)
+        :return: комплексная амплитуда поля на исходной сетке (той же формы, что и field)
+        """
+        # Вписываем "старое" поле в рабочее
+        workspace = self._get_workspace(field.shape[:-2])
+        workspace[self._inner] = field
+
+        spectrum = fft2(workspace, backend=fft_backend)
+        spectrum *= self.transfer_function(z)
+
+        # обратное преобразование Фурье, в результат копируется только область "старого" поля
+        return ifft2(spectrum, overwrite_x=True, backend=fft_backend)[self._inner].copy()
+
+    def _get_workspace(self, batch_shape: Tuple[int, ...]) -> np.ndarray:
+        # рабочее поле пересоздается, только если изменились ведущие оси (например, размер набора WaveBatch)
+        shape = tuple(batch_shape) + self._padded_shape
+        workspace = getattr(self._local, 'workspace', None)
+        if workspace is None or workspace.shape != shape:
+            workspace = self._local.workspace = np.zeros(shape, dtype=self._precision.complex_dtype)
+
+        return workspace
+
+    def transfer_function(self, z: float) -> np.ndarray:
+        """
+        Возвращает передаточную функцию (угловой спектр) с ограничением полосы частот для дистанции z
+        :param z: дистанция распространения [м]
+        :return: передаточная функция на дополненной сетке (только для чтения, если используется кэш)
+        """
+        if self._cache is None:
+            return self._build_transfer_function(z)
+
+        key = ('band_limited', self._padded_shape, self._pixel_size, self._precision, self._wavelength, z)
+        return self._cache.get(key, lambda: self._build_transfer_function(z))
+
+    def _build_transfer_function(self, z: float) -> np.ndarray:
+        height, width = self._padded_shape
+
+        # Расчет граничных частот U/V_limit
+        dnu_x = 1 / (width * self._pixel_size)
+        dnu_y = 1 / (height * self._pixel_size)
+        nu_x_limit = 1 / (np.sqrt((2 * dnu_x * z) ** 2 + 1) * self._wavelength)
+        nu_y_limit = 1 / (np.sqrt((2 * dnu_y * z) ** 2 + 1) * self._wavelength)
+
+        # exp(1j * phase) собирается без промежуточных комплексных массивов
+        # квадрат модуля частоты нужен только при построении, поэтому между вызовами не хранится
+        nu_squared = self._nu_y[:, np.newaxis] ** 2 + self._nu_x[np.newaxis, :] ** 2
+        phase = propagation_phase(nu_squared, self._wavelength, z)
+        h = np.empty(self._padded_shape, dtype=self._precision.complex_dtype)
+        np.cos(phase, out=h.real)
+        np.sin(phase, out=h.imag)
+
+        # затухающие волны отбрасываются (на углах дополненной сетки lambda * nu может превышать 1)
+        h *= propagating_mask(nu_squared, self._wavelength)
+
+        # ограничение полосы частот разделимо по осям, поэтому маска применяется одномерными множителями
+        real_dtype = self._precision.real_dtype
+        h *= rect_1d(self._nu_y, w=2 * nu_y_limit).astype(real_dtype)[:, np.newaxis]
+        h *= rect_1d(self._nu_x, w=2 * nu_x_limit).astype(real_dtype)[np.newaxis, :]
+
+        return h
+
+    @property
+    def wavelength(self) -> float:
+        return self._wavelength
+
+    @property
+    def pixel_size(self) -> float:
+        return self._pixel_size
+
+    @property
+    def padded_shape(self):
+        return self._padded_shape
+
+
+def hankel_propagation(wave: Wave, z: float, **kwargs):
+    """
+    Распространение радиально-симметричной волны методом углового спектра, в котором двумерное FFT
+    заменено квазидискретным преобразованием Ханкеля нулевого порядка на радиальной сетке
+    :param wave: волна на радиальной сетке RadialGrid
+    :param z: дистанция распространения
+    :param kwargs: cache - кэш передаточных функций (None для расчета без кэширования)
+    :return:
     """
-    Распространение (преобразование) волны при помощи band-limited angular spectrum метода
+    if not isinstance(wave.grid, RadialGrid):
+        raise TypeError('Распространение преобразованием Ханкеля возможно только на радиальной сетке RadialGrid')
+
+    transform = _get_hankel_transform(wave.grid)
+    h = hankel_transfer_function(wave.grid, wave.wavelength, z, cache=kwargs.get('cache', transfer_function_cache))
+
+    wave.field = transform.inverse(transform.transform(wave.field) * h)
+
+
+@lru_cache(maxsize=8)
+def _get_hankel_transform(radial_grid: RadialGrid) -> QuasiDiscreteHankelTransform:
+    return QuasiDiscreteHankelTransform(radial_grid)
+
+
+def hankel_transfer_function(radial_grid: RadialGrid, wavelength: float, z: float,
+                             cache: Optional[TransferFunctionCache] = transfer_function_cache) -> np.ndarray:
+    """
+    Возвращает передаточную функцию слоя пространства на радиальных частотах сетки radial_grid
+    :param radial_grid: радиальная сетка
+    :param wavelength: длина волны [м]
+    :param z: дистанция распространения [м]
+    :param cache: кэш передаточных функций (None для расчета без кэширования)
+    :return: передаточная функция
+    """
+
+    def build() -> np.ndarray:
+        nu_squared = radial_grid.frequency_grid ** 2
+        return np.exp(1j * propagation_phase(nu_squared, wavelength, z)) * propagating_mask(nu_squared, wavelength)
+
+    if cache is None:
+        return build()
+
+    key = ('hankel', id(radial_grid), radial_grid.points, radial_grid.pixel_size, radial_grid.precision,
+           wavelength, z)
+
+    return cache.get(key, build)
+
+
+def fresnel_propagation(wave: Wave, z: float, **kwargs):
+    """
+    Распространение (преобразование) волны при помощи передаточной функции Френеля
     :param wave: волна
     :param z: дистанция распространения
+    :param kwargs: frequency_grid - частотная сетка (если не задана, рассчитывается по сетке волны без кэширования),
+                   cache - кэш передаточных функций (None для расчета без кэширования),
+                   fft_backend - реализация FFT (по умолчанию глобальная)
     :return:
     """
+    frequency_grid = kwargs.get('frequency_grid')
+    cache = kwargs.get('cache', transfer_function_cache)
+    fft_backend = kwargs.get('fft_backend')
 
-    # Увеличение транспаранта в 2 раза для трансформации линейной свертки в циклическую
-    # (периодические граничные условия)
-    height = 2 * wave.field.shape[0]  # количество строк матрицы
-    width = 2 * wave.field.shape[1]  # количество элеметов в каждой строке матрицы
+    if frequency_grid is None:
+        wave.field = fresnel(wave.field, z, wave.wavelength, wave.grid.pixel_size, fft_backend=fft_backend)
+        return
 
-    # Индексы для "старого" поля
-    left = int(width * .25)
-    right = int(width * .75)
-    top = int(height * .25)
-    bottom = int(height * .75)
+    h = fresnel_transfer_function(frequency_grid, wave.wavelength, z, cache=cache)
+    wave.field = ifft2(fft2(wave.field, backend=fft_backend) * h, backend=fft_backend)
 
-    # Вписываем "старое" поле в новое
-    new_field = np.zeros((height, width), dtype=wave.field.dtype)
-    new_field[top:bottom, left:right] = wave.field
 
-    # Сетка в частотной области
-    nu_x = np.arange(-width / 2, width / 2) / (width * wave.grid.pixel_size)
-    nu_y = np.arange(-height / 2, height / 2) / (height * wave.grid.pixel_size)
-    nu_x_grid, nu_y_grid = np.meshgrid(nu_x, nu_y)
-    nu_x_grid, nu_y_grid = ifftshift(nu_x_grid), ifftshift(nu_y_grid)
-    nu_z_grid = np.sqrt(wave.wavelength ** -2 - nu_x_grid ** 2 - nu_y_grid ** 2)
-    nu_z_grid[nu_x_grid ** 2 + nu_y_grid ** 2 > wave.wavelength ** -2] = 0
+def fresnel_ir_propagation(wave: Wave, z: float, **kwargs):
+    """
+    Распространение (преобразование) волны при помощи импульсного отклика Френеля (одно FFT).
+    Размер пикселя сетки волны после распространения равен lambda * z / (N * pixel_size),
+    поэтому сетка волны заменяется новой
+    :param wave: волна
+    :param z: дистанция распространения
+    :param kwargs: fft_backend - реализация FFT (по умолчанию глобальная)
+    :return:
+    """
+    field, pixel_size = fresnel_single_fft(wave.field, z, wave.wavelength, wave.grid.pixel_size,
+                                           fft_backend=kwargs.get('fft_backend'))
 
-    # Расчет граничных частот U/V_limit
-    dnu_x = 1 / (width * wave.grid.pixel_size)
-    dnu_y = 1 / (height * wave.grid.pixel_size)
-    nu_x_limit = 1 / (np.sqrt((2 * dnu_x * z) ** 2 + 1) * wave.wavelength)
-    nu_y_limit = 1 / (np.sqrt((2 * dnu_y * z) ** 2 + 1) * wave.wavelength)
+    wave.grid = grid_registry.cartesian(wave.grid.height, wave.grid.width, pixel_size, wave.grid.precision)
+    wave.field = field
 
-    # Передаточная функция (угловой спектр)
-    h_clipper = rect_2d(nu_x_grid, nu_y_grid, wx=2 * nu_x_limit, wy=2 * nu_y_limit)
-    h = np.exp(1j * 2 * np.pi * nu_z_grid * z) * h_clipper
 
-    # обратное преобразование Фурье
-    wave.field = ifft2(fft2(new_field) * h)[top:bottom, left:right]
+def fresnel_auto_propagation(wave: Wave, z: float, **kwargs):
+    """
+    Распространение волны по Френелю методом, подходящим для дистанции z:
+    передаточной функцией на исходной сетке при z <= N * pixel_size^2 / lambda
+    (число Френеля сетки не меньше N / 4) и импульсным откликом с одним FFT при больших дистанциях
+    :param wave: волна
+    :param z: дистанция распространения
+    :param kwargs: параметры fresnel_propagation и fresnel_ir_propagation
+    :return:
+    """
+    size = max(wave.grid.height, wave.grid.width)
+    width_m = size * wave.grid.pixel_size
+
+    if fresnel_number(width_m, wave.wavelength, z) >= size / 4:
+        fresnel_propagation(wave, z, **kwargs)
+    else:
+        fresnel_ir_propagation(wave, z, **kwargs)
+
+
+def matrix_fourier_propagation(wave: Wave, z: float, **kwargs):
+    """
+    Распространение волны по Френелю с расчётом поля только в области интереса (ROI) размером M x M
+    при помощи матричного (частичного) дискретного преобразования Фурье.
+    Вместо FFT всей плоскости N x N выполняются два матричных умножения (M x N) @ (N x N) @ (N x M).
+    Метод применим при |z| >= N * pixel_size^2 / lambda (см. matrix_fourier_fresnel); на меньших дистанциях
+    используется angular_spectrum_propagation. Сетка волны заменяется центрированной сеткой ROI
+    :param wave: волна
+    :param z: дистанция распространения
+    :param kwargs: roi_shape - размер ROI: int или (height, width) [px],
+                   roi_pixel_size - размер пикселя ROI (по умолчанию размер пикселя сетки волны) [м]
+    :return:
+    """
+    roi_shape = kwargs.get('roi_shape')
+    roi_pixel_size = kwargs.get('roi_pixel_size', wave.grid.pixel_size)
+
+    if roi_shape is None:
+        raise ValueError('Не задан размер области интереса roi_shape')
+
+    if np.isscalar(roi_shape):
+        roi_shape = (roi_shape, roi_shape)
+
+    wave.field = matrix_fourier_fresnel(wave.field, z, wave.wavelength, wave.grid.pixel_size, roi_shape, roi_pixel_size)
+    wave.grid = grid_registry.cartesian(*roi_shape, roi_pixel_size, wave.grid.precision)
+
+
+def fresnel_number(width: float, wavelength: float, z: float) -> float:
+    """
+    Возвращает число Френеля (width / 2)^2 / (lambda * z) для области шириной width.
+    Для сетки из N пикселей передаточная функция Френеля корректно дискретизирована,
+    пока число Френеля области сетки не меньше N / 4 (pixel_size >= lambda * z / width)
+    :param width: ширина области [м]
+    :param wavelength: длина волны [м]
+    :param z: дистанция распространения [м]
+    :return: число Френеля
+    """
+    if z == 0:
+        return np.inf
+
+    return (width / 2) ** 2 / (wavelength * np.abs(z))
+
+
+def fresnel_transfer_function(frequency_grid: FrequencyGrid, wavelength: float, z: float,
+                              cache: Optional[TransferFunctionCache] = transfer_function_cache) -> np.ndarray:
+    """
+    Возвращает передаточную функцию Френеля слоя пространства толщиной z
+    :param frequency_grid: частотная сетка
+    :param wavelength: длина волны [м]
+    :param z: дистанция распространения [м]
+    :param cache: кэш передаточных функций (None для расчета без кэширования)
+    :return: передаточная функция (только для чтения, если используется кэш)
+    """
+
+    def build() -> np.ndarray:
+        # частотная сетка
+        nu_y_grid, nu_x_grid = frequency_grid.grid.y_grid, frequency_grid.grid.x_grid
+
+        return np.exp(1j * fresnel_phase(nu_x_grid ** 2 + nu_y_grid ** 2, wavelength, z))
+
+    if cache is None:
+        return build()
+
+    key = ('fresnel', id(frequency_grid),
+           frequency_grid.height, frequency_grid.width, frequency_grid.pixel_size, frequency_grid.precision,
+           wavelength, z)
+
+    return cache.get(key, build)
+
+
+def fresnel_phase(nu_squared: np.ndarray, wavelength: float, z: float) -> np.ndarray:
+    """
+    Возвращает фазу k * z - pi * lambda * z * nu^2 передаточной функции Френеля.
+    Постоянная k * z берётся по модулю 2pi (см. propagation_phase)
+    :param nu_squared: квадрат модуля пространственной частоты nu_x^2 + nu_y^2
+    :param wavelength: длина волны [м]
+    :param z: дистанция распространения [м]
+    :return: фаза передаточной функции того же типа данных, что и nu_squared
+    """
+    wavelength, z = float(wavelength), float(z)
+
+    # волновое число
+    wave_number = 2 * np.pi / wavelength
+
+    return (wave_number * z) % (2 * np.pi) - np.pi * wavelength * z * nu_squared
 
 
 def fresnel(field: np.ndarray, propagate_distance: float,
-            wavelenght: float, pixel_size: float) -> np.ndarray:
+            wavelenght: float, pixel_size: float,
+            fft_backend: Union[str, FFTBackend, None] = None) -> np.ndarray:
     """
     Расчет комплексной амплитуды светового поля прошедшей через слой пространства толщиной propagate_distance
     с использованием передаточной функции Френеля
@@ -89,29 +545,131 @@ def fresnel(field: np.ndarray, propagate_distance: float,
     :param propagate_distance: float z
     :param wavelenght: float lambda
     :param pixel_size: float px_size
+    :param fft_backend: реализация FFT (по умолчанию глобальная)
     :return: array-like
     """
-    raise NotImplementedError("This method not implemented yet")
+    height, width = field.shape[-2:]
+    real_dtype = field.real.dtype
 
-    height = field.shape[0]
-    width = field.shape[1]
+    # Сетка в частотной области (высокие частоты по краям)
+    nu_x = fftfreq(width, pixel_size).astype(real_dtype)
+    nu_y = fftfreq(height, pixel_size).astype(real_dtype)
+    nu_squared = nu_y[:, np.newaxis] ** 2 + nu_x[np.newaxis, :] ** 2
 
-    wave_number = 2 * np.pi / wavelenght
+    h = np.exp(1j * fresnel_phase(nu_squared, wavelenght, propagate_distance))
 
-    # Сетка в частотной области
-    nu_x = np.arange(-width / 2, width / 2) / (width * pixel_size)
-    nu_y = np.arange(-height / 2, height / 2) / (height * pixel_size)
-    nu_x_grid, nu_y_grid = np.meshgrid(nu_x, nu_y)
-    nu_x_grid, nu_y_grid = ifftshift(nu_x_grid), ifftshift(nu_y_grid)
+    return ifft2(fft2(field, backend=fft_backend) * h, backend=fft_backend)
 
-    if propagate_distance != 0 and np.abs(propagate_distance) <= 1 / (wavelenght * (nu_x.max()**2 + nu_y.max()**2)**2):
-        raise ValueError(f'Не выполняется критерий Релея z < 1 / (lamda*(nu_x^2+nu_y^2): '
-                         f'{np.abs(propagate_distance)} <= {1 / (wavelength * (nu_x.max()**2 + nu_y.max()**2)**2)}')
 
-    # Фурье-образ исходного поля
-    field = fft2(field)
+def fresnel_single_fft(field: np.ndarray, propagate_distance: float,
+                       wavelength: float, pixel_size: float,
+                       fft_backend: Union[str, FFTBackend, None] = None) -> Tuple[np.ndarray, float]:
+    """
+    Расчет комплексной амплитуды светового поля, прошедшего через слой пространства толщиной propagate_distance,
+    с использованием импульсного отклика Френеля, вычисляемого одним FFT:
+    U(x) = exp(ikz) / (i * lambda * z) * exp(ik x^2 / 2z) * FFT[U(x') * exp(ik x'^2 / 2z)] * pixel_size^2
+    Размер пикселя результата равен lambda * z / (N * pixel_size)
+    :param field: array-like квадратная матрица
+    :param propagate_distance: float z > 0
+    :param wavelength: float lambda
+    :param pixel_size: float px_size
+    :param fft_backend: реализация FFT (по умолчанию глобальная)
+    :return: (array-like, размер пикселя результата [м])
+    """
+    height, width = field.shape[-2:]
+
+    if height != width:
+        raise ValueError(f'Импульсный отклик Френеля реализован для квадратных матриц: {height} != {width}')
+
+    if propagate_distance <= 0:
+        raise ValueError(f'Дистанция распространения должна быть положительной: {propagate_distance}')
+
+    wavelength, propagate_distance = float(wavelength), float(propagate_distance)
+    real_dtype = field.real.dtype
+    wave_number = 2 * np.pi / wavelength
+
+    # Координаты в исходной плоскости и в плоскости наблюдения (центр в пикселе N / 2)
+    new_pixel_size = wavelength * propagate_distance / (width * pixel_size)
+    indexes = np.arange(width, dtype=real_dtype) - width // 2
+    x_squared = (indexes * pixel_size) ** 2
+    new_x_squared = (indexes * new_pixel_size) ** 2
+
+    chirp_coef = np.pi / (wavelength * propagate_distance)
+    chirp = np.exp(1j * chirp_coef * (x_squared[:, np.newaxis] + x_squared[np.newaxis, :]))
+    new_chirp = np.exp(1j * chirp_coef * (new_x_squared[:, np.newaxis] + new_x_squared[np.newaxis, :]))
+
+    # Постоянный множитель exp(ikz) / (i * lambda * z) * pixel_size^2
+    coef = np.exp(1j * ((wave_number * propagate_distance) % (2 * np.pi))) * pixel_size ** 2 / \
+        (1j * wavelength * propagate_distance)
+
+    spectrum = fftshift(fft2(ifftshift(field * chirp, axes=(-2, -1)), backend=fft_backend), axes=(-2, -1))
+    spectrum *= new_chirp
+    spectrum *= np.asarray(coef, dtype=spectrum.dtype)
+
+    return spectrum, new_pixel_size
+
+
+def matrix_fourier_fresnel(field: np.ndarray, propagate_distance: float,
+                           wavelength: float, pixel_size: float,
+                           roi_shape: Tuple[int, int], roi_pixel_size: float) -> np.ndarray:
+    """
+    Расчет комплексной амплитуды светового поля, прошедшего через слой пространства толщиной propagate_distance,
+    в центрированной области интереса с использованием импульсного отклика Френеля и матричного преобразования Фурье:
+    U(x, y) = exp(ikz) / (i * lambda * z) * exp(ik (x^2 + y^2) / 2z) * Ey @ [U(x', y') * exp(ik (x'^2 + y'^2) / 2z)] @ Ex^T
+    Ex[m, n] = exp(-2 * pi * i * x_m * x'_n / (lambda * z)) * pixel_size (аналогично Ey)
+    Soummer R. et al. "Fast computation of Lyot-style coronagraph propagation", Opt. Express 15, 15935 (2007)
+    Допустимые дистанции: |z| >= N * pixel_size^2 / lambda (входной чирп дискретизирован) и ROI в пределах
+    |x| <= lambda * |z| / (2 * pixel_size) (строки Ex не повторяются). На меньших дистанциях FFT по угловому спектру
+    всей плоскости быстрее матричного ДПФ, поэтому такие дистанции отклоняются. При z = 0 и совпадающих размерах
+    пикселя ROI вырезается из поля без преобразований
+    :param field: array-like
+    :param propagate_distance: float z
+    :param wavelength: float lambda
+    :param pixel_size: float px_size исходной сетки
+    :param roi_shape: (height, width) области интереса [px]
+    :param roi_pixel_size: float размер пикселя области интереса
+    :return: array-like размером roi_shape
+    """
+    wavelength, propagate_distance = float(wavelength), float(propagate_distance)
+    real_dtype = field.real.dtype
+    wave_number = 2 * np.pi / wavelength
+    lambda_z = wavelength * propagate_distance
+
+    def axis(size: int, step: float) -> np.ndarray:
+        # координаты с центром в пикселе size / 2
+        return (np.arange(size, dtype=real_dtype) - size // 2) * step
+
+    height, width = field.shape[-2:]
+    y, x = axis(height, pixel_size), axis(width, pixel_size)
+    roi_y, roi_x = axis(roi_shape[0], roi_pixel_size), axis(roi_shape[1], roi_pixel_size)
+
+    if propagate_distance == 0 and roi_pixel_size == pixel_size and \
+            roi_shape[0] <= height and roi_shape[1] <= width:
+        top, left = height // 2 - roi_shape[0] // 2, width // 2 - roi_shape[1] // 2
+        return field[..., top:top + roi_shape[0], left:left + roi_shape[1]].copy()
+
+    min_distance = max(height, width) * pixel_size ** 2 / wavelength
+    if np.abs(propagate_distance) < min_distance:
+        raise ValueError(f'Матричное преобразование Фурье применимо при |z| >= N * pixel_size^2 / lambda = '
+                         f'{min_distance} м, z = {propagate_distance} м: используйте angular_spectrum_propagation')
+
+    roi_half_width = max(np.max(np.abs(roi_y)), np.max(np.abs(roi_x)))
+    if roi_half_width > np.abs(lambda_z) / (2 * pixel_size):
+        raise ValueError(f'ROI выходит за пределы |x| <= lambda * |z| / (2 * pixel_size) = '
+                         f'{np.abs(lambda_z) / (2 * pixel_size)} м: уменьшите roi_shape или roi_pixel_size')
+
+    # матрицы частичного ДПФ
+    ey = np.exp(-2j * np.pi / lambda_z * np.outer(roi_y, y)) * pixel_size
+    ex = np.exp(-2j * np.pi / lambda_z * np.outer(roi_x, x)) * pixel_size
+
+    chirp = np.exp(1j * np.pi / lambda_z * (y[:, np.newaxis] ** 2 + x[np.newaxis, :] ** 2))
+    roi_chirp = np.exp(1j * np.pi / lambda_z * (roi_y[:, np.newaxis] ** 2 + roi_x[np.newaxis, :] ** 2))
+
+    # Постоянный множитель exp(ikz) / (i * lambda * z)
+    coef = np.exp(1j * ((wave_number * propagate_distance) % (2 * np.pi))) / (1j * lambda_z)
 
-    exp_term = np.sqrt(1 - ((wavelenght * nu_x_grid) ** 2 - (wavelenght * nu_y_grid) ** 2) / 2)
-    h = np.exp(1j * wave_number * propagate_distance * exp_term)
+    roi_field = ey @ (field * chirp) @ ex.T
+    roi_field *= roi_chirp
+    roi_field *= np.asarray(coef, dtype=roi_field.dtype)
 
-    return ifft2(field * h)
\ No newline at end of file
+    return roi_field
@@ -0,0 +1,12 @@
+from src.propagation.utils.math.array_cache import ArrayCache, CacheInfo
+
+
+class TransferFunctionCache(ArrayCache):
+    """
+    LRU-кэш передаточных функций слоя пространства с ограничением по занимаемой памяти.
+    Ключи методов распространения включают метод, сетку, длину волны и z (см. utils.optic.propagation_methods)
+    """
+
+
+# Общий кэш передаточных функций, используемый методами распространения по умолчанию
+transfer_function_cache = TransferFunctionCache()
@@ -0,0 +1,61 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Коэффициенты аппроксимации фазы a * (x^2 + y^2) + b * x + c * y
+Defocus = namedtuple("Defocus", "curvature tilt_x tilt_y")
+
+
+def fit_defocus(field: np.ndarray, mask: np.ndarray, y_axis: np.ndarray, x_axis: np.ndarray) -> Defocus:
+    """
+    Аппроксимирует фазу поля функцией a * (x^2 + y^2) + b * x + c * y по методу наименьших квадратов без
+    разворачивания фазы: используются разности фаз соседних отсчетов angle(conj(U[i]) * U[i + 1]), которые
+    не содержат скачков 2pi, пока набег фазы между соседними пикселями меньше pi.
+    Производные фазы в серединах между отсчетами приравниваются к 2 * a * x + b и 2 * a * y + c,
+    и система нормальных уравнений 3x3 решается явно, поэтому вычисления сводятся к O(N^2) арифметике.
+    Поля с ведущими осями (batch, height, width) аппроксимируются все сразу
+    :param field: комплексное поле (..., height, width)
+    :param mask: область аппроксимации (например, Aperture.aperture_view), транслируемая до формы field
+    :param y_axis: одномерная ось Y сетки [м]
+    :param x_axis: одномерная ось X сетки [м]
+    :return: коэффициенты a [рад/м^2], b, c [рад/м] (скаляры либо массивы формы field.shape[:-2])
+    """
+    mask = np.asarray(mask, dtype=bool)
+
+    def axis_terms(differences: np.ndarray, pair_mask: np.ndarray, axis: np.ndarray, shape) -> tuple:
+        # производные фазы и координаты середин между соседними отсчетами
+        middle = ((axis[:-1] + axis[1:]) / 2).reshape(shape)
+        gradient = np.angle(differences) / np.diff(axis).reshape(shape)
+
+        weights = np.broadcast_to(pair_mask, gradient.shape).astype(np.float64)
+        sums = lambda array: np.sum(array, axis=(-2, -1), dtype=np.float64)
+        return (sums(weights), sums(weights * middle), sums(weights * middle ** 2),
+                sums(weights * gradient), sums(weights * middle * gradient))
+
+    nx, sx, sxx, sgx, sxgx = axis_terms(np.conj(field[..., :, :-1]) * field[..., :, 1:],
+                                        mask[..., :, :-1] & mask[..., :, 1:], x_axis, (1, -1))
+    ny, sy, syy, sgy, sygy = axis_terms(np.conj(field[..., :-1, :]) * field[..., 1:, :],
+                                        mask[..., :-1, :] & mask[..., 1:, :], y_axis, (-1, 1))
+
+    # нормальные уравнения для невязок 2 * a * x + b - gx и 2 * a * y + c - gy
+    zeros = np.zeros_like(nx)
+    matrix = np.stack([np.stack([4 * (sxx + syy), 2 * sx, 2 * sy], axis=-1),
+                       np.stack([2 * sx, nx, zeros], axis=-1),
+                       np.stack([2 * sy, zeros, ny], axis=-1)], axis=-2)
+    rhs = np.stack([2 * (sxgx + sygy), sgx, sgy], axis=-1)
+
+    solution = np.linalg.solve(matrix, rhs[..., np.newaxis])[..., 0]
+    return Defocus(solution[..., 0], solution[..., 1], solution[..., 2])
+
+
+def defocus_radius(curvature: float, wave_number: float) -> float:
+    """
+    Радиус кривизны сферического волнового фронта с фазой a * rho^2, a = k / (2 * R), со знаком:
+    R < 0 для сходящейся волны (фаза exp(-ik rho^2 / 2f), как у SphericalWave), R > 0 для расходящейся,
+    бесконечность для плоского фронта (a = 0)
+    :param curvature: коэффициент a [рад/м^2]
+    :param wave_number: волновое число [рад/м]
+    :return: радиус кривизны [м]
+    """
+    with np.errstate(divide='ignore'):
+        return wave_number / (2 * np.asarray(curvature, dtype=np.float64))
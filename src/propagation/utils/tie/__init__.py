@@ -1,2 +1,3 @@
-from .boundary_conditions import apply_volkov_scheme, clip, BoundaryConditions
+from .boundary_conditions import apply_volkov_scheme, clip, padded_shape, BoundaryConditions
 from .fft_solver import FFTSolver
+from .dct_solver import DCTSolver
@@ -1,6 +1,8 @@
 import enum
 import numpy as np
 
+from typing import Tuple
+
 
 @enum.unique
 class BoundaryConditions(enum.Enum):
@@ -12,50 +14,64 @@ class BoundaryConditions(enum.Enum):
 
 def apply_volkov_scheme(array: np.ndarray, condition: BoundaryConditions) -> np.ndarray:
     """
-    Генерирует массив в 2 раза больше array, заполняя площадь отражённым array по различным направлениям.
+    Генерирует массив в 2 раза больше array по двум последним осям, заполняя площадь отражённым array
+    по различным направлениям (стопки (..., h, w) отражаются покадрово).
     Volkov mirror-padding scheme - DOI: 10.1117/12.2020662
     :param array:
     :param condition:
     :return: mirrored_array
     """
 
-    h, w = array.shape
-    m_array = np.zeros((h * 2, w * 2), dtype=array.dtype)  # mirrored
+    h, w = array.shape[-2:]
+    m_array = np.zeros((*array.shape[:-2], h * 2, w * 2), dtype=array.dtype)  # mirrored
 
-    array_lr = np.fliplr(array)
-    array_ud = np.flipud(array)
-    array_udlr = np.fliplr(array_ud)
+    array_lr = np.flip(array, axis=-1)
+    array_ud = np.flip(array, axis=-2)
+    array_udlr = np.flip(array_ud, axis=-1)
 
     if condition == BoundaryConditions.DIRICHLET:
-        m_array[0: h:, w: 2 * w:] = -array_lr  # право-верх
-        m_array[h: 2 * h:, 0: w:] = -array_ud  # лево-низ
+        m_array[..., 0: h:, w: 2 * w:] = -array_lr  # право-верх
+        m_array[..., h: 2 * h:, 0: w:] = -array_ud  # лево-низ
 
     elif condition == BoundaryConditions.NEUMANN:
-        m_array[0: h:, w: 2 * w:] = array_lr  # право-верх
-        m_array[h: 2 * h:, 0: w:] = array_ud  # лево-низ
-
-    elif condition == BoundaryConditions.PERIODIC:
-        raise NotImplementedError
+        m_array[..., 0: h:, w: 2 * w:] = array_lr  # право-верх
+        m_array[..., h: 2 * h:, 0: w:] = array_ud  # лево-низ
 
-    elif condition == BoundaryConditions.NONE:
+    elif condition in [BoundaryConditions.PERIODIC, BoundaryConditions.NONE]:
+        # FFT периодично по построению, отражение не требуется
         return array
 
-    m_array[0: h:, 0: w:] = array
-    m_array[h: 2 * h:, w: 2 * w:] = array_udlr  # право-низ
+    m_array[..., 0: h:, 0: w:] = array
+    m_array[..., h: 2 * h:, w: 2 * w:] = array_udlr  # право-низ
 
     return m_array
 
 
+def padded_shape(shape: Tuple[int, int], condition: BoundaryConditions) -> Tuple[int, int]:
+    """
+    Размер массива после apply_volkov_scheme
+    :param shape: размер исходного массива (height, width)
+    :param condition:
+    :return: (height, width)
+    """
+    h, w = shape
+
+    if condition in [BoundaryConditions.DIRICHLET, BoundaryConditions.NEUMANN]:
+        return h * 2, w * 2
+
+    return h, w
+
+
 def clip(mirrored_array: np.ndarray, condition: BoundaryConditions) -> np.ndarray:
     """
-    Вырезает исходную часть (2-й квадрант) из отражённого массива
+    Вырезает исходную часть (2-й квадрант) из отражённого массива (по двум последним осям)
     :param mirrored_array:
     :param condition:
     :return:
     """
     if condition in [BoundaryConditions.DIRICHLET, BoundaryConditions.NEUMANN]:
-        h, w = mirrored_array.shape
-        clipped_array = mirrored_array[0:h // 2, 0:w // 2]
+        h, w = mirrored_array.shape[-2:]
+        clipped_array = mirrored_array[..., 0:h // 2, 0:w // 2]
         return clipped_array
 
     else:
@@ -0,0 +1,122 @@
+import numpy as np
+
+from typing import Tuple, Union
+from src.propagation.utils.tie.solver import TIESolver
+from src.propagation.utils.tie.boundary_conditions import BoundaryConditions
+from src.propagation.utils.math.derivative.fourier import ilaplacian_filter, trig_derivative, trig_transform_2d, \
+    trig_wavenumbers
+from src.propagation.utils.math.fft_backend import FFTBackend
+from src.propagation.utils.math.precision import Precision
+
+
+class DCTSolver(TIESolver):
+    """
+    Решение TIE быстрыми тригонометрическими преобразованиями: граничные условия Неймана задаются DCT-II,
+    Дирихле - DST-II. Преобразования диагонализуют те же операторы, что и FFT отраженных интенсивностей
+    (схема Волкова), поэтому отражение не выполняется: решение ведется на исходной сетке (height, width),
+    что в 4 раза меньше по памяти и объему преобразований, чем FFTSolver с теми же граничными условиями.
+    При DIRICHLET dI/dz нечетна, как и в схеме Волкова, но делитель -k / I четен: отраженная со сменой знака
+    интенсивность в FFTSolver отрицательна и за пределами исходной части заменяется порогом.
+    Для периодических граничных условий используется FFTSolver
+    """
+
+    def __init__(self, shape, dz, wavelength, pixel_size, bc=BoundaryConditions.NEUMANN,
+                 fft_backend: Union[str, FFTBackend, None] = None, precision: Union[Precision, str, None] = None):
+        """
+        :param shape: размер матриц интенсивностей (height, width)
+        :param pixel_size: размер пикселя, м
+        :param bc: граничные условия (NEUMANN | DIRICHLET)
+        :param fft_backend: реализация DCT/DST (по умолчанию глобальная)
+        :param precision: точность вычислений (по умолчанию глобальная)
+        """
+        if bc not in [BoundaryConditions.NEUMANN, BoundaryConditions.DIRICHLET]:
+            raise ValueError(f'DCTSolver поддерживает граничные условия NEUMANN и DIRICHLET, получено {bc}. '
+                             f'Для {bc} используйте FFTSolver')
+
+        super().__init__(shape, dz, wavelength, bc, precision)
+        self.__pixel_size = pixel_size
+        self.__fft_backend = fft_backend
+
+        # четность фазы и dI/dz относительно краев сетки; компоненты градиента имеют противоположную четность по оси
+        # дифференцирования
+        self.__even = bc == BoundaryConditions.NEUMANN
+
+        eps = 2.2204e-16  # from MatLab 2.2204e-16
+        self.__reg_param = eps / self.pixel_size ** 4
+        self.__ilaplacian = self._build_ilaplacian_filter(self.reg_param)
+
+    def solve(self, i1, i2, threshold) -> np.ndarray:
+        """
+        phi = L^-1 div(-k / I * grad(L^-1 dI/dz)), все операторы - в области DCT-II/DST-II (6 преобразований)
+        :param i1: опорная интенсивность (height, width) либо стопка опорных интенсивностей (..., height, width)
+        :param i2: интенсивность в плоскости, смещённой на 2 * dz (того же размера, что и i1)
+        :param threshold: порог для деления на опорную интенсивность
+        :return: фаза того же размера, что и i1
+        """
+        ref_intensity = self.prepare(i1)
+        return self.solve_derivative(ref_intensity, self.axial_derivative(ref_intensity, self.prepare(i2)), threshold)
+
+    def solve_derivative(self, intensity, axial_derivative, threshold) -> np.ndarray:
+        even = self.__even
+        x_parity, y_parity = (even, not even), (not even, even)
+
+        ref_intensity = self.prepare(intensity)
+        axial_derivative = self.prepare(axial_derivative)
+
+        # Первый обратный Лапласиан и градиент (3 преобразования)
+        spectrum = self._transform(axial_derivative, (even, even))
+        spectrum *= self.__ilaplacian
+        phase_x = self._transform(trig_derivative(spectrum, -1, even, self.pixel_size), x_parity, inverse=True)
+        phase_y = self._transform(trig_derivative(spectrum, -2, even, self.pixel_size), y_parity, inverse=True)
+
+        # Деление на опорную интенсивность, дивергенция и второй обратный Лапласиан (3 преобразования)
+        scale = self._scale(ref_intensity, threshold)
+        phase_x *= scale
+        phase_y *= scale
+
+        spectrum = trig_derivative(self._transform(phase_x, x_parity), -1, not even, self.pixel_size)
+        spectrum += trig_derivative(self._transform(phase_y, y_parity), -2, not even, self.pixel_size)
+        spectrum *= self.__ilaplacian
+
+        return self._transform(spectrum, (even, even), inverse=True)
+
+    def prepare(self, intensity: np.ndarray) -> np.ndarray:
+        """
+        Граничные условия заданы преобразованиями, поэтому интенсивность только приводится к точности решателя
+        """
+        return self.cast(intensity)
+
+    def _transform(self, f: np.ndarray, even: Tuple[bool, bool], inverse: bool = False) -> np.ndarray:
+        return trig_transform_2d(f, even, inverse=inverse, backend=self.fft_backend)
+
+    def get_ilaplacian_filter(self, reg_param: float) -> np.ndarray:
+        """
+        Регуляризованный фильтр обратного Лапласиана в области DCT-II/DST-II (для reg_param решателя - из памяти)
+        :param reg_param: параметр регуляризации
+        :return: фильтр (height, width)
+        """
+        if reg_param == self.reg_param:
+            return self.__ilaplacian
+
+        return self._build_ilaplacian_filter(reg_param)
+
+    def _build_ilaplacian_filter(self, reg_param: float) -> np.ndarray:
+        dtype = self.precision.real_dtype
+        height, width = self.shape
+
+        # волновые числа совпадают с частотами сетки отраженной интенсивности, ik - как у grid_registry.frequency_coefs
+        kx = 1j * trig_wavenumbers(width, self.pixel_size, self.__even).astype(dtype).reshape(1, -1)
+        ky = 1j * trig_wavenumbers(height, self.pixel_size, self.__even).astype(dtype).reshape(-1, 1)
+        return ilaplacian_filter(kx, ky, reg_param).astype(dtype, copy=False)
+
+    @property
+    def pixel_size(self):
+        return self.__pixel_size
+
+    @property
+    def reg_param(self) -> float:
+        return self.__reg_param
+
+    @property
+    def fft_backend(self):
+        return self.__fft_backend
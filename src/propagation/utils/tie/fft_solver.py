@@ -1,67 +1,192 @@
 import numpy as np
 
-from typing import Tuple
-from numpy.fft import fftshift
+from collections import namedtuple
+from typing import Optional, Sequence, Tuple, Union
 from src.propagation.utils.tie.solver import TIESolver
-from src.propagation.utils.tie.boundary_conditions import BoundaryConditions, clip
-from src.propagation.model.areas.square_area import CoordinateGrid
-from src.propagation.utils.math.derivative.fourier import gradient_2d, ilaplacian_2d
+from src.propagation.utils.tie.boundary_conditions import BoundaryConditions, clip, padded_shape
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.utils.math.derivative.fourier import ilaplacian_filter
+from src.propagation.utils.math.fft_backend import FFTBackend, irfft2, rfft2
+from src.propagation.utils.math.precision import Precision
+
+# Вариант решения TIE из перебора solve_many с наименьшей невязкой
+TIEVariant = namedtuple('TIEVariant', ['phase', 'threshold', 'reg_param', 'residual'])
 
 
 class FFTSolver(TIESolver):
     """
     Решение TIE методом Фурье.
+    Интенсивности и градиенты фазы вещественны, поэтому используются rfft2/irfft2 и половина спектра.
     D. Paganin and K. A. Nugent, Phys. Rev. Lett. 80, 2586 (1998).
     """
 
-    def __init__(self, paths, dz, wavelength, pixel_size, bc=BoundaryConditions.NONE):
-        super().__init__(paths, dz, wavelength, bc)
+    def __init__(self, shape, dz, wavelength, pixel_size, bc=BoundaryConditions.NONE,
+                 fft_backend: Union[str, FFTBackend, None] = None, precision: Union[Precision, str, None] = None):
+        """
+        :param shape: размер матриц интенсивностей (height, width)
+        :param pixel_size: размер пикселя, м
+        :param fft_backend: реализация FFT (по умолчанию глобальная)
+        :param precision: точность вычислений (по умолчанию глобальная)
+        """
+        super().__init__(shape, dz, wavelength, bc, precision)
         self.__pixel_size = pixel_size
+        self.__fft_backend = fft_backend
         self.__kx, self.__ky = self.get_frequency_coefs()
-        # todo метод solve находится вне конструктура чтобы можно было заменить paths без удаления объекта
 
-    def solve(self, threshold) -> np.ndarray:
-        wave_number = 2 * np.pi / self.wavelenth
+        # регуляризованный обратный Лапласиан зависит только от сетки и рассчитывается один раз
         eps = 2.2204e-16  # from MatLab 2.2204e-16
-        reg_param = eps / self.pixel_size ** 4
+        self.__reg_param = eps / self.pixel_size ** 4
+        self.__ilaplacian = self._build_ilaplacian_filter(self.reg_param)
+
+    def solve(self, i1, i2, threshold) -> np.ndarray:
+        return self.solve_many(i1, i2, [threshold])[0, 0]
+
+    def solve_derivative(self, intensity, axial_derivative, threshold) -> np.ndarray:
+        # отражение линейно, поэтому отраженная производная совпадает с производной отраженных интенсивностей
+        return self._solve_many(self.prepare(intensity), self.prepare(axial_derivative), [threshold])[0, 0]
+
+    def solve_many(self, i1: np.ndarray, i2: np.ndarray, thresholds: Sequence[float],
+                   reg_params: Optional[Sequence[float]] = None, select_best: bool = False):
+        """
+        Решает TIE для всех сочетаний порогов и параметров регуляризации по паре (или стопке пар) интенсивностей.
+        Слитная схема: между этапами решение остается в частотной области, поэтому вместо 9 преобразований
+        (ilaplacian_2d -> gradient_2d -> деление на интенсивность -> gradient_2d -> ilaplacian_2d) выполняется 6:
+        phi = L^-1 div(-k / I * grad(L^-1 dI/dz)), где div и grad считаются умножением половины спектра на kx, ky.
+        Спектр dI/dz рассчитывается один раз, первый этап (L^-1 и grad) - один раз на параметр регуляризации,
+        на каждый вариант остаются 3 преобразования
+        :param i1: опорная интенсивность (height, width) либо стопка опорных интенсивностей (..., height, width)
+        :param i2: интенсивность в плоскости, смещённой на 2 * dz (того же размера, что и i1)
+        :param thresholds: пороги для деления на опорную интенсивность
+        :param reg_params: параметры регуляризации обратного Лапласиана (по умолчанию reg_param решателя)
+        :param select_best: дополнительно вернуть вариант с наименьшей невязкой TIE (residual, для стопки - общей)
+        :return: фазы (len(reg_params), len(thresholds), ..., height, width);
+        при select_best - (фазы, TIEVariant)
+        """
+        ref_intensity = self.prepare(i1)
+        axial_derivative = self.axial_derivative(ref_intensity, self.prepare(i2))
+        return self._solve_many(ref_intensity, axial_derivative, thresholds, reg_params, select_best)
 
-        # Умножение на волновое число
-        phase = -wave_number * self.axial_derivative
+    def _solve_many(self, ref_intensity: np.ndarray, axial_derivative: np.ndarray, thresholds: Sequence[float],
+                    reg_params: Optional[Sequence[float]] = None, select_best: bool = False):
+        """ solve_many по подготовленным (отраженным) опорной интенсивности и dI/dz """
+        reg_params = [self.reg_param] if reg_params is None else list(reg_params)
+        thresholds = list(thresholds)
 
-        # Первые Лапласиан и градиент
-        phase = ilaplacian_2d(phase, self.kx, self.ky, reg_param, return_spacedomain=False)
-        phase_x, phase_y = gradient_2d(phase, phase, self.kx, self.ky, space_domain=False)
+        # множители -k / I для всех порогов (нули вне порога)
+        scales = [self._scale(ref_intensity, threshold) for threshold in thresholds]
 
-        # Деление на опорную интенсивность
-        mask = self.add_threshold(threshold)
-        phase_x /= self.ref_intensity
-        phase_y /= self.ref_intensity
-        phase_x[mask], phase_y[mask] = 0, 0
+        phases = np.empty((len(reg_params), len(thresholds), *ref_intensity.shape[:-2], *self.shape),
+                          dtype=self.precision.real_dtype)
+        residuals = np.empty((len(reg_params), len(thresholds)))
 
-        # Вторые Лапласиан и градиент
-        phase_x, phase_y = gradient_2d(phase_x, phase_y, self.kx, self.ky)
-        phase = ilaplacian_2d(phase_x + phase_y, self.kx, self.ky, reg_param)
+        axial_spectrum = rfft2(axial_derivative, backend=self.fft_backend)
 
-        phase = clip(phase, self.boundary_condition)
-        return phase
+        for r, reg_param in enumerate(reg_params):
+            ilaplacian = self.get_ilaplacian_filter(reg_param)
+
+            # Первый обратный Лапласиан и градиент (2 преобразования)
+            phase_x, phase_y = self._gradient(axial_spectrum * ilaplacian)
+
+            for t, scale in enumerate(scales):
+                # Деление на опорную интенсивность, дивергенция и второй обратный Лапласиан (3 преобразования)
+                spectrum = self._divergence(phase_x * scale, phase_y * scale)
+                spectrum *= ilaplacian
+                phase = irfft2(spectrum, s=self.padded_shape, backend=self.fft_backend, overwrite_x=True)
+
+                if select_best:
+                    residuals[r, t] = self._residual(ref_intensity, axial_derivative, phase)
+
+                phases[r, t] = clip(phase, self.boundary_condition)
+
+        if not select_best:
+            return phases
+
+        r, t = np.unravel_index(np.argmin(residuals), residuals.shape)
+        return phases, TIEVariant(phases[r, t], thresholds[t], reg_params[r], residuals[r, t])
+
+    def residual(self, i1: np.ndarray, i2: np.ndarray, phase: np.ndarray) -> float:
+        """
+        Относительная невязка TIE ||k dI/dz + div(I grad(phi))|| / ||k dI/dz|| для восстановленной фазы
+        :param i1: опорная интенсивность (height, width)
+        :param i2: интенсивность в плоскости, смещённой на 2 * dz
+        :param phase: восстановленная фаза (height, width)
+        :return: невязка
+        """
+        ref_intensity = self.prepare(i1)
+        axial_derivative = self.axial_derivative(ref_intensity, self.prepare(i2))
+        return self._residual(ref_intensity, axial_derivative, self.prepare(phase))
+
+    def _residual(self, ref_intensity: np.ndarray, axial_derivative: np.ndarray, phase: np.ndarray) -> float:
+        """ Невязка TIE по подготовленным (отраженным) массивам, считается в исходной части сетки """
+        wave_number = 2 * np.pi / self.wavelenth
+
+        phase_x, phase_y = self._gradient(rfft2(phase, backend=self.fft_backend))
+        div = irfft2(self._divergence(phase_x * ref_intensity, phase_y * ref_intensity), s=self.padded_shape,
+                     backend=self.fft_backend, overwrite_x=True)
+
+        expected = clip(wave_number * axial_derivative, self.boundary_condition)
+        return float(np.linalg.norm(expected + clip(div, self.boundary_condition)) / np.linalg.norm(expected))
+
+    def _gradient(self, spectrum: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Градиент по половине спектра (2 преобразования), спектры компонент - в одном рабочем буфере """
+        buffer = np.multiply(spectrum, self.kx)
+        f_x = irfft2(buffer, s=self.padded_shape, backend=self.fft_backend, overwrite_x=True)
+        np.multiply(spectrum, self.ky, out=buffer)
+        f_y = irfft2(buffer, s=self.padded_shape, backend=self.fft_backend, overwrite_x=True)
+        return f_x, f_y
+
+    def _divergence(self, f_x: np.ndarray, f_y: np.ndarray) -> np.ndarray:
+        """ Половина спектра дивергенции (2 преобразования), f_x и f_y используются как рабочие буферы """
+        spectrum = rfft2(f_x, backend=self.fft_backend, overwrite_x=True)
+        spectrum *= self.kx
+        buffer = rfft2(f_y, backend=self.fft_backend, overwrite_x=True)
+        buffer *= self.ky
+        spectrum += buffer
+        return spectrum
+
+    def get_ilaplacian_filter(self, reg_param: float) -> np.ndarray:
+        """
+        Регуляризованный фильтр обратного Лапласиана для половины спектра (для reg_param решателя - из памяти)
+        :param reg_param: параметр регуляризации
+        :return: фильтр (height, width // 2 + 1) для отраженной сетки
+        """
+        if reg_param == self.reg_param:
+            return self.__ilaplacian
+
+        return self._build_ilaplacian_filter(reg_param)
+
+    def _build_ilaplacian_filter(self, reg_param: float) -> np.ndarray:
+        # Лапласиан - оператор второго порядка, поэтому частоты Найквиста в нем сохраняются
+        kx, ky = grid_registry.rfrequency_coefs(*self.padded_shape, self.pixel_size, self.precision, nyquist=True)
+        return ilaplacian_filter(kx, ky, reg_param)
 
     def get_frequency_coefs(self) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Расчет частотных коэффициентов
+        Расчет частотных коэффициентов для половины спектра (rfft2)
         :return:
         """
-        area = CoordinateGrid(*self.ref_intensity.shape, self.pixel_size)
-        nu_y_grid, nu_x_grid = area.grid
+        # коэффициенты разделяются между решателями с той же сеткой (частотная сетка сдвинута высокими частотами к краям)
+        return grid_registry.rfrequency_coefs(*self.padded_shape, self.pixel_size, self.precision)
 
-        kx = 1j * 2 * np.pi * fftshift(nu_x_grid)
-        ky = 1j * 2 * np.pi * fftshift(nu_y_grid)
-
-        return kx, ky
+    @property
+    def padded_shape(self) -> Tuple[int, int]:
+        """
+        Размер интенсивностей после отражения по граничным условиям
+        """
+        return padded_shape(self.shape, self.boundary_condition)
 
     @property
     def pixel_size(self):
         return self.__pixel_size
 
+    @property
+    def reg_param(self) -> float:
+        return self.__reg_param
+
+    @property
+    def fft_backend(self):
+        return self.__fft_backend
+
     @property
     def kx(self):
         return self.__kx
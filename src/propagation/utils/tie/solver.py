@@ -1,67 +1,175 @@
 import numpy as np
 
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import List, Optional, Sequence, Tuple, Union
 from src.propagation.presenter.loader.loader import load_files
 from src.propagation.utils.tie.boundary_conditions import BoundaryConditions, apply_volkov_scheme
-from src.propagation.utils.math.derivative.finite_difference import central_2point
+from src.propagation.utils.math.derivative.finite_difference import central_2point, polyfit_weights
+from src.propagation.utils.math.precision import Precision, get_precision
 
 
 class TIESolver(ABC):
     """
-    Абстрактный класс для решения TIE
+    Абстрактный класс для решения TIE.
+    Решатель привязан к размеру интенсивностей, шагу, длине волны и граничным условиям, поэтому всё, что зависит
+    только от них, рассчитывается один раз в конструкторе, а пары интенсивностей передаются в solve
     """
 
-    def __init__(self, paths: List[str], dz: float, wavelength: Union[float, None], bc: BoundaryConditions):
+    def __init__(self, shape: Tuple[int, int], dz: float, wavelength: Union[float, None], bc: BoundaryConditions,
+                 precision: Union[Precision, str, None] = None):
         """
-        :param paths: список с путям к файлам интенсивностей
+        :param shape: размер матриц интенсивностей (height, width)
         :param dz: шаг, м
         :param wavelength: длина волны когерентного излучения, м (None для частично-когерентного случая)
         :param bc: граничные условия
+        :param precision: точность вычислений (по умолчанию глобальная)
         """
-
-        if len(paths) > 2:
-            raise NotImplementedError(f'Expect 2 intensities, instead got {len(paths)}')
-
-        self.__intensities = load_files(paths)
-        self.__intensities = [apply_volkov_scheme(i, bc) for i in self.__intensities]
+        self.__shape = tuple(shape)
+        self.__precision = get_precision(precision)
 
         self.__dz = dz
         self.__wavelenth = wavelength
         self.__boundary_condition = bc
 
-        self.__axial_derivative = central_2point(*self.__intensities, dz)
+    @abstractmethod
+    def solve(self, i1: np.ndarray, i2: np.ndarray, threshold: float) -> np.ndarray:
+        """
+        :param i1: опорная интенсивность (height, width)
+        :param i2: интенсивность в плоскости, смещённой на 2 * dz
+        :param threshold:
+        :return: unwrapped phase
+        """
+        pass
 
     @abstractmethod
-    def solve(self, threshold) -> np.ndarray:
+    def solve_derivative(self, intensity: np.ndarray, axial_derivative: np.ndarray, threshold: float) -> np.ndarray:
         """
+        Решает TIE по готовой продольной производной интенсивности
+        :param intensity: опорная интенсивность (height, width) либо стопка (..., height, width)
+        :param axial_derivative: dI/dz того же размера
         :param threshold:
         :return: unwrapped phase
         """
         pass
 
-    def add_threshold(self, threshold: float):
+    def solve_planes(self, intensities: np.ndarray, z: Sequence[float], threshold: float,
+                     z0: Optional[float] = None, degree: Optional[int] = None) -> np.ndarray:
+        """
+        Решает TIE по серии из N >= 2 интенсивностей (шаг по z может быть неравномерным). Опорная интенсивность и dI/dz
+        в плоскости z0 оцениваются за один проход по серии попиксельной полиномиальной аппроксимацией по z
+        (finite_difference.polyfit_weights): при степени ниже N - 1 дополнительные плоскости подавляют шум.
+        По умолчанию фаза восстанавливается, как и в solve, в первой плоскости серии: для пары плоскостей
+        (z[0], z[0] + 2 * dz) результат совпадает с solve(i1, i2)
+        :param intensities: серия интенсивностей (N, height, width)
+        :param z: координаты плоскостей серии, м (N,), попарно различные
+        :param threshold:
+        :param z0: плоскость восстановления фазы, м (по умолчанию z[0])
+        :param degree: степень полинома (по умолчанию N - 1: интерполяционные конечные разности)
+        :return: unwrapped phase
+        """
+        intensities = self.cast(np.asarray(intensities))
+        z = np.asarray(z, dtype=np.float64)
+
+        if intensities.ndim != 3 or intensities.shape[0] != z.size:
+            raise ValueError(f'Expect (N, height, width) stack for {z.size} planes, instead got {intensities.shape}')
+
+        z0 = z[0] if z0 is None else z0
+        weights = polyfit_weights(z, z0, degree)[:2].astype(intensities.dtype)
+
+        intensity, axial_derivative = np.tensordot(weights, intensities, axes=1)
+        return self.solve_derivative(intensity, axial_derivative, threshold)
+
+    def solve_files(self, paths: List[str], threshold: float, z: Optional[Sequence[float]] = None) -> np.ndarray:
+        """
+        Загружает интенсивности из файлов и решает TIE: пару (solve) либо серию из N плоскостей (solve_planes)
+        :param paths: список с путям к файлам интенсивностей
+        :param threshold:
+        :param z: координаты плоскостей, м (обязательны для N > 2 интенсивностей)
+        :return: unwrapped phase
+        """
+        intensities = load_files(paths, dtype=self.precision.real_dtype)
+
+        if z is not None:
+            return self.solve_planes(np.stack(intensities), z, threshold)
+
+        if len(paths) != 2:
+            raise ValueError(f'Expect 2 intensities or plane coordinates z, instead got {len(paths)} intensities')
+
+        return self.solve(*intensities, threshold)
+
+    def solve_batch(self, intensities: np.ndarray, threshold: float, pairs: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Решает TIE для стопки пар интенсивностей одним вызовом: все спектральные операции выполняются пакетными
+        преобразованиями по двум последним осям, фильтры решателя общие для всех пар
+        :param intensities: стопка пар (P, 2, height, width) либо, при заданных pairs, серия интенсивностей
+        по z (Z, height, width)
+        :param threshold: порог для деления на опорную интенсивность
+        :param pairs: номера интенсивностей серии в парах (P, 2): (опорная, смещённая на 2 * dz)
+        :return: фазы (P, height, width)
+        """
+        intensities = np.asarray(intensities)
+
+        if pairs is None:
+            if intensities.ndim != 4 or intensities.shape[1] != 2:
+                raise ValueError(f'Expect (P, 2, height, width) stack, instead got {intensities.shape}')
+            i1, i2 = intensities[:, 0], intensities[:, 1]
+        else:
+            pairs = np.asarray(pairs)
+            i1, i2 = intensities[pairs[:, 0]], intensities[pairs[:, 1]]
+
+        return self.solve(i1, i2, threshold)
+
+    def cast(self, intensity: np.ndarray) -> np.ndarray:
+        """
+        Проверяет размер интенсивности и приводит её к точности решателя
+        :param intensity: матрица интенсивности (height, width) либо стопка матриц (..., height, width)
+        :return: матрица в точности решателя (может быть самим intensity)
         """
-        Пороговая обработка
+        if intensity.shape[-2:] != self.shape:
+            raise ValueError(f'Intensity shape must be (..., {self.shape[0]}, {self.shape[1]}), '
+                             f'instead got {intensity.shape}')
+
+        return intensity.astype(self.precision.real_dtype, copy=False)
+
+    def prepare(self, intensity: np.ndarray) -> np.ndarray:
+        """
+        Приводит интенсивность к точности решателя и отражает её по граничным условиям (схема Волкова)
+        :param intensity: матрица интенсивности (height, width) либо стопка матриц (..., height, width)
+        :return: подготовленная матрица (без отражения может быть самим intensity)
+        """
+        return apply_volkov_scheme(self.cast(intensity), self.boundary_condition)
+
+    def axial_derivative(self, i1: np.ndarray, i2: np.ndarray) -> np.ndarray:
+        """
+        Продольная производная интенсивности по подготовленной паре интенсивностей
+        """
+        return central_2point(i1, i2, self.dz)
+
+    def add_threshold(self, intensity: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Пороговая обработка без изменения intensity
+        :param intensity: опорная интенсивность
         :param threshold:
-        :return: Бинарная маска
+        :return: (копия интенсивности, в которой значения ниже порога заменены порогом; бинарная маска)
         """
-        if threshold == 0. or 0.0 in self.ref_intensity:
+        if threshold == 0. or 0.0 in intensity:
             raise ValueError(f'Нельзя делить на нулевые значения в интенсивности.')
 
-        mask = self.ref_intensity < threshold
+        mask = intensity < threshold
+        return np.where(mask, intensity.dtype.type(threshold), intensity), mask
 
-        # intensity = self.ref_intensity.copy()  # todo этот менто изменяет опорную интенсивность!!!
-        self.ref_intensity[mask] = threshold
-        return mask
+    def _scale(self, ref_intensity: np.ndarray, threshold: float) -> np.ndarray:
+        """ Множитель -k / I с пороговой обработкой опорной интенсивности (нули вне порога) """
+        wave_number = 2 * np.pi / self.wavelenth
 
-    @property
-    def intensities(self):
-        return self.__intensities
+        intensity, mask = self.add_threshold(ref_intensity, threshold)
+        scale = np.divide(-wave_number, intensity, out=intensity)
+        scale[mask] = 0
+        return scale
 
     @property
-    def ref_intensity(self):
-        return self.__intensities[0]
+    def shape(self) -> Tuple[int, int]:
+        return self.__shape
 
     @property
     def dz(self):
@@ -72,8 +180,8 @@ class TIESolver(ABC):
         return self.__wavelenth
 
     @property
-    def axial_derivative(self):
-        return self.__axial_derivative
+    def precision(self) -> Precision:
+        return self.__precision
 
     @property
     def boundary_condition(self):
@@ -1,9 +1,8 @@
 from icecream import ic
 
 from src.propagation.model.areas.aperture import Aperture
-from src.propagation.model.areas.grid import CartesianGrid, FrequencyGrid
-from src.propagation.model.areas.grid import PolarGrid
-from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves.wave_batch import WaveBatch
 from src.propagation.presenter.interface.wave_plotter import WavePlotter
 from src.propagation.presenter.saver.saver import Saver
 from src.propagation.utils.math import units
@@ -28,39 +27,39 @@ step = units.mm2m(25)
 distances = np.arange(start, stop + step, step)
 
 # матрица в квадратичных координатах
-square_area_1 = CartesianGrid(height, width, pixel_size=px_size)
-radial_area_1 = PolarGrid(square_area_1)
-freq_grid = FrequencyGrid(square_area_1)
+square_area_1 = grid_registry.cartesian(height, width, px_size)
+radial_area_1 = grid_registry.polar(height, width, px_size)
+freq_grid = grid_registry.frequency(height, width, px_size)
 
-for focal_len in focal_lens:
-    for gaussian_width_param in gaussian_width_params:
+# набор волн из всех сочетаний фокусных расстояний и ширин гауссоид
+waves = WaveBatch.from_parameters(square_area_1, focal_lens, gaussian_width_params, wavelength)
 
-        # конфигурация
-        folder_name = \
-            f'z_{units.m2mm(start)}-{units.m2mm(stop)}-{units.m2mm(step)} ' \
-            f'f_{units.m2mm(focal_len)} ' \
-            f'w_{gaussian_width_param} ' \
-            f'{width}x{height}'
-        saver = Saver(folder_name)
+# конфигурация для каждой волны набора
+savers = [Saver(f'z_{units.m2mm(start)}-{units.m2mm(stop)}-{units.m2mm(step)} '
+                f'f_{units.m2mm(focal_len)} '
+                f'w_{gaussian_width_param} '
+                f'{width}x{height}')
+          for focal_len, gaussian_width_param in zip(waves.focal_lens, waves.gaussian_width_params)]
 
-        for z in distances:
-            # создание сферической волны
-            field = SphericalWave(square_area_1, focal_len, gaussian_width_param, wavelength)
+# распространение всего набора сразу на все дистанции, U(z=0) и Фурье-образы рассчитываются один раз
+planes = waves.propagate_to_distances(distances, frequency_grid=freq_grid)
 
-            # распространение волны на дистанцию z
-            field.propagate_on_distance(z, frequency_grid=freq_grid)
-            # todo мы теряем U(z=0) и на каждой итерации цикла приходится генерить её заново
+for z, plane in zip(distances, planes):
+    waves.field = plane
 
-            # определение апертуры для поиска радиуса волнового фронта
-            aperture = Aperture(radial_area_1, widest_diameter(field.intensity, thresholds[t_num]))
+    for index, saver in enumerate(savers):
+        field = waves.member(index)
 
-            # радиус волнового фронта просто для вывода
-            r = field.get_wavefront_radius(aperture=aperture, z=z)
-            ic(z, r)
+        # определение апертуры для поиска радиуса волнового фронта
+        aperture = Aperture(radial_area_1, widest_diameter(field.intensity, thresholds[t_num]))
 
-            # построение графиков для снапшотов
-            WavePlotter.write_r_z(r, z, saver)
-            WavePlotter.save_phase(field, aperture, z, saver, save_npy=True)
-            WavePlotter.save_intensity(field, z, saver, save_npy=True)
+        # радиус волнового фронта просто для вывода
+        r = field.get_wavefront_radius(aperture=aperture, z=z)
+        ic(z, r)
 
-        ic()
+        # построение графиков для снапшотов
+        WavePlotter.write_r_z(r, z, saver)
+        WavePlotter.save_phase(field, aperture, z, saver, save_npy=True)
+        WavePlotter.save_intensity(field, z, saver, save_npy=True)
+
+ic()
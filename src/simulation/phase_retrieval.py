@@ -3,6 +3,7 @@ import numpy as np
 
 from icecream import ic
 from src.propagation.utils.math import units
+from src.propagation.presenter.loader.loader import load_files
 from src.propagation.presenter.saver.saver import Saver
 from src.propagation.utils.tie import FFTSolver, BoundaryConditions
 
@@ -41,17 +42,20 @@ for focal_len in focal_lens:
             filepath = os.path.join(os.getcwd(), os.path.pardir, os.path.pardir,
                                     'data', folder_name, 'intensity npy')
 
+            # решатель и его фильтры создаются один раз для всех пар интенсивностей
+            solver = FFTSolver((height, width), dz, wavelength, px_size, bc)
+
             # Создание сеток
             z2_start, z2_stop = z1_start + dz, z1_stop + dz
             z1_list = [current_z for current_z in np.arange(z1_start, z1_stop, z_shift)]
             z2_list = [current_z for current_z in np.arange(z2_start, z2_stop, z_shift)]
 
-            for z1, z2 in zip(z1_list, z2_list):
-                fn1 = os.path.join(filepath, f'z_{z1:.3f}mm.npy')
-                fn2 = os.path.join(filepath, f'z_{z2:.3f}mm.npy')
-                paths = [fn1, fn2]
+            # каждая плоскость серии загружается один раз, все пары решаются одним пакетным вызовом
+            z_list = sorted(set(z1_list) | set(z2_list))
+            paths = [os.path.join(filepath, f'z_{z:.3f}mm.npy') for z in z_list]
+            intensities = np.stack(load_files(paths, dtype=solver.precision.real_dtype))
+            pairs = np.array([[z_list.index(z1), z_list.index(z2)] for z1, z2 in zip(z1_list, z2_list)])
 
-                solver = FFTSolver(paths, dz, wavelength, px_size, bc)
-                unwrapped_phase = solver.solve(threshold)
-                pass
+            unwrapped_phases = solver.solve_batch(intensities, threshold, pairs=pairs)
+            pass
 
@@ -0,0 +1,68 @@
+from icecream import ic
+
+from src.propagation.model.areas.aperture import Aperture
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.utils.math import units
+from src.propagation.utils.math.general import *
+from src.propagation.utils.math.precision import Precision
+from src.propagation.utils.tie import FFTSolver, BoundaryConditions
+
+# Сравнение вычислений в одинарной (float32/complex64) и двойной (float64/complex128) точности:
+# радиус волнового фронта R(z) и фаза, восстановленная из TIE
+
+# основные параметры для синтеза волны
+width, height = 512, 512
+wavelength = units.nm2m(632.8)
+px_size = units.um2m(5.04)
+gaussian_width_param = 250
+focal_len = units.mm2m(100)
+threshold = np.exp(-2)
+
+# параметры для итерации при рапространении волны
+distances = np.arange(units.mm2m(0), units.mm2m(200) + units.mm2m(25), units.mm2m(25))
+
+# параметры TIE
+z_tie = units.mm2m(50)
+dz = units.mm2m(1)
+
+
+def propagate(precision: Precision):
+    """ Возвращает радиусы волнового фронта и пару интенсивностей для TIE при заданной точности """
+    cart_grid = grid_registry.cartesian(height, width, px_size, precision)
+    polar_grid = grid_registry.polar(height, width, px_size, precision)
+    freq_grid = grid_registry.frequency(height, width, px_size, precision)
+
+    wave = SphericalWave(cart_grid, focal_len, gaussian_width_param, wavelength)
+
+    radii = []
+    for z, plane in zip(distances, wave.propagate_to_distances(distances, frequency_grid=freq_grid)):
+        wave.field = plane
+        aperture = Aperture(polar_grid, widest_diameter(wave.intensity, threshold))
+        radii.append(wave.get_wavefront_radius(aperture=aperture, z=z))
+
+    intensities = [np.abs(plane) ** 2 for plane in
+                   wave.propagate_to_distances([z_tie, z_tie + dz], frequency_grid=freq_grid)]
+
+    return np.array(radii), intensities, wave.field.dtype
+
+
+def retrieve_phase(intensities, precision: Precision):
+    """ Восстанавливает фазу из пары интенсивностей при заданной точности """
+    solver = FFTSolver(intensities[0].shape, dz, wavelength, px_size, BoundaryConditions.NONE, precision=precision)
+    return solver.solve(*intensities, threshold)
+
+
+radii_double, intensities_double, dtype_double = propagate(Precision.DOUBLE)
+radii_single, intensities_single, dtype_single = propagate(Precision.SINGLE)
+ic(dtype_double, dtype_single)
+
+# R(z), мм
+for z, r_double, r_single in zip(distances, radii_double, radii_single):
+    ic(units.m2mm(z), r_double, r_single, np.abs(r_single - r_double) / r_double)
+
+# восстановленная фаза, рад
+phase_double = retrieve_phase(intensities_double, Precision.DOUBLE)
+phase_single = retrieve_phase(intensities_single, Precision.SINGLE)
+mask = intensities_double[0] >= threshold * intensities_double[0].max()
+ic(phase_single.dtype, np.ptp(phase_double[mask]), np.max(np.abs(phase_single - phase_double)[mask]))
@@ -0,0 +1,45 @@
+import time
+
+from icecream import ic
+
+from src.propagation.model.areas.aperture import Aperture
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.utils.math import units
+from src.propagation.utils.math.general import *
+
+# Сравнение радиусов волнового фронта R(z), найденных по стрелке прогиба развернутой фазы
+# и аппроксимацией квадратичного члена фазы без разворачивания (МНК по разностям фаз соседних отсчетов)
+
+# основные параметры для синтеза волны
+width, height = 512, 512
+wavelength = units.nm2m(632.8)
+px_size = units.um2m(5.04)
+gaussian_width_param = 250
+focal_len = units.mm2m(100)
+threshold = np.exp(-2)
+
+# параметры для итерации при рапространении волны
+distances = np.arange(units.mm2m(0), units.mm2m(200) + units.mm2m(25), units.mm2m(25))
+
+cart_grid = grid_registry.cartesian(height, width, px_size)
+polar_grid = grid_registry.polar(height, width, px_size)
+freq_grid = grid_registry.frequency(height, width, px_size)
+
+wave = SphericalWave(cart_grid, focal_len, gaussian_width_param, wavelength)
+
+for z, plane in zip(distances, wave.propagate_to_distances(distances, frequency_grid=freq_grid)):
+    wave.field = plane
+    aperture = Aperture(polar_grid, widest_diameter(wave.intensity, threshold))
+
+    # МНК считается первым, на исходной (не модифицированной) апертуре
+    start = time.perf_counter()
+    r_lsq = wave.get_wavefront_radius_lsq(aperture=aperture)
+    time_lsq = time.perf_counter() - start
+
+    start = time.perf_counter()
+    r_sagitta = wave.get_wavefront_radius(aperture=aperture, z=z)
+    time_sagitta = time.perf_counter() - start
+
+    # радиус МНК знаковый (отрицательный до фокуса), по стрелке прогиба - модуль радиуса
+    ic(units.m2mm(z), r_sagitta, r_lsq, np.abs(np.abs(r_lsq) - r_sagitta) / r_sagitta, time_sagitta, time_lsq)
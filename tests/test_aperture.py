@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.propagation.model.areas.aperture import Aperture
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.utils.math.general import get_slice, widest_diameter
+from src.propagation.utils.math.units import px2m
+
+SIZE = 256
+PX_SIZE = 5.04e-6
+WAVELENGTH = 632.8e-9
+
+
+def loop_modified_diameter(aperture: Aperture, wave: SphericalWave, z: float) -> int:
+    """ Модифицированный диаметр апертуры [px], рассчитанный исходным поэлементным циклом Aperture.modify """
+    wrp_phase_values = get_slice(wave.phase, wave.phase.shape[0] // 2)[1]
+    ap_values = get_slice(aperture.aperture_view, aperture.aperture_view.shape[0] // 2)[1]
+    height = wave.grid.height
+
+    jump = next((i for i, v in enumerate(ap_values) if v == 1), None)
+    lwrp = next((i for i in range(jump, 0, -1) if (wrp_phase_values[i] > 0) and (wrp_phase_values[i - 1] < 0)), 1)
+    rwrp = next((i for i in range(jump, height, 1) if (wrp_phase_values[i] > 0) and (wrp_phase_values[i - 1] < 0)), 1)
+    jump = rwrp if lwrp - jump > rwrp - jump else lwrp
+
+    new_aperture_diameter = (height // 2 - jump) * 2
+    new_aperture_diameter += 2 if z < wave.focal_len else 0
+    return new_aperture_diameter
+
+
+def make_wave(focal_len: float, z: float) -> SphericalWave:
+    wave = SphericalWave(grid_registry.cartesian(SIZE, SIZE, PX_SIZE), focal_len, 200, WAVELENGTH)
+    wave.propagate_on_distance(z, frequency_grid=grid_registry.frequency(SIZE, SIZE, PX_SIZE))
+    return wave
+
+
+@pytest.mark.parametrize('focal_len, z', [(0.1, 0.), (0.1, 0.02), (0.1, 0.1), (0.1, 0.15), (0.05, 0.03), (0.5, 0.2)])
+@pytest.mark.parametrize('scale', [0.5, 1., 1.5])
+def test_modify_matches_loop(focal_len, z, scale):
+    wave = make_wave(focal_len, z)
+    polar_grid = grid_registry.polar(SIZE, SIZE, PX_SIZE)
+    aperture = Aperture(polar_grid, scale * widest_diameter(wave.intensity, np.exp(-2)))
+
+    expected = loop_modified_diameter(aperture, wave, z)
+    aperture.modify(wave, z)
+
+    assert aperture.aperture_diameter == px2m(expected, px_size_m=PX_SIZE)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('diameter', [4, 60, 200, 254])
+def test_modify_matches_loop_on_random_phase(seed, diameter):
+    # случайная фаза: переходы через ноль в произвольных местах строки, в том числе их отсутствие с одной стороны
+    rng = np.random.default_rng(seed)
+    phase = np.cumsum(rng.uniform(-1.5, 1.5, (SIZE, SIZE)), axis=1)
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    wave = SphericalWave(grid, 0.1, 200, WAVELENGTH, field=np.exp(1j * phase))
+
+    aperture = Aperture(grid_registry.polar(SIZE, SIZE, PX_SIZE), diameter)
+    expected = loop_modified_diameter(aperture, wave, 0.05)
+    aperture.modify(wave, 0.05)
+
+    assert aperture.aperture_diameter == px2m(expected, px_size_m=PX_SIZE)
+
+
+def test_modify_rejects_aperture_missing_centre_row():
+    wave = make_wave(0.1, 0.)
+
+    # пустая апертура не пересекает центральную строку (исходный цикл падал на range(None, ...) с TypeError)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aperture = Aperture(grid_registry.polar(SIZE, SIZE, PX_SIZE), 0)
+    assert not np.any(aperture.aperture_view)
+
+    with pytest.raises(TypeError):
+        loop_modified_diameter(aperture, wave, 0.)
+    with pytest.raises(ValueError):
+        aperture.modify(wave, 0.)
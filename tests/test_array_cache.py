@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.utils.math.array_cache import ArrayCache
+from src.propagation.utils.optic.propagation_methods import angular_spectrum_transfer_function
+from src.propagation.utils.optic.transfer_function_cache import TransferFunctionCache
+
+# размер одного массива кэша [байт]
+NBYTES = 100 * np.dtype(np.float64).itemsize
+
+
+def build(value):
+    return lambda: np.full(100, value, dtype=np.float64)
+
+
+@pytest.mark.parametrize('cache_type', [ArrayCache, TransferFunctionCache])
+def test_least_recently_used_arrays_are_evicted(cache_type):
+    cache = cache_type(max_bytes=3 * NBYTES)
+
+    for key in 'abc':
+        cache.get(key, build(key == 'a'))
+        assert cache.nbytes <= cache.max_bytes
+    assert cache.nbytes == 3 * NBYTES
+
+    # обращение к 'a' делает его последним использованным, поэтому вытесняется 'b', затем 'c'
+    cache.get('a', build(-1))
+    evicted = []
+    for key in 'de':
+        stored = [k for k in 'abc' if k in cache]
+        cache.get(key, build(0))
+        evicted.extend(k for k in stored if k not in cache)
+        assert cache.nbytes <= cache.max_bytes
+
+    assert evicted == ['b', 'c']
+    assert [key in cache for key in 'abcde'] == [True, False, False, True, True]
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries, info.nbytes, info.max_bytes) == (1, 5, 3, 3 * NBYTES, 3 * NBYTES)
+
+    # сохраненный массив возвращается без пересчета и доступен только для чтения
+    array = cache.get('a', build(-1))
+    np.testing.assert_array_equal(array, 1.)
+    assert not array.flags.writeable
+
+
+def test_shrinking_budget_evicts_oldest_arrays():
+    cache = ArrayCache(max_bytes=4 * NBYTES)
+    for key in 'abcd':
+        cache.get(key, build(0))
+
+    cache.max_bytes = 2 * NBYTES
+    assert [key in cache for key in 'abcd'] == [False, False, True, True]
+    assert cache.nbytes == 2 * NBYTES
+
+    # массив больше всего бюджета возвращается, но не кэшируется и ничего не вытесняет
+    large = cache.get('large', lambda: np.zeros(300))
+    assert large.nbytes > cache.max_bytes
+    assert 'large' not in cache and len(cache) == 2
+
+    cache.clear()
+    assert cache.cache_info() == (0, 0, 0, 0, 2 * NBYTES)
+
+
+def test_transfer_functions_stay_within_budget():
+    frequency_grid = grid_registry.frequency(64, 64, 5.04e-6)
+    nbytes = angular_spectrum_transfer_function(frequency_grid, 632.8e-9, 0.01, cache=None).nbytes
+    cache = TransferFunctionCache(max_bytes=int(2.5 * nbytes))
+
+    distances = [0.01, 0.02, 0.03, 0.04]
+    for z in distances:
+        angular_spectrum_transfer_function(frequency_grid, 632.8e-9, z, cache=cache)
+        assert cache.nbytes <= cache.max_bytes
+
+    assert len(cache) == 2 and cache.nbytes == 2 * nbytes
+    assert cache.misses == len(distances)
+
+    # последние две дистанции - попадания, первая - пересчет
+    angular_spectrum_transfer_function(frequency_grid, 632.8e-9, 0.04, cache=cache)
+    angular_spectrum_transfer_function(frequency_grid, 632.8e-9, 0.03, cache=cache)
+    assert cache.hits == 2
+    angular_spectrum_transfer_function(frequency_grid, 632.8e-9, 0.01, cache=cache)
+    assert cache.misses == len(distances) + 1
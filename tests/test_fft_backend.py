@@ -0,0 +1,138 @@
+import os
+import pickle
+from importlib.util import find_spec
+
+import numpy as np
+import pytest
+
+from src.propagation.utils.math import fft_backend
+from src.propagation.utils.math.fft_backend import PyFFTWBackend, create_backend, get_backend
+
+
+def backend_params():
+    """ Реализации FFT для параметризации: pyfftw пропускается, если он не установлен """
+    pyfftw_mark = pytest.mark.skipif(find_spec('pyfftw') is None, reason='pyfftw не установлен')
+    return ['numpy', 'scipy', pytest.param('pyfftw', marks=pyfftw_mark)]
+
+
+def random_field(shape=(3, 32, 48), dtype=np.complex128):
+    rng = np.random.default_rng(0)
+    field = rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+    return field.astype(dtype)
+
+
+@pytest.mark.parametrize('backend', backend_params())
+@pytest.mark.parametrize('dtype, rtol', [(np.complex128, 1e-12), (np.complex64, 1e-5)])
+@pytest.mark.parametrize('norm', [None, 'ortho'])
+def test_complex_transforms_match_numpy(backend, dtype, rtol, norm):
+    x = random_field(dtype=dtype)
+    backend = create_backend(backend)
+    scale = np.max(np.abs(np.fft.fft2(x, norm=norm)))
+
+    for transform, reference in ((backend.fft2, np.fft.fft2), (backend.ifft2, np.fft.ifft2)):
+        result = transform(x, norm=norm)
+        assert result.dtype == dtype
+        np.testing.assert_allclose(result, reference(x, norm=norm), atol=rtol * scale)
+
+    # другие оси и повторный вызов (план из кэша)
+    np.testing.assert_allclose(backend.fft2(x, axes=(0, 2)), np.fft.fft2(x, axes=(0, 2)), atol=rtol * scale * 2)
+    np.testing.assert_allclose(backend.fft2(x, norm=norm), np.fft.fft2(x, norm=norm), atol=rtol * scale)
+
+
+@pytest.mark.parametrize('backend', backend_params())
+@pytest.mark.parametrize('dtype, rtol', [(np.float64, 1e-12), (np.float32, 1e-5)])
+@pytest.mark.parametrize('shape', [(32, 48), (31, 47)])
+def test_real_transforms_match_numpy(backend, dtype, rtol, shape):
+    x = random_field(shape).real.astype(dtype)
+    backend = create_backend(backend)
+
+    spectrum = backend.rfft2(x)
+    reference = np.fft.rfft2(x)
+    assert spectrum.dtype == np.result_type(dtype, np.complex64)
+    np.testing.assert_allclose(spectrum, reference, atol=rtol * np.max(np.abs(reference)))
+
+    # обратное преобразование нечетного размера требует s; вход не должен меняться без overwrite_x
+    copy = spectrum.copy()
+    restored = backend.irfft2(spectrum, s=shape)
+    np.testing.assert_array_equal(spectrum, copy)
+    assert restored.dtype == dtype
+    np.testing.assert_allclose(restored, np.fft.irfft2(reference, s=shape), atol=rtol * np.max(np.abs(x)))
+
+
+@pytest.mark.parametrize('backend', backend_params())
+def test_overwrite_x_returns_same_result(backend):
+    backend = create_backend(backend)
+    x = random_field()
+    expected = np.fft.ifft2(np.fft.fft2(x))
+
+    spectrum = backend.fft2(x.copy(), overwrite_x=True)
+    result = backend.ifft2(spectrum, overwrite_x=True)
+    np.testing.assert_allclose(result, expected, atol=1e-12)
+
+    real = x.real.copy()
+    restored = backend.irfft2(backend.rfft2(real.copy(), overwrite_x=True), s=real.shape[-2:], overwrite_x=True)
+    np.testing.assert_allclose(restored, real, atol=1e-12)
+
+
+def test_pyfftw_caches_plans_and_writes_result_into_input():
+    pytest.importorskip('pyfftw')
+    backend = PyFFTWBackend(threads=1, planner_effort='FFTW_ESTIMATE')
+    x = random_field()
+
+    first = backend.fft2(x)
+    second = backend.fft2(x)
+    assert backend.plans_number == 1
+
+    # результат не разделяет память с выходным массивом плана
+    assert first is not second and not np.shares_memory(first, second)
+    np.testing.assert_array_equal(first, second)
+
+    # overwrite_x: отдельный план, результат записывается в сам вход
+    buffer = x.copy()
+    assert backend.fft2(buffer, overwrite_x=True) is buffer
+    np.testing.assert_allclose(buffer, first, rtol=1e-12)
+    assert backend.plans_number == 2
+
+    backend.clear_plans()
+    assert backend.plans_number == 0
+
+
+def test_pyfftw_wisdom_is_saved_once(tmp_path, monkeypatch):
+    pytest.importorskip('pyfftw')
+    exit_handlers = []
+    monkeypatch.setattr(fft_backend.atexit, 'register', exit_handlers.append)
+
+    wisdom_path = str(tmp_path / 'wisdom.pickle')
+    backend = PyFFTWBackend(threads=1, planner_effort='FFTW_ESTIMATE', wisdom_path=wisdom_path)
+    assert len(exit_handlers) == 1
+
+    # новые планы не перезаписывают файл
+    backend.fft2(random_field())
+    backend.ifft2(random_field())
+    assert not os.path.exists(wisdom_path)
+
+    # сохранение при завершении процесса
+    exit_handlers[0]()
+    with open(wisdom_path, 'rb') as file:
+        assert isinstance(pickle.load(file), tuple)
+
+    # без новых планов файл при завершении не переписывается
+    os.remove(wisdom_path)
+    backend.fft2(random_field())
+    exit_handlers[0]()
+    assert not os.path.exists(wisdom_path)
+
+    # явное сохранение; новый экземпляр загружает wisdom
+    backend.rfft2(random_field().real)
+    backend.save_wisdom()
+    assert os.path.exists(wisdom_path)
+    PyFFTWBackend(threads=1, planner_effort='FFTW_ESTIMATE', wisdom_path=wisdom_path)
+    assert len(exit_handlers) == 2
+
+
+def test_backends_requested_by_name_are_reused():
+    assert get_backend('scipy') is get_backend('scipy')
+    assert get_backend(None) is fft_backend.get_backend()
+
+    with pytest.raises(ValueError):
+        create_backend('fftpack')
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from numpy.fft import fftshift
+
+from src.propagation.model.areas.grid import CartesianGrid, FrequencyGrid, PolarGrid
+from src.propagation.model.areas.grid_registry import GridRegistry, grid_registry
+from src.propagation.utils.math.precision import Precision
+
+PX_SIZE = 5.04e-6
+
+
+def mgrid_cartesian(height, width, pixel_size, dtype):
+    """ Плотная сетка в том виде, в котором её хранила CartesianGrid до перехода на одномерные оси """
+    return np.meshgrid(np.arange(-height / 2, height / 2, dtype=dtype) * pixel_size,
+                       np.arange(-width / 2, width / 2, dtype=dtype) * pixel_size, indexing='ij')
+
+
+@pytest.mark.parametrize('height, width', [(64, 64), (48, 80), (33, 17)])
+@pytest.mark.parametrize('precision', ['double', 'single'])
+def test_open_grid_broadcasts_to_mgrid(height, width, precision):
+    grid = CartesianGrid(height, width, PX_SIZE, precision)
+    y_mgrid, x_mgrid = mgrid_cartesian(height, width, PX_SIZE, grid.dtype)
+
+    y_grid, x_grid = grid.grid
+    assert y_grid.shape == (height, 1) and x_grid.shape == (1, width)
+    assert y_grid.dtype == x_grid.dtype == grid.dtype
+
+    np.testing.assert_allclose(np.broadcast_to(y_grid, (height, width)), y_mgrid, rtol=1e-6)
+    np.testing.assert_allclose(np.broadcast_to(x_grid, (height, width)), x_mgrid, rtol=1e-6)
+    for dense, expected in zip(grid.dense_grid, (y_mgrid, x_mgrid)):
+        np.testing.assert_allclose(dense, expected, rtol=1e-6)
+
+    # полярная и частотная сетки по прежним формулам
+    np.testing.assert_allclose(PolarGrid(grid).grid, np.sqrt(y_mgrid ** 2 + x_mgrid ** 2), rtol=1e-6)
+
+    nu_y_grid, nu_x_grid = FrequencyGrid(grid).grid
+    np.testing.assert_allclose(np.broadcast_to(nu_y_grid, (height, width)),
+                               fftshift(y_mgrid / PX_SIZE / (height * PX_SIZE)), rtol=1e-6)
+    np.testing.assert_allclose(np.broadcast_to(nu_x_grid, (height, width)),
+                               fftshift(x_mgrid / PX_SIZE / (width * PX_SIZE)), rtol=1e-6)
+
+
+def test_registry_returns_same_frozen_instances():
+    registry = GridRegistry()
+    grid = registry.cartesian(64, 64, PX_SIZE, 'double')
+
+    # равные параметры (в том числе скаляры numpy и разные записи точности) - тот же экземпляр
+    assert registry.cartesian(np.int64(64), 64, np.float64(PX_SIZE), Precision.DOUBLE) is grid
+    assert registry.polar(64, 64, PX_SIZE, 'double').cart_grid is grid
+    assert registry.frequency(64, 64, PX_SIZE, 'double') is registry.frequency(64, 64, PX_SIZE, 'double')
+    kx, ky = registry.frequency_coefs(64, 64, PX_SIZE, 'double')
+    assert registry.frequency_coefs(64, 64, PX_SIZE, 'double')[0] is kx
+
+    assert registry.cartesian(64, 64, PX_SIZE, 'single') is not grid
+    assert registry.cartesian(64, 32, PX_SIZE, 'double') is not grid
+    assert all(g.frozen for g in (grid, registry.polar(64, 64, PX_SIZE), registry.frequency(64, 64, PX_SIZE)))
+
+    registry.clear()
+    assert len(registry) == 0
+    assert registry.cartesian(64, 64, PX_SIZE, 'double') is not grid
+
+
+def test_registry_evicts_least_recently_used_entries():
+    registry = GridRegistry(maxsize=2)
+    first = registry.cartesian(16, 16, PX_SIZE)
+    second = registry.cartesian(32, 32, PX_SIZE)
+
+    assert registry.cartesian(16, 16, PX_SIZE) is first
+    registry.cartesian(64, 64, PX_SIZE)
+
+    assert len(registry) == 2
+    assert registry.cartesian(16, 16, PX_SIZE) is first
+    assert registry.cartesian(32, 32, PX_SIZE) is not second
+
+
+def test_frozen_grids_reject_writes():
+    grid = grid_registry.cartesian(32, 32, PX_SIZE)
+    polar_grid = grid_registry.polar(32, 32, PX_SIZE)
+
+    for attribute in ('height', 'width', 'pixel_size'):
+        with pytest.raises(AttributeError):
+            setattr(grid, attribute, 1)
+
+    # массивы, в том числе рассчитанные лениво после заморозки, только для чтения
+    arrays = [grid.y_axis, grid.x_axis, *grid.grid, *grid.dense_grid, polar_grid.grid,
+              *grid_registry.frequency(32, 32, PX_SIZE).grid, grid_registry.laplacian_coefs(32, 32, PX_SIZE)]
+    for array in arrays:
+        with pytest.raises(ValueError):
+            array[0, ...] = 0
+
+    assert grid.height == 32 and grid.pixel_size == PX_SIZE
+
+    # незамороженная сетка по-прежнему изменяема
+    grid = CartesianGrid(32, 32, PX_SIZE)
+    grid.pixel_size = 2 * PX_SIZE
+    grid.dense_grid[0][0, 0] = 1.
+    assert not grid.frozen and grid.freeze() is grid and grid.frozen
+    with pytest.raises(AttributeError):
+        grid.pixel_size = PX_SIZE
@@ -0,0 +1,248 @@
+import gc
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.propagation.model.areas.grid import CartesianGrid
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.model.waves.wave_batch import WaveBatch
+from src.propagation.utils.optic.propagation_methods import BandLimitedAngularSpectrum, \
+    angular_spectrum_bl_propagation, angular_spectrum_propagation, angular_spectrum_transfer_function, \
+    fresnel_auto_propagation, fresnel_ir_propagation, fresnel_propagation, matrix_fourier_propagation, \
+    propagation_phase
+from src.propagation.utils.optic.transfer_function_cache import TransferFunctionCache
+
+SIZE = 128
+PX_SIZE = 5.04e-6
+WAVELENGTH = 632.8e-9
+
+
+def make_wave(precision=None) -> SphericalWave:
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE, precision)
+    return SphericalWave(grid, 0.1, 60, WAVELENGTH)
+
+
+def make_beam(size: int = SIZE) -> SphericalWave:
+    # узкий почти коллимированный пучок: на дистанциях порядка N * pixel_size^2 / lambda не выходит за сетку
+    return SphericalWave(grid_registry.cartesian(size, size, PX_SIZE), 1., 20, WAVELENGTH)
+
+
+# дистанция, на которой шаг импульсного отклика Френеля lambda * z / (N * pixel_size) равен шагу сетки
+CRITICAL_DISTANCE = SIZE * PX_SIZE ** 2 / WAVELENGTH
+
+
+@pytest.mark.parametrize('distances', [np.arange(0, 0.225, 0.025), [0.01, 0.03, 0.02, 0.05]])
+def test_propagate_to_distances_matches_angular_spectrum(distances):
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    wave = make_wave()
+    initial_field = wave.field.copy()
+
+    planes = wave.propagate_to_distances(distances, frequency_grid=frequency_grid, stack=True)
+    np.testing.assert_array_equal(wave.field, initial_field)
+
+    for z, plane in zip(distances, planes):
+        reference = make_wave()
+        angular_spectrum_propagation(reference, z, frequency_grid=frequency_grid, cache=TransferFunctionCache())
+
+        error = np.max(np.abs(plane - reference.field)) / np.max(np.abs(reference.field))
+        assert error < 1e-9
+
+
+def test_propagate_to_distances_builds_one_step_for_uniform_distances():
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    cache = TransferFunctionCache()
+
+    # z = 0 не требует передаточной функции, а H(0.025) и H(dz) - один и тот же ключ
+    make_wave().propagate_to_distances(np.arange(0, 0.225, 0.025), frequency_grid=frequency_grid, cache=cache,
+                                       stack=True)
+    assert cache.misses == 1
+
+    # при прямом расчете в каждой плоскости строится H(z) для каждой ненулевой дистанции
+    cache.clear()
+    planes = make_wave().propagate_to_distances(np.arange(0, 0.225, 0.025), frequency_grid=frequency_grid,
+                                                cache=cache, stack=True, reanchor_every=1)
+    assert len(cache) == 8
+    np.testing.assert_array_equal(planes[0], np.fft.ifft2(np.fft.fft2(make_wave().field)))
+
+
+def test_band_limited_propagation_of_wave_batch():
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    batch = WaveBatch(grid, [0.1, 0.2], [60, 40], WAVELENGTH)
+    members = [SphericalWave(grid, f, w, WAVELENGTH) for f, w in [(0.1, 60), (0.2, 40)]]
+
+    batch.propagate_on_distance(0.05, method=angular_spectrum_bl_propagation)
+    assert batch.field.shape == (2, SIZE, SIZE)
+
+    # один экземпляр метода поочередно распространяет отдельные поля и набор
+    propagator = BandLimitedAngularSpectrum(grid, WAVELENGTH)
+    for i, member in enumerate(members):
+        member.propagate_on_distance(0.05, method=propagator)
+        np.testing.assert_allclose(batch.field[i], member.field, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(propagator.propagate(batch.field, 0.), batch.field, rtol=0, atol=1e-12)
+
+
+def test_band_limited_propagation_reuses_propagator(monkeypatch):
+    grid = CartesianGrid(SIZE, SIZE, PX_SIZE)
+    cache = TransferFunctionCache()
+    wave = SphericalWave(grid, 0.1, 60, WAVELENGTH)
+    expected = SphericalWave(grid, 0.1, 60, WAVELENGTH)
+    propagator = BandLimitedAngularSpectrum(grid, WAVELENGTH, cache=None)
+
+    created = []
+    init = BandLimitedAngularSpectrum.__init__
+    monkeypatch.setattr(BandLimitedAngularSpectrum, '__init__',
+                        lambda self, *args, **kwargs: created.append(self) or init(self, *args, **kwargs))
+
+    wave.propagate_on_distance(0.05, method=angular_spectrum_bl_propagation, cache=cache)
+    workspace = created[0]._local.workspace
+    wave.propagate_on_distance(0.05, method=angular_spectrum_bl_propagation, cache=cache)
+
+    # тот же экземпляр и то же рабочее поле; другая длина волны или кэш - другой экземпляр
+    assert len(created) == 1 and created[0]._local.workspace is workspace
+    angular_spectrum_bl_propagation(SphericalWave(grid, 0.1, 60, 2 * WAVELENGTH), 0.05, cache=cache)
+    angular_spectrum_bl_propagation(SphericalWave(grid, 0.1, 60, WAVELENGTH), 0.05, cache=None)
+    assert len(created) == 3
+
+    for _ in range(2):
+        expected.propagate_on_distance(0.05, method=propagator)
+    np.testing.assert_allclose(wave.field, expected.field, atol=1e-12)
+
+    # экземпляры освобождаются вместе с сеткой
+    reference = weakref.ref(created[0])
+    created.clear()
+    del wave, expected, propagator, workspace, grid
+    gc.collect()
+    assert reference() is None
+
+
+def test_band_limited_propagator_is_reentrant():
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    fields = [SphericalWave(grid, f, 60, WAVELENGTH).field for f in np.linspace(0.05, 0.3, 8)]
+    propagator = BandLimitedAngularSpectrum(grid, WAVELENGTH)
+    expected = [propagator.propagate(field, 0.05) for field in fields]
+
+    # рабочее поле у каждого потока свое, поэтому одновременные вызовы не портят друг другу входные данные
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda field: propagator.propagate(field, 0.05), fields * 4))
+
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, expected[i % len(fields)])
+
+
+@pytest.mark.parametrize('z, tolerance', [(0., 1e-12), (0.03, 1e-2)])
+def test_matrix_fourier_propagation_matches_angular_spectrum(z, tolerance):
+    roi, start = 64, (SIZE - 64) // 2
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+
+    reference = make_wave()
+    angular_spectrum_propagation(reference, z, frequency_grid=frequency_grid, cache=None)
+    reference_roi = reference.field[start:start + roi, start:start + roi]
+
+    # z = 0 - вырезание ROI, иначе - импульсный отклик Френеля
+    wave = make_wave()
+    matrix_fourier_propagation(wave, z, roi_shape=roi)
+    assert wave.field.shape == (roi, roi)
+
+    error = np.max(np.abs(wave.field - reference_roi)) / np.max(np.abs(reference_roi))
+    assert error <= tolerance
+
+
+@pytest.mark.parametrize('z, roi_pixel_size', [
+    (0.002, PX_SIZE),  # z < N * px^2 / lambda (5.1 мм): входной чирп недискретизирован
+    (-0.002, PX_SIZE),
+    (0.03, 16 * PX_SIZE),  # ROI за пределами lambda * z / (2 * px) = 1.9 мм
+])
+def test_matrix_fourier_propagation_rejects_undersampled_distances(z, roi_pixel_size):
+    wave = make_wave()
+    field = wave.field
+
+    with pytest.raises(ValueError):
+        matrix_fourier_propagation(wave, z, roi_shape=64, roi_pixel_size=roi_pixel_size)
+
+    assert wave.field is field
+
+
+@pytest.mark.parametrize('precision', ['double', 'single'])
+def test_evanescent_waves_are_discarded(precision):
+    # размер пикселя меньше lambda / 2: углы частотной сетки лежат за пределами круга lambda * nu <= 1
+    px_size = WAVELENGTH / 3
+    grid = grid_registry.cartesian(32, 32, px_size, precision)
+    frequency_grid = grid_registry.frequency(32, 32, px_size, precision)
+    nu_squared = frequency_grid.grid.x_grid ** 2 + frequency_grid.grid.y_grid ** 2
+    evanescent = WAVELENGTH ** 2 * nu_squared > 1
+    assert np.any(evanescent) and not np.all(evanescent)
+
+    h = angular_spectrum_transfer_function(frequency_grid, WAVELENGTH, 1e-6, cache=None)
+    assert h.dtype == grid.precision.complex_dtype
+    np.testing.assert_array_equal(np.abs(h[evanescent]), 0.)
+    np.testing.assert_allclose(np.abs(h[~evanescent]), 1., rtol=1e-6)
+
+    # внутри круга фаза - k * z * sqrt(1 - lambda^2 * nu^2) по модулю 2pi
+    phase = propagation_phase(nu_squared[~evanescent], WAVELENGTH, 1e-6)
+    propagating = nu_squared[~evanescent].astype(np.float64)
+    expected = 2 * np.pi / WAVELENGTH * 1e-6 * np.sqrt(1 - WAVELENGTH ** 2 * propagating)
+    np.testing.assert_allclose(np.angle(np.exp(1j * (phase - expected))), 0., atol=1e-3)
+
+    # band-limited метод: на дополненной сетке затухающие частоты также обнулены
+    propagator = BandLimitedAngularSpectrum(grid, WAVELENGTH, cache=None)
+    h_bl = propagator.transfer_function(1e-6)
+    nu_y, nu_x = np.fft.fftfreq(64, px_size), np.fft.fftfreq(64, px_size)
+    bl_evanescent = WAVELENGTH ** 2 * (nu_y[:, np.newaxis] ** 2 + nu_x[np.newaxis, :] ** 2) > 1
+    np.testing.assert_array_equal(np.abs(h_bl[bl_evanescent]), 0.)
+
+
+@pytest.mark.parametrize('z', [0.2 * CRITICAL_DISTANCE, CRITICAL_DISTANCE])
+def test_fresnel_transfer_function_matches_angular_spectrum(z):
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    reference = make_beam()
+    angular_spectrum_propagation(reference, z, frequency_grid=frequency_grid, cache=None)
+
+    for kwargs in ({'frequency_grid': frequency_grid, 'cache': None}, {}):
+        wave = make_beam()
+        fresnel_propagation(wave, z, **kwargs)
+
+        assert wave.grid is reference.grid
+        error = np.max(np.abs(wave.field - reference.field)) / np.max(np.abs(reference.field))
+        assert error < 1e-5
+
+
+@pytest.mark.parametrize('scale', [1, 2, 4])
+def test_fresnel_impulse_response_matches_angular_spectrum(scale):
+    # шаг результата scale * pixel_size: эталон - угловой спектр на сетке в scale раз больше,
+    # взятый через scale отсчетов вокруг центра
+    z = scale * CRITICAL_DISTANCE
+    wave = make_beam()
+    fresnel_ir_propagation(wave, z)
+
+    assert wave.grid is grid_registry.cartesian(SIZE, SIZE, WAVELENGTH * z / (SIZE * PX_SIZE))
+    assert wave.grid.pixel_size == pytest.approx(scale * PX_SIZE, rel=1e-12)
+
+    size = scale * SIZE
+    reference = make_beam(size)
+    angular_spectrum_propagation(reference, z, frequency_grid=grid_registry.frequency(size, size, PX_SIZE), cache=None)
+    roi = slice(size // 2 - scale * (SIZE // 2), size // 2 + scale * (SIZE // 2), scale)
+    reference_field = reference.field[roi, roi]
+
+    error = np.max(np.abs(wave.field - reference_field)) / np.max(np.abs(reference_field))
+    assert error < 1e-5
+
+
+@pytest.mark.parametrize('factor, impulse_response', [(0.99, False), (1.01, True)])
+def test_fresnel_auto_switches_at_critical_distance(factor, impulse_response):
+    # передаточная функция при z <= N * pixel_size^2 / lambda, импульсный отклик (новая сетка) дальше
+    z = factor * CRITICAL_DISTANCE
+    wave = make_beam()
+    fresnel_auto_propagation(wave, z)
+
+    expected = make_beam()
+    if impulse_response:
+        fresnel_ir_propagation(expected, z)
+    else:
+        fresnel_propagation(expected, z)
+
+    assert wave.grid is expected.grid
+    assert (wave.grid.pixel_size != PX_SIZE) == impulse_response
+    np.testing.assert_array_equal(wave.field, expected.field)
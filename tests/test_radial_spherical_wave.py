@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.propagation.model.areas.grid import RadialGrid
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves.radial_spherical_wave import RadialSphericalWave
+from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.utils.optic.propagation_methods import angular_spectrum_propagation, hankel_propagation
+
+WAVELENGTH = 632.8e-9
+
+
+def make_wave() -> RadialSphericalWave:
+    return RadialSphericalWave(RadialGrid(128, 5.04e-6), 0.1, 120, WAVELENGTH)
+
+
+def test_field_setter_recomputes_profiles_lazily():
+    wave = make_wave()
+    field = wave.field * np.exp(1j * 0.5)
+
+    wave.field = field
+    assert wave._phase is None and wave._intensity is None
+
+    np.testing.assert_allclose(wave.phase, np.angle(field))
+    np.testing.assert_allclose(wave.intensity, np.abs(field) ** 2)
+
+
+def test_phase_setter_keeps_intensity():
+    wave = make_wave()
+    intensity = wave.intensity.copy()
+    phase = np.linspace(0, 1, intensity.size)
+
+    wave.phase = phase
+    np.testing.assert_allclose(wave.intensity, intensity)
+    np.testing.assert_allclose(np.angle(wave.field), phase, atol=1e-12)
+
+
+def test_intensity_setter_keeps_phase():
+    wave = make_wave()
+    phase = wave.phase.copy()
+    intensity = np.full_like(wave.intensity, 0.25)
+
+    wave.intensity = intensity
+    np.testing.assert_allclose(np.abs(wave.field) ** 2, intensity)
+    np.testing.assert_allclose(wave.phase, phase)
+
+
+def sample_on_x_axis(field: np.ndarray, grid, x: np.ndarray) -> np.ndarray:
+    """ Значения поля на оси y = 0 в точках x тригонометрической интерполяцией (обратное ДПФ в точках x) """
+    height, width = field.shape
+    nu_y, nu_x = np.fft.fftfreq(height, grid.pixel_size), np.fft.fftfreq(width, grid.pixel_size)
+    spectrum = np.fft.fft2(field)
+
+    row = np.exp(-2j * np.pi * nu_y * grid.y_axis[0]) @ spectrum / height
+    return np.exp(2j * np.pi * np.outer(x - grid.x_axis[0], nu_x)) @ row / width
+
+
+@pytest.mark.parametrize('z', [0.05, 0.1, 0.15])
+def test_hankel_propagation_matches_2d_angular_spectrum(z):
+    # 256 радиальных отсчетов и плоскость 512 x 512 с тем же размером пикселя: пучок целиком внутри обеих сеток
+    points, px_size = 256, 5.04e-6
+    radial = RadialSphericalWave(RadialGrid(points, px_size), 0.1, 120, WAVELENGTH)
+    radial.propagate_on_distance(z, method=hankel_propagation)
+
+    grid = grid_registry.cartesian(2 * points, 2 * points, px_size)
+    cartesian = SphericalWave(grid, 0.1, 120, WAVELENGTH)
+    angular_spectrum_propagation(cartesian, z, frequency_grid=grid_registry.frequency(2 * points, 2 * points, px_size))
+
+    # сравнение в радиальных отсчетах без ошибки линейной интерполяции
+    expected = sample_on_x_axis(cartesian.field, grid, radial.grid.grid)
+    error = np.max(np.abs(radial.field - expected)) / np.max(np.abs(expected))
+    assert error < 1e-6
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from src.propagation.utils.math.derivative.finite_difference import polyfit_weights
+from src.propagation.utils.tie import BoundaryConditions, DCTSolver, FFTSolver
+
+SHAPE = (64, 48)
+DZ = 1e-3
+WAVELENGTH = 632.8e-9
+PX_SIZE = 5.04e-6
+THRESHOLD = 0.1
+
+
+def intensities(shape=SHAPE, shift=0.):
+    """ Пара гауссоид на пьедестале, вторая смещена по x (интенсивности в плоскостях z - dz и z + dz) """
+    y, x = np.meshgrid(np.linspace(-1, 1, shape[0]), np.linspace(-1, 1, shape[1]), indexing='ij')
+    i1 = np.exp(-(x ** 2 + y ** 2) / 0.3) + 0.05
+    i2 = np.exp(-((x - 0.03 - shift) ** 2 + y ** 2) / 0.32) + 0.05
+    return i1, i2
+
+
+@pytest.mark.parametrize('bc', [BoundaryConditions.NONE, BoundaryConditions.NEUMANN, BoundaryConditions.DIRICHLET])
+def test_solve_many_and_batch_match_solve(bc):
+    solver = FFTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE, bc)
+    pairs = [intensities(shift=shift) for shift in (0., 0.02, 0.05)]
+
+    phases = [solver.solve(i1, i2, THRESHOLD) for i1, i2 in pairs]
+
+    for (i1, i2), phase in zip(pairs, phases):
+        np.testing.assert_array_equal(solver.solve_many(i1, i2, [THRESHOLD])[0, 0], phase)
+
+    np.testing.assert_array_equal(solver.solve_batch(np.array(pairs), THRESHOLD), phases)
+
+    # серия по z с номерами пар
+    stack = np.array([pairs[0][0], pairs[0][1], pairs[2][1]])
+    np.testing.assert_array_equal(solver.solve_batch(stack, THRESHOLD, pairs=[[0, 1], [0, 2]]),
+                                  [phases[0], phases[2]])
+
+
+def test_solve_many_grid():
+    solver = FFTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE)
+    i1, i2 = intensities()
+    thresholds, reg_params = [0.06, THRESHOLD], [solver.reg_param, 1e3 * solver.reg_param]
+
+    phases, best = solver.solve_many(i1, i2, thresholds, reg_params, select_best=True)
+
+    assert phases.shape == (2, 2, *SHAPE)
+    np.testing.assert_array_equal(phases[0, 1], solver.solve(i1, i2, THRESHOLD))
+    assert best.threshold in thresholds and best.reg_param in reg_params
+    assert best.residual == pytest.approx(solver.residual(i1, i2, best.phase), rel=1e-6)
+
+
+@pytest.mark.parametrize('solver_type, bc', [(FFTSolver, BoundaryConditions.NONE),
+                                             (FFTSolver, BoundaryConditions.NEUMANN),
+                                             (DCTSolver, BoundaryConditions.DIRICHLET)])
+def test_inputs_are_not_modified(solver_type, bc):
+    solver = solver_type(SHAPE, DZ, WAVELENGTH, PX_SIZE, bc)
+    i1, i2 = intensities()
+    i1[:4] = 0.01  # ниже порога
+    i1_copy, i2_copy = i1.copy(), i2.copy()
+
+    thresholded, mask = solver.add_threshold(i1, THRESHOLD)
+    assert np.all(thresholded[mask] == THRESHOLD) and np.count_nonzero(mask) > 0
+
+    solver.solve(i1, i2, THRESHOLD)
+    solver.solve_planes(np.array([i1, i2]), [0., 2 * DZ], THRESHOLD)
+
+    np.testing.assert_array_equal(i1, i1_copy)
+    np.testing.assert_array_equal(i2, i2_copy)
+
+
+@pytest.mark.parametrize('solver_type, bc', [(FFTSolver, BoundaryConditions.NEUMANN),
+                                             (DCTSolver, BoundaryConditions.NEUMANN)])
+def test_solve_planes_matches_solve(solver_type, bc):
+    solver = solver_type(SHAPE, DZ, WAVELENGTH, PX_SIZE, bc)
+    i1, i2 = intensities()
+    expected = solver.solve(i1, i2, THRESHOLD)
+
+    # по умолчанию фаза восстанавливается в первой плоскости серии, как и в solve
+    for z in ([0., 2 * DZ], [0.05, 0.05 + 2 * DZ]):
+        phase = solver.solve_planes(np.array([i1, i2]), z, THRESHOLD)
+        assert np.max(np.abs(phase - expected)) <= 1e-10 * np.ptp(expected)
+
+
+def test_polyfit_weights_reject_repeated_planes():
+    with pytest.raises(ValueError):
+        polyfit_weights([0., DZ, DZ], z0=0.)
+
+
+@pytest.mark.parametrize('precision, rtol', [('double', 1e-12), ('single', 1e-5)])
+def test_dct_solver_matches_volkov_scheme(precision, rtol):
+    i1, i2 = intensities()
+    volkov = FFTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE, BoundaryConditions.NEUMANN, precision=precision)
+    dct = DCTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE, BoundaryConditions.NEUMANN, precision=precision)
+
+    expected = volkov.solve(i1, i2, THRESHOLD)
+    phase = dct.solve(i1, i2, THRESHOLD)
+
+    assert phase.dtype == expected.dtype
+    assert np.max(np.abs(phase - expected)) <= rtol * np.ptp(expected)
+
+
+def test_periodic_matches_unpadded_fft():
+    i1, i2 = intensities()
+    periodic = FFTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE, BoundaryConditions.PERIODIC)
+    unpadded = FFTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE, BoundaryConditions.NONE)
+
+    assert periodic.padded_shape == SHAPE
+    np.testing.assert_array_equal(periodic.solve(i1, i2, THRESHOLD), unpadded.solve(i1, i2, THRESHOLD))
+
+
+def test_shape_mismatch_is_rejected():
+    solver = FFTSolver(SHAPE, DZ, WAVELENGTH, PX_SIZE)
+    i1, i2 = intensities(shape=(32, 32))
+
+    with pytest.raises(ValueError):
+        solver.solve(i1, i2, THRESHOLD)
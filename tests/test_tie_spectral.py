@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from src.propagation.utils.math.derivative.fourier import gradient_2d, ilaplacian_2d, rgradient_2d, rilaplacian_2d
+from src.propagation.utils.tie import BoundaryConditions, FFTSolver, apply_volkov_scheme, clip, padded_shape
+from tests.test_tie import DZ, PX_SIZE, THRESHOLD, WAVELENGTH, intensities
+
+SHAPES = [(64, 48), (63, 49), (64, 49), (63, 48)]
+CONDITIONS = list(BoundaryConditions)
+
+
+def complex_fft_phase(i1: np.ndarray, i2: np.ndarray, bc: BoundaryConditions) -> np.ndarray:
+    """
+    Исходная (до rfft2) цепочка решения TIE полными комплексными FFT с проекцией на вещественные функции после
+    каждого этапа; частотные коэффициенты - в порядке numpy.fft
+    """
+    height, width = padded_shape(i1.shape, bc)
+    kx = 1j * 2 * np.pi * np.fft.fftfreq(width, d=PX_SIZE).reshape(1, -1)
+    ky = 1j * 2 * np.pi * np.fft.fftfreq(height, d=PX_SIZE).reshape(-1, 1)
+    reg_param = 2.2204e-16 / PX_SIZE ** 4
+
+    ref_intensity = apply_volkov_scheme(i1, bc)
+    axial_derivative = (apply_volkov_scheme(i2, bc) - ref_intensity) / (2 * DZ)
+
+    phase = ilaplacian_2d(-2 * np.pi / WAVELENGTH * axial_derivative, kx, ky, reg_param, return_spacedomain=False)
+    phase_x, phase_y = gradient_2d(phase, phase, kx, ky, space_domain=False)
+
+    mask = ref_intensity < THRESHOLD
+    intensity = np.where(mask, THRESHOLD, ref_intensity)
+    phase_x, phase_y = phase_x / intensity, phase_y / intensity
+    phase_x[mask], phase_y[mask] = 0, 0
+
+    phase_x, phase_y = gradient_2d(phase_x, phase_y, kx, ky)
+    return clip(np.real(ilaplacian_2d(phase_x + phase_y, kx, ky, reg_param)), bc)
+
+
+def staged_rfft_phase(solver: FFTSolver, i1: np.ndarray, i2: np.ndarray) -> np.ndarray:
+    """
+    Поэтапная цепочка rfft2 (до слияния этапов в частотной области): после каждого градиента и обратного Лапласиана
+    решение возвращается в пространственную область
+    """
+    spectral_filter = solver.get_ilaplacian_filter(solver.reg_param)
+
+    ref_intensity = solver.prepare(i1)
+    axial_derivative = solver.axial_derivative(ref_intensity, solver.prepare(i2))
+
+    phase = rilaplacian_2d(-2 * np.pi / WAVELENGTH * axial_derivative, solver.kx, solver.ky, solver.reg_param,
+                           return_spacedomain=False, spectral_filter=spectral_filter)
+    phase_x, phase_y = rgradient_2d(phase, phase, solver.kx, solver.ky, space_domain=False,
+                                    shape=solver.padded_shape)
+
+    mask = ref_intensity < THRESHOLD
+    intensity = np.where(mask, THRESHOLD, ref_intensity)
+    phase_x, phase_y = phase_x / intensity, phase_y / intensity
+    phase_x[mask], phase_y[mask] = 0, 0
+
+    phase_x, phase_y = rgradient_2d(phase_x, phase_y, solver.kx, solver.ky)
+    phase = rilaplacian_2d(phase_x + phase_y, solver.kx, solver.ky, solver.reg_param, spectral_filter=spectral_filter)
+    return clip(phase, solver.boundary_condition)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('bc', CONDITIONS)
+def test_fused_solver_matches_staged_chain(shape, bc):
+    i1, i2 = intensities(shape)
+    solver = FFTSolver(shape, DZ, WAVELENGTH, PX_SIZE, bc)
+
+    expected = staged_rfft_phase(solver, i1, i2)
+    phase = solver.solve(i1, i2, THRESHOLD)
+
+    assert np.max(np.abs(phase - expected)) <= 1e-12 * np.ptp(expected)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('bc', CONDITIONS)
+def test_rfft_solver_matches_complex_fft(shape, bc):
+    i1, i2 = intensities(shape)
+    expected = complex_fft_phase(i1, i2, bc)
+
+    phase = FFTSolver(shape, DZ, WAVELENGTH, PX_SIZE, bc).solve(i1, i2, THRESHOLD)
+
+    assert phase.shape == shape
+    assert np.max(np.abs(phase - expected)) <= 1e-12 * np.ptp(expected)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_rfrequency_coefs_are_hermitian(shape):
+    solver = FFTSolver(shape, DZ, WAVELENGTH, PX_SIZE)
+    height, width = shape
+
+    # нулевая частота в первом отсчете, половина спектра совпадает с полным спектром без частот Найквиста
+    full_kx = 1j * 2 * np.pi * np.fft.fftfreq(width, d=PX_SIZE)
+    expected_kx = full_kx[:width // 2 + 1].copy()
+    if width % 2 == 0:
+        expected_kx[-1] = 0
+
+    assert solver.kx.shape == (1, width // 2 + 1) and solver.ky.shape == (height, 1)
+    assert solver.kx[0, 0] == 0 and solver.ky[0, 0] == 0
+    np.testing.assert_allclose(solver.kx[0], expected_kx, rtol=1e-15)
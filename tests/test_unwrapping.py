@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.propagation.utils.math.unwrapping import get_unwrapper, unwrap_phase
+
+
+def defocus_phase(size=96, curvature=60.):
+    """ Квадратичная фаза (несколько десятков радиан) и её свернутое значение """
+    y, x = np.meshgrid(np.linspace(-1, 1, size), np.linspace(-1, 1, size), indexing='ij')
+    phase = curvature * (x ** 2 + y ** 2) + 3 * x
+    return phase, np.angle(np.exp(1j * phase))
+
+
+def assert_equal_up_to_constant(unwrapped, expected, atol=1e-6):
+    difference = unwrapped - expected
+    np.testing.assert_allclose(difference, np.mean(difference), atol=atol)
+
+
+@pytest.mark.parametrize('unwrapper', ['skimage', 'lsq'])
+def test_full_frame_unwrapping(unwrapper):
+    phase, wrapped = defocus_phase()
+    assert_equal_up_to_constant(unwrap_phase(wrapped, unwrapper=unwrapper), phase)
+
+
+def test_lsq_matches_skimage_inside_aperture():
+    phase, wrapped = defocus_phase()
+    y, x = np.meshgrid(np.linspace(-1, 1, phase.shape[0]), np.linspace(-1, 1, phase.shape[1]), indexing='ij')
+    masked = np.ma.masked_array(wrapped, mask=x ** 2 + y ** 2 > 0.8)
+
+    skimage_phase = unwrap_phase(masked, unwrapper='skimage')
+    lsq_phase = unwrap_phase(masked, unwrapper='lsq')
+
+    np.testing.assert_array_equal(np.ma.getmaskarray(lsq_phase), masked.mask)
+    assert_equal_up_to_constant(lsq_phase.compressed(), skimage_phase.compressed())
+
+
+def test_dtype_is_preserved():
+    _, wrapped = defocus_phase()
+    assert unwrap_phase(wrapped.astype(np.float32), unwrapper='lsq').dtype == np.float32
+
+
+def test_named_unwrappers_are_shared():
+    assert get_unwrapper('lsq') is get_unwrapper('lsq')
+
+    with pytest.raises(ValueError):
+        get_unwrapper('unknown')
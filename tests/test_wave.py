@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+from skimage.restoration import unwrap_phase
+
+from src.propagation.model.areas.aperture import Aperture
+from src.propagation.model.areas.grid_registry import grid_registry
+from src.propagation.model.waves import spherical_wave
+from src.propagation.model.waves.spherical_wave import SphericalWave
+from src.propagation.utils.math import units
+from src.propagation.utils.math.general import calc_amplitude, calculate_radius, widest_diameter
+from src.propagation.utils.optic.wavefront import defocus_radius
+
+SIZE = 256
+PX_SIZE = 5.04e-6
+WAVELENGTH = 632.8e-9
+
+
+def test_modify_aperture_runs_once_per_plane(monkeypatch):
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    wave = SphericalWave(grid, 0.05, 200, WAVELENGTH)
+    wave.propagate_on_distance(0.02, frequency_grid=frequency_grid)
+
+    calls = []
+    modify = Aperture.modify
+    monkeypatch.setattr(Aperture, 'modify', lambda self, *args: calls.append(args) or modify(self, *args))
+
+    aperture = Aperture(grid_registry.polar(SIZE, SIZE, PX_SIZE), widest_diameter(wave.intensity, np.exp(-2)))
+    original_diameter = aperture.aperture_diameter
+
+    wave.get_wrapped_phase(aperture=aperture, z=0.02)
+    modified_diameter = aperture.aperture_diameter
+    assert modified_diameter != original_diameter
+
+    # повторные вызовы с уже модифицированной апертурой и с апертурой исходного диаметра - попадания
+    wave.get_unwrapped_phase(aperture=aperture, z=0.02)
+    wave.get_wavefront_radius(aperture=aperture, z=0.02)
+    other = Aperture(grid_registry.polar(SIZE, SIZE, PX_SIZE), widest_diameter(wave.intensity, np.exp(-2)))
+    wave.get_wrapped_phase(aperture=other, z=0.02)
+
+    assert len(calls) == 1
+    assert aperture.aperture_diameter == other.aperture_diameter == modified_diameter
+
+
+@pytest.mark.parametrize('z', [0., 0.05, 0.1, 0.15])
+def test_wavefront_radius_matches_masked_full_frame_sagitta(z):
+    grid = grid_registry.cartesian(512, 512, PX_SIZE)
+    frequency_grid = grid_registry.frequency(512, 512, PX_SIZE)
+    wave = SphericalWave(grid, 0.1, 250, WAVELENGTH)
+    wave.propagate_on_distance(z, frequency_grid=frequency_grid)
+
+    polar_grid = grid_registry.polar(512, 512, PX_SIZE)
+    aperture = Aperture(polar_grid, widest_diameter(wave.intensity, np.exp(-2)))
+    radius = wave.get_wavefront_radius(aperture=aperture, z=z)
+
+    # стрелка прогиба по фазе, развернутой на всей сетке с маской вне апертуры (нулевой фон после разворачивания)
+    full_frame_phase = unwrap_phase(np.ma.masked_array(wave.phase, mask=aperture.aperture_view == 0))
+    sagitta = units.rad2mm(calc_amplitude(full_frame_phase.filled(0.)), WAVELENGTH)
+    assert radius == pytest.approx(calculate_radius(sagitta, units.m2mm(aperture.aperture_diameter)), rel=1e-12)
+
+
+def test_least_squares_radius_is_signed():
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    polar_grid = grid_registry.polar(SIZE, SIZE, PX_SIZE)
+
+    wave = SphericalWave(grid, 0.1, 200, WAVELENGTH)
+    aperture = Aperture(polar_grid, widest_diameter(wave.intensity, np.exp(-2)))
+
+    # сходящаяся волна - отрицательный радиус, комплексно сопряженная (расходящаяся) - положительный
+    assert wave.get_wavefront_radius_lsq(aperture=aperture) == pytest.approx(-100, rel=1e-3)
+    wave.field = np.conj(wave.field)
+    assert wave.get_wavefront_radius_lsq(aperture=aperture) == pytest.approx(100, rel=1e-3)
+
+    assert defocus_radius(0., 2 * np.pi / WAVELENGTH) == np.inf
+
+
+def test_lazy_propagation_matches_eager():
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    eager = SphericalWave(grid, 0.1, 200, WAVELENGTH)
+    lazy = SphericalWave(grid, 0.1, 200, WAVELENGTH, lazy=True)
+
+    for z in [0.01, 0.02, -0.005, 0.04]:
+        eager.propagate_on_distance(z, frequency_grid=frequency_grid)
+        lazy.propagate_on_distance(z, frequency_grid=frequency_grid)
+
+    error = np.max(np.abs(lazy.field - eager.field)) / np.max(np.abs(eager.field))
+    assert error < 1e-10
+
+
+@pytest.mark.parametrize('attribute', ['field', 'phase', 'amplitude', 'intensity'])
+def test_lazy_propagation_is_flushed_on_read(monkeypatch, attribute):
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    wave = SphericalWave(grid, 0.1, 200, WAVELENGTH, lazy=True)
+    expected = SphericalWave(grid, 0.1, 200, WAVELENGTH)
+    expected.propagate_on_distance(0.03, frequency_grid=frequency_grid)
+
+    # обратное FFT выполняется один раз - при первом чтении поля или производных от него величин
+    calls = []
+    ifft2 = spherical_wave.ifft2
+    monkeypatch.setattr(spherical_wave, 'ifft2', lambda *args, **kwargs: calls.append(args) or ifft2(*args, **kwargs))
+
+    wave.propagate_on_distance(0.01, frequency_grid=frequency_grid)
+    wave.propagate_on_distance(0.02, frequency_grid=frequency_grid)
+    assert not calls
+
+    np.testing.assert_allclose(getattr(wave, attribute), getattr(expected, attribute), atol=1e-9)
+    getattr(wave, attribute)
+    wave.field
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize('kwargs, error', [
+    ({}, TypeError),
+    ({'frequency_grid': grid_registry.cartesian(SIZE, SIZE, PX_SIZE)}, TypeError),
+    ({'frequency_grid': grid_registry.frequency(SIZE // 2, SIZE // 2, PX_SIZE)}, ValueError),
+    ({'frequency_grid': grid_registry.frequency(SIZE, SIZE, 2 * PX_SIZE)}, ValueError),
+    ({'frequency_grid': grid_registry.frequency(SIZE, SIZE, PX_SIZE), 'chache': None}, TypeError),
+])
+def test_lazy_propagation_validates_arguments(kwargs, error):
+    grid = grid_registry.cartesian(SIZE, SIZE, PX_SIZE)
+    frequency_grid = grid_registry.frequency(SIZE, SIZE, PX_SIZE)
+    wave = SphericalWave(grid, 0.1, 200, WAVELENGTH, lazy=True)
+    wave.propagate_on_distance(0.01, frequency_grid=frequency_grid)
+
+    # ошибка возникает при вызове, а уже отложенный шаг сохраняется
+    with pytest.raises(error):
+        wave.propagate_on_distance(0.02, **kwargs)
+
+    expected = SphericalWave(grid, 0.1, 200, WAVELENGTH)
+    expected.propagate_on_distance(0.01, frequency_grid=frequency_grid)
+    np.testing.assert_allclose(wave.field, expected.field, atol=1e-9)